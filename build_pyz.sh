@@ -0,0 +1,36 @@
+#!/bin/bash
+
+# vman.pyz 빌드 스크립트: vm_manager.py + 의존성(packages/*.whl) + 사전 컴파일 바이트코드/템플릿을 단일 zipapp으로 묶습니다.
+# 사용법: ./build_pyz.sh [출력 파일(기본: vman.pyz)]
+#   PYTHON=python3.6 ./build_pyz.sh   # Bastion과 같은 Python 버전으로 빌드해야 .pyc가 그대로 사용됩니다
+#                                     # (버전이 다르면 .py 소스로 자동 대체되어 동작은 동일, 기동만 느림)
+
+set -e
+PYTHON=${PYTHON:-python3}
+OUTPUT=${1:-vman.pyz}
+
+cd "$(dirname "$0")"
+STAGE=$(mktemp -d)
+trap 'rm -rf "$STAGE"' EXIT
+
+echo "=== [1/4] 의존성 벤더링 (packages/*.whl) ==="
+for whl in packages/*.whl; do
+    "$PYTHON" -m zipfile -e "$whl" "$STAGE"
+done
+# 확장 모듈(.so)은 zip 내부에서 로드할 수 없음: PyYAML/MarkupSafe는 순수 파이썬 구현으로 동작
+find "$STAGE" -name '*.so' -delete
+find "$STAGE" -name '*.c' -delete
+rm -rf "$STAGE"/*.libs
+cp vm_manager.py "$STAGE/"
+
+echo "=== [2/4] 템플릿 사전 컴파일 (templates/*.yaml -> Jinja2 모듈) ==="
+# 벤더링된 Jinja2로 컴파일 (실행 시 사용하는 버전과 동일)
+PYTHONPATH="$STAGE" "$PYTHON" -c 'import sys, vm_manager; print(vm_manager.precompile_templates(sys.argv[1]))' "$STAGE"
+
+echo "=== [3/4] 바이트코드 컴파일 ($("$PYTHON" -c 'import sys; print("%d.%d" % sys.version_info[:2])')) ==="
+# -b: zipimport가 읽는 위치(module.pyc)에 생성
+"$PYTHON" -m compileall -q -b "$STAGE"
+
+echo "=== [4/4] zipapp 생성 ==="
+"$PYTHON" -m zipapp "$STAGE" -m "vm_manager:main" -p "/usr/bin/env python3" -o "$OUTPUT"
+echo "[OK] $OUTPUT ($(du -h "$OUTPUT" | cut -f1))"
@@ -22,11 +22,18 @@ EXCLUDES=(
     "${REPO_NAME}/${RELEASE_DIR}"
     "${REPO_NAME}/.vscode"
     "${REPO_NAME}/.idea"
+    "${REPO_NAME}/.vman"
     "*/__pycache__"
     "*.DS_Store"
     # Note: .sh scripts and .md docs are now INCLUDED in the bundle
 )
 
+# 사전 컴파일 번들(vman.pyz) 생성: 실패해도 소스(vm_manager.py)만으로 동작하므로 번들 생성은 계속 진행
+if ! ./build_pyz.sh vman.pyz; then
+    echo "[WARNING] vman.pyz 빌드 실패: 번들에는 소스만 포함됩니다."
+    rm -f vman.pyz
+fi
+
 # 부모 디렉토리로 이동하여 압축 수행
 cd ..
 TAR_CMD="tar"
@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
+import atexit
 import yaml
 import os
 import sys
@@ -8,7 +10,25 @@ import getpass
 import copy
 import ipaddress
 import base64
-from jinja2 import Environment, FileSystemLoader
+import codecs
+import concurrent.futures
+import gzip
+import hashlib
+import io
+import random
+import re
+import secrets
+import select
+import shutil
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+import json
+import zipimport
+from datetime import datetime
+from jinja2 import Environment, FileSystemLoader, ModuleLoader, pass_context
 
 # Force unverified SSL for self-signed clusters
 import ssl
@@ -20,27 +40,239 @@ else:
     ssl._create_default_https_context = _create_unverified_https_context
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Running from the zipapp built by build_pyz.sh: data directories live next to the archive
+BUNDLE_PATH = None
+if os.path.isfile(BASE_DIR):
+    BUNDLE_PATH, BASE_DIR = BASE_DIR, os.path.dirname(BASE_DIR)
 PROJECTS_DIR = os.path.join(BASE_DIR, 'projects')
 INFRA_DIR = os.path.join(BASE_DIR, 'infrastructure')
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates') 
+STATE_DIR = os.path.join(BASE_DIR, '.vman') # Local runtime state (logs, journals, caches)
+COMPILED_TEMPLATES = 'templates_c' # Jinja2 modules precompiled into the zipapp (+ sources.json digests)
 
-def run_command(cmd, input_data=None):
-    """Executes a shell command and returns stdout."""
-    try:
-        result = subprocess.run(
-            cmd,
-            input=input_data,
-            encoding='utf-8',
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            check=True
-        )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        # If command fails, we want to see the error from the tool (e.g. oc stderr)
-        error_msg = e.stderr.strip() if e.stderr else str(e)
+# Upper bound on concurrent 'oc' processes when fanning out read-only queries
+MAX_INFLIGHT_COMMANDS = 6
+
+# Client-side API budget shared by every 'oc' call (overridable with --qps/--burst)
+DEFAULT_QPS = 10.0
+DEFAULT_BURST = 20
+
+# Retry policy for transient API errors: exponential backoff with full jitter
+RETRY_ATTEMPTS = 5
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 16.0
+
+# Transient failures worth retrying: throttling (429 / API priority and fairness), etcd and
+# webhook timeouts, API server restarts. Conflicts, NotFound, Forbidden and invalid objects are final.
+# HTTP codes only count in oc's own formats ('Error from server (Reason)', 'status code 503', '(code 503)').
+RETRIABLE_ERRORS = re.compile(
+    r"Too Many Requests|rate limit|etcdserver: (request timed out|leader changed|too many requests)"
+    r"|failed calling webhook|context deadline exceeded|Client\.Timeout|i/o timeout|TLS handshake timeout"
+    r"|connection refused|connection reset by peer|unexpected EOF|http2: client connection lost"
+    r"|Error from server \((TooManyRequests|ServiceUnavailable|Timeout|ServerTimeout)\)"
+    r"|status code (429|50[234])\b|\(code (429|50[234])\)"
+    r"|the server is currently unable to handle the request"
+    r"|the server was unable to return a response in the time allotted",
+    re.IGNORECASE
+)
+
+# Verbs that are safe to repeat when an attempt failed ambiguously (it may have succeeded on the
+# server). Other verbs (create, replace, delete, label, patch) are retried only when the caller opts in.
+RETRY_SAFE_VERBS = ('get', 'apply')
+
+class TokenBucket:
+    """Thread-safe token bucket: `qps` sustained calls per second with bursts of up to `burst`."""
+
+    def __init__(self, qps, burst):
+        self.lock = threading.Lock()
+        self.configure(qps, burst)
+
+    def configure(self, qps, burst):
+        with self.lock:
+            self.qps = float(qps) if qps else 0.0 # 0 = unlimited
+            self.burst = max(int(burst or 1), 1)
+            self.tokens = float(self.burst)
+            self.updated = time.monotonic()
+
+    def reserve(self):
+        """Takes one token and returns the seconds the caller has to wait before using it."""
+        if self.qps <= 0:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.qps)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.qps
+
+API_RATE_LIMITER = TokenBucket(DEFAULT_QPS, DEFAULT_BURST)
+
+# Per-thread cluster binding for multi-cluster fan-out: 'context' (kubeconfig context added to
+# every 'oc' call), 'cluster' (overrides applied by load_config) and 'output' (captured stdout)
+CLUSTER_LOCAL = threading.local()
+CLUSTER_LIMITERS = {}
+CLUSTER_LIMITERS_LOCK = threading.Lock()
+
+def rate_limiter():
+    """Token bucket of the current thread's cluster (each API server has its own budget)."""
+    context = getattr(CLUSTER_LOCAL, 'context', None)
+    if not context:
+        return API_RATE_LIMITER
+    with CLUSTER_LIMITERS_LOCK:
+        if context not in CLUSTER_LIMITERS:
+            CLUSTER_LIMITERS[context] = TokenBucket(API_RATE_LIMITER.qps, API_RATE_LIMITER.burst)
+        return CLUSTER_LIMITERS[context]
+
+def with_cluster_context(cmd):
+    """Adds '--context <ctx>' to 'oc' calls made from a thread bound to a cluster."""
+    context = getattr(CLUSTER_LOCAL, 'context', None)
+    if context and cmd and cmd[0] == 'oc':
+        return ['oc', '--context', context] + list(cmd[1:])
+    return cmd
+
+class ThreadLocalStdout:
+    """sys.stdout proxy: threads with a capture buffer (CLUSTER_LOCAL.output) write there, others to the real stream."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        return (getattr(CLUSTER_LOCAL, 'output', None) or self.stream).write(data)
+
+    def flush(self):
+        (getattr(CLUSTER_LOCAL, 'output', None) or self.stream).flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def is_retriable_error(message):
+    return bool(RETRIABLE_ERRORS.search(message or ''))
+
+def retry_allowed(cmd, retry=None):
+    """`retry` from the caller wins; by default only idempotent 'oc' verbs are retried."""
+    if retry is not None:
+        return retry
+    return len(cmd) > 1 and cmd[0] == 'oc' and cmd[1] in RETRY_SAFE_VERBS
+
+def retry_delay(attempt):
+    """Backoff before retry number `attempt` (0-based): full jitter over an exponentially growing cap."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+def report_retry(cmd, attempt, delay, error_msg):
+    reason = error_msg.splitlines()[0][:100] if error_msg else 'unknown error'
+    print(f"  [RETRY  ] {' '.join(cmd[:3])} (retry {attempt}/{RETRY_ATTEMPTS - 1} in {delay:.1f}s): {reason}")
+
+def run_command(cmd, input_data=None, retry=None):
+    """
+    Executes a shell command and returns stdout.
+    Calls are paced by the shared API rate limiter. Transient API errors are retried with backoff
+    for idempotent verbs, or for any command when `retry` is True (e.g. 'delete --ignore-not-found').
+    """
+    retry = retry_allowed(cmd, retry)
+    cmd = with_cluster_context(cmd)
+    attempt = 0
+    while True:
+        time.sleep(rate_limiter().reserve())
+        try:
+            result = subprocess.run(
+                cmd,
+                input=input_data,
+                encoding='utf-8',
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                check=True
+            )
+            return result.stdout.strip()
+        except subprocess.CalledProcessError as e:
+            # If command fails, we want to see the error from the tool (e.g. oc stderr)
+            error_msg = e.stderr.strip() if e.stderr else str(e)
+            if retry and attempt + 1 < RETRY_ATTEMPTS and is_retriable_error(error_msg):
+                attempt += 1
+                delay = retry_delay(attempt - 1)
+                report_retry(cmd, attempt, delay, error_msg)
+                time.sleep(delay)
+                continue
+            raise Exception(error_msg)
+
+async def run_command_async(cmd, semaphore, input_data=None):
+    """Asyncio counterpart of run_command. Waits on `semaphore` to bound in-flight processes."""
+    retry = retry_allowed(cmd)
+    cmd = with_cluster_context(cmd)
+    attempt = 0
+    while True:
+        async with semaphore:
+            await asyncio.sleep(rate_limiter().reserve())
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=subprocess.PIPE if input_data is not None else None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+            stdout, stderr = await proc.communicate(input_data.encode('utf-8') if input_data is not None else None)
+        if proc.returncode == 0:
+            return stdout.decode('utf-8').strip()
+        error_msg = stderr.decode('utf-8').strip()
+        if not error_msg:
+            error_msg = f"Command '{' '.join(cmd)}' returned non-zero exit status {proc.returncode}."
+        if retry and attempt + 1 < RETRY_ATTEMPTS and is_retriable_error(error_msg):
+            attempt += 1
+            delay = retry_delay(attempt - 1)
+            report_retry(cmd, attempt, delay, error_msg)
+            await asyncio.sleep(delay) # Backoff outside the semaphore: other queries keep going
+            continue
         raise Exception(error_msg)
 
+def run_commands_parallel(queries, limit=MAX_INFLIGHT_COMMANDS):
+    """
+    Executes independent commands concurrently (at most `limit` at a time).
+    `queries` maps a key to a command list. Returns a dict with the same keys holding
+    either the stdout string or the Exception raised by that command.
+    """
+    keys = list(queries.keys())
+
+    if sys.version_info < (3, 8) and threading.current_thread() is not threading.main_thread():
+        # Before 3.8 asyncio can only reap subprocesses on the main thread: use worker threads
+        # that inherit this thread's cluster binding instead
+        binding = dict(vars(CLUSTER_LOCAL))
+
+        def run_bound(cmd):
+            vars(CLUSTER_LOCAL).update(binding)
+            return run_command(cmd)
+
+        results = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=limit) as pool:
+            futures = {k: pool.submit(run_bound, queries[k]) for k in keys}
+            for k in keys:
+                try:
+                    results[k] = futures[k].result()
+                except Exception as e:
+                    results[k] = e
+        return results
+
+    async def gather_all():
+        semaphore = asyncio.Semaphore(limit)
+        return await asyncio.gather(
+            *[run_command_async(queries[k], semaphore) for k in keys],
+            return_exceptions=True
+        )
+
+    # Fresh loop per batch (asyncio.run is not available on the Python 3.6 bastions)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        results = loop.run_until_complete(gather_all())
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+    return dict(zip(keys, results))
+
+def query_result(results, key):
+    """Returns the stdout of a parallel query, re-raising its error if it failed."""
+    value = results[key]
+    if isinstance(value, Exception):
+        raise value
+    return value
+
 def ensure_namespace(namespace):
     """Ensures the Kubernetes namespace exists."""
     try:
@@ -51,20 +283,27 @@ def ensure_namespace(namespace):
             run_command(['oc', 'create', 'namespace', namespace])
             print(f"  [SUCCESS] Namespace '{namespace}' created.")
         except Exception as e:
+            if 'AlreadyExists' in str(e):
+                # Created concurrently (another worker or cluster thread)
+                return
             print(f"  [ERROR] Failed to create namespace '{namespace}': {e}")
             sys.exit(1)
 
+# libyaml-backed loader when PyYAML was built with it (same safe types, ~10x faster on large specs)
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 def load_yaml(path):
     if not os.path.exists(path):
         return {}
     with open(path, 'r') as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=YAML_LOADER)
 
-def load_infrastructure_config(project_name, spec_context=None):
+def load_infrastructure_config(project_name, spec_context=None, base=None):
     """
     Loads infrastructure definitions.
     Priority 1: defined in Spec file (context['infrastructure'])
     Priority 2: defined in Project Infrastructure Directory (projects/<project>/infrastructure/*.yaml)
+    `base` is an already loaded project-level result, reused instead of re-reading the files.
     """
     # 1. Start with Project-Level Files (Base)
     project_infra_dir = os.path.join(PROJECTS_DIR, project_name, 'infrastructure')
@@ -72,13 +311,17 @@ def load_infrastructure_config(project_name, spec_context=None):
     infra = {
         'networks': {},
         'images': {},
-        'storage_profiles': {}
+        'storage_profiles': {},
+        'performance_profiles': {}
     }
 
-    if os.path.exists(project_infra_dir):
+    if base is not None:
+        infra = {key: dict(value) for key, value in base.items()}
+    elif os.path.exists(project_infra_dir):
         infra['networks'] = load_yaml(os.path.join(project_infra_dir, 'networks.yaml')).get('networks', {})
         infra['images'] = load_yaml(os.path.join(project_infra_dir, 'images.yaml')).get('images', {})
         infra['storage_profiles'] = load_yaml(os.path.join(project_infra_dir, 'storage.yaml')).get('storage_profiles', {})
+        infra['performance_profiles'] = load_yaml(os.path.join(project_infra_dir, 'performance.yaml')).get('performance_profiles', {})
         
     # 2. Override/Merge with Spec-Level Definitions
     if spec_context and 'infrastructure' in spec_context:
@@ -95,9 +338,20 @@ def load_infrastructure_config(project_name, spec_context=None):
         # Merge Storage
         if 'storage_profiles' in spec_infra:
             infra['storage_profiles'].update(spec_infra['storage_profiles'])
+
+        # Merge Performance Profiles
+        if 'performance_profiles' in spec_infra:
+            infra['performance_profiles'].update(spec_infra['performance_profiles'])
             
     return infra
 
+def placement_hints_path(project_name, spec_name):
+    return os.path.join(PROJECTS_DIR, project_name, 'placement', f"{spec_name}.yaml")
+
+def load_placement_hints(project_name, spec_name):
+    """Node hints saved by 'rebalance --save-placement' ({instance: hostname}); kept out of the spec context."""
+    return (load_yaml(placement_hints_path(project_name, spec_name)) or {}).get('hints') or {}
+
 def load_config(project_name, spec_name):
     """
     Loads configuration (v1.0 Convention):
@@ -138,6 +392,10 @@ def load_config(project_name, spec_name):
     if 'cloud_init' in spec_conf:
         context['cloud_init'] = spec_conf['cloud_init']
         
+    # cloud_init_encoding may sit next to cloud_init at the root as well
+    if 'cloud_init_encoding' in spec_conf:
+        context['cloud_init_encoding'] = spec_conf['cloud_init_encoding']
+        
     # Always try to load infrastructure from root
     if 'infrastructure' in spec_conf:
         context['infrastructure'] = spec_conf['infrastructure']
@@ -158,6 +416,17 @@ def load_config(project_name, spec_name):
             context['storage_class'] = storage_conf['class']
         # config.yaml uses 'class', template might expect 'storage_class'
     
+    # Multi-cluster list may sit at the root as well
+    if 'clusters' in spec_conf:
+        context['clusters'] = spec_conf['clusters']
+
+    # Per-cluster overrides when running on behalf of one cluster of a fan-out
+    cluster = getattr(CLUSTER_LOCAL, 'cluster', None)
+    if cluster:
+        for key in ('namespace', 'storage_class'):
+            if cluster.get(key):
+                context[key] = cluster[key]
+
     # Handle Environment Variables in Auth
     if 'auth' in context:
         pwd = context['auth'].get('password', '')
@@ -169,15 +438,59 @@ def load_config(project_name, spec_name):
 
     return context
 
-def render_template(template_name, context):
-    import json
-    import yaml
-    env = Environment(loader=FileSystemLoader(TEMPLATES_DIR))
+TEMPLATE_ENV = None
+
+def new_template_environment(loader=None):
+    """Jinja2 environment with the filters the resource templates use."""
+    env = Environment(loader=loader or FileSystemLoader(TEMPLATES_DIR))
     # Add json filter for complex objects like affinity
     env.filters['to_json'] = lambda v: json.dumps(v)
     # Add to_yaml filter
     env.filters['to_yaml'] = lambda v: yaml.dump(v, default_flow_style=False, sort_keys=False).strip()
-    template = env.get_template(template_name)
+    return env
+
+def template_digests(templates_dir=TEMPLATES_DIR):
+    digests = {}
+    for name in sorted(os.listdir(templates_dir)):
+        if name.endswith('.yaml'):
+            with open(os.path.join(templates_dir, name), 'rb') as f:
+                digests[name] = hashlib.sha256(f.read()).hexdigest()
+    return digests
+
+def precompile_templates(bundle_root, templates_dir=TEMPLATES_DIR):
+    """Build step of build_pyz.sh: templates/*.yaml -> Jinja2 Python modules plus their source digests."""
+    target = os.path.join(bundle_root, COMPILED_TEMPLATES)
+    env = new_template_environment(FileSystemLoader(templates_dir))
+    env.compile_templates(target, zip=None, filter_func=lambda name: name.endswith('.yaml'))
+    with open(os.path.join(target, 'sources.json'), 'w') as f:
+        json.dump(template_digests(templates_dir), f, indent=2, sort_keys=True)
+    return target
+
+def bundled_template_loader():
+    """
+    Loader for the templates precompiled into the zipapp, or None (compile templates/ from source)
+    when not running from the bundle or when templates/ was edited after the bundle was built.
+    """
+    if not BUNDLE_PATH:
+        return None
+    try:
+        built = json.loads(zipimport.zipimporter(BUNDLE_PATH).get_data(f"{COMPILED_TEMPLATES}/sources.json"))
+    except (OSError, zipimport.ZipImportError, ValueError):
+        return None
+    if os.path.isdir(TEMPLATES_DIR) and template_digests() != built:
+        print(f"[INFO] {TEMPLATES_DIR} differs from the templates built into {os.path.basename(BUNDLE_PATH)}; rendering from source.")
+        return None
+    return ModuleLoader(os.path.join(BUNDLE_PATH, COMPILED_TEMPLATES))
+
+def template_environment():
+    """Shared environment: compiled templates stay cached across instances and manifests."""
+    global TEMPLATE_ENV
+    if TEMPLATE_ENV is None:
+        TEMPLATE_ENV = new_template_environment(bundled_template_loader())
+    return TEMPLATE_ENV
+
+def render_template(template_name, context):
+    template = template_environment().get_template(template_name)
     return template.render(context)
 
 def get_network_config(entry, networks_catalog):
@@ -253,6 +566,74 @@ def discover_password_inputs(context):
 
     return discovered
 
+def resolve_instances(context, spec, replicas=None):
+    """Returns the spec's instance list, falling back to legacy replica naming if 'instances' is absent."""
+    instances = context.get('instances', [])
+    if not instances:
+        # Fallback to legacy 'replicas' logic if 'instances' not found
+        replicas = replicas if replicas else context.get('replicas', 1)
+        base_name = context.get('name_prefix', spec)
+        for i in range(replicas):
+            suffix = f"-{i+1:02d}" if (replicas > 1 or i > 0) else ""
+            instances.append({
+                'name': f"{base_name}{suffix}",
+                # Legacy mode doesn't support explicit static IP per instance here easily
+                # unless we rely on the old auto-calc logic.
+                # For v2 refactor, we encourage 'instances' list.
+            })
+    return instances
+
+PASSWORD_HASH_CACHE = {}
+CRYPT_SALT_CHARS = './0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+PASSWORD_SALT_ANNOTATION = 'v-auto/password-salt' # Carried forward so an unchanged userData keeps its Secret name
+CLOUD_INIT_ENV = None
+CLOUD_INIT_TEMPLATES = {}
+
+def password_salt():
+    """New random SHA-512 crypt salt (one per VM; an existing VM's salt is reused, see PASSWORD_SALT_ANNOTATION)."""
+    return '$6$' + ''.join(secrets.choice(CRYPT_SALT_CHARS) for _ in range(16))
+
+def cloud_init_template(source):
+    """Compiled cloud-init template, cached per source text (instances of a spec usually share it)."""
+    global CLOUD_INIT_ENV
+    if CLOUD_INIT_ENV is None:
+        env = Environment()
+        # Add password hashing filter
+        import crypt
+        @pass_context
+        def hash_password_filter(context, pwd):
+            if not pwd: return ""
+            salt = context.get('password_salt') or password_salt()
+            # Cached per salt and password digest (crypt is slow; no plaintext kept in module state)
+            key = (salt, hashlib.sha256(str(pwd).encode('utf-8')).hexdigest())
+            if key not in PASSWORD_HASH_CACHE:
+                PASSWORD_HASH_CACHE[key] = crypt.crypt(str(pwd), salt)
+            return PASSWORD_HASH_CACHE[key]
+        env.filters['hash_password'] = hash_password_filter
+
+        # Add YAML dump filter for raw object injection override
+        def to_yaml_filter(val):
+            # default_flow_style=False ensures block format (lists as - item)
+            # sort_keys=False preserves insertion order if possible (py3.7+)
+            return yaml.dump(val, default_flow_style=False, sort_keys=False).strip()
+        env.filters['to_yaml'] = to_yaml_filter
+        CLOUD_INIT_ENV = env
+    if source not in CLOUD_INIT_TEMPLATES:
+        CLOUD_INIT_TEMPLATES[source] = CLOUD_INIT_ENV.from_string(source)
+    return CLOUD_INIT_TEMPLATES[source]
+
+def gzip_bytes(data):
+    """gzip with a fixed mtime so identical input yields identical output (stable Secret content and hash)."""
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=9, mtime=0) as gz:
+        gz.write(data)
+    return buf.getvalue()
+
+def format_bytes(size):
+    if size < 1024:
+        return f"{size} B"
+    return f"{size / 1024:.1f} KiB"
+
 def render_manifests(ctx):
     """Generates all K8s manifests for a VM instance."""
     manifests = []
@@ -269,32 +650,45 @@ def render_manifests(ctx):
     }
     
     # 1. Secret (Cloud-Init)
+    ctx = dict(ctx, password_salt=ctx.get('password_salt') or password_salt())
     try:
-        env = Environment()
-        # Add password hashing filter
-        import crypt
-        def hash_password_filter(pwd):
-            if not pwd: return ""
-            return crypt.crypt(pwd, crypt.mksalt(crypt.METHOD_SHA512))
-        env.filters['hash_password'] = hash_password_filter
-        
-        # Add YAML dump filter for raw object injection override
-        def to_yaml_filter(val):
-            # default_flow_style=False ensures block format (lists as - item)
-            # sort_keys=False preserves insertion order if possible (py3.7+)
-            return yaml.dump(val, default_flow_style=False, sort_keys=False).strip()
-        env.filters['to_yaml'] = to_yaml_filter
-        
-        rendered_ci = env.from_string(ctx.get('cloud_init', '')).render(ctx)
+        rendered_ci = cloud_init_template(ctx.get('cloud_init', '')).render(ctx)
         secret_context = ctx.copy()
         secret_context['cloud_init_content'] = rendered_ci
     except Exception as e:
         print(f"Error rendering cloud-init for {name}: {e}")
         sys.exit(1)
     
+    # Optional compressed user-data (cloud-init detects and inflates gzip payloads itself)
+    encoding = ctx.get('cloud_init_encoding') or 'plain'
+    if encoding == 'gzip':
+        compressed = gzip_bytes(rendered_ci.encode('utf-8'))
+        secret_context['cloud_init_gzip_b64'] = base64.b64encode(compressed).decode('ascii')
+        raw_size = len(rendered_ci.encode('utf-8'))
+        change = (len(compressed) - raw_size) * 100 / raw_size if raw_size else 0
+        print(f"    [Cloud-Init] {name}: userData {format_bytes(raw_size)} -> {format_bytes(len(compressed))} (gzip, {change:+.0f}%)")
+    elif encoding != 'plain':
+        print(f"Error: Unsupported cloud_init_encoding '{encoding}' (use 'plain' or 'gzip').")
+        sys.exit(1)
+
+    # userData is usually identical for every instance of a spec: store it once in a
+    # content-addressed Secret shared by all VMs that render the same payload.
+    digest = hashlib.sha256(f"{project}/{spec}/{encoding}\n{rendered_ci}".encode('utf-8')).hexdigest()[:10]
+    secret_context['userdata_secret_name'] = f"{spec}-userdata-{digest}"
+    ctx = ctx.copy()
+    ctx['userdata_secret_name'] = secret_context['userdata_secret_name']
+
+    shared_labels = labels.copy()
+    del shared_labels['v-auto/name'] # Shared: 'delete --target' must not remove it
     secret = yaml.safe_load(render_template('secret_template.yaml', secret_context))
-    secret.setdefault('metadata', {}).setdefault('labels', {}).update(labels)
+    secret.setdefault('metadata', {}).setdefault('labels', {}).update(shared_labels)
     manifests.append(secret)
+
+    # Per-VM networkData (the only part that differs between instances)
+    if ctx.get('network_config'):
+        net_secret = yaml.safe_load(render_template('network_secret_template.yaml', ctx))
+        net_secret.setdefault('metadata', {}).setdefault('labels', {}).update(labels)
+        manifests.append(net_secret)
     
     # 2. NADs
     for idx, net in enumerate(ctx['interfaces']):
@@ -319,14 +713,16 @@ def render_manifests(ctx):
                  # Fallback for dict or other non-string
                  nad_ctx['dns'] = json.dumps(nad_ctx['dns'])
             
-        if 'bridge' in net:
+        # SR-IOV NADs are rendered only with a resource_name; otherwise the SR-IOV operator owns them
+        if 'bridge' in net or (net.get('type') == 'sriov' and net.get('resource_name')):
              nad = yaml.safe_load(render_template('nad_template.yaml', nad_ctx))
              
              # Determine Label Scope
              # If NAD name is explicitly defined (Shared), do NOT label with instance name
              # This prevents 'delete instance' from deleting the shared NAD
+             # Static-IP NADs ('<vm>-<nad>') also set nad_name but belong to their instance
              nad_labels = labels.copy()
-             if 'nad_name' in net and net['nad_name'] == nad_name:
+             if 'nad_name' in net and net.get('nad_scope') != 'instance':
                  # It's a shared/explicit NAD. Remove instance-specific label.
                  if 'v-auto/name' in nad_labels:
                      del nad_labels['v-auto/name']
@@ -334,101 +730,72 @@ def render_manifests(ctx):
              nad.setdefault('metadata', {}).setdefault('labels', {}).update(nad_labels)
              manifests.append(nad)
              
-    # 3. DataVolume
-    dv = yaml.safe_load(render_template('datavolume_template.yaml', ctx))
-    dv.setdefault('metadata', {}).setdefault('labels', {}).update(labels)
-    manifests.append(dv)
+    # networkInterfaceMultiqueue is VM-wide: any multiqueue NIC enables it for all virtio NICs
+    ctx['interface_multiqueue'] = any(net.get('multiqueue') for net in ctx['interfaces'])
+
+    # 3. DataVolume (skipped when the root disk already exists, e.g. claimed from the warm pool)
+    if not ctx.get('root_disk_name') and not ctx.get('root_disk_exists'):
+        dv = yaml.safe_load(render_template('datavolume_template.yaml', ctx))
+        dv.setdefault('metadata', {}).setdefault('labels', {}).update(labels)
+        if ctx.get('image_digest'):
+            # Image cache: import the image once into a shared base volume and clone the root disk from it
+            base_name = base_image_name(ctx)
+            base = yaml.safe_load(render_template('datavolume_template.yaml', dict(ctx, node_selector=None, disk_size=ctx['base_image_size'])))
+            base['metadata']['name'] = base_name
+            base['metadata'].setdefault('labels', {}).update(shared_labels, **{'v-auto/base-image': 'true'})
+            base['metadata'].setdefault('annotations', {})['v-auto/image-digest'] = ctx['image_digest']
+            manifests.append(base)
+            dv['spec']['source'] = {'pvc': {'namespace': ctx.get('namespace'), 'name': base_name}}
+            dv['metadata'].setdefault('annotations', {})['v-auto/image-digest'] = ctx['image_digest']
+        manifests.append(dv)
+
+    # 3b. Data disks (blank volumes, created with the instance and kept across root disk claims)
+    for disk in (ctx.get('storage_opts') or {}).get('data_disks', []):
+        disk_ctx = ctx.copy()
+        disk_ctx['disk'] = disk
+        data_dv = yaml.safe_load(render_template('data_disk_template.yaml', disk_ctx))
+        data_dv.setdefault('metadata', {}).setdefault('labels', {}).update(labels)
+        manifests.append(data_dv)
     
     # 4. VM
+    ctx['hotplug'] = resolve_hotplug(ctx)
     vm = yaml.safe_load(render_template('vm_template.yaml', ctx))
     vm.setdefault('metadata', {}).setdefault('labels', {}).update(labels)
+    if ctx.get('root_disk_name'):
+        vm['metadata'].setdefault('annotations', {})['v-auto/root-disk'] = ctx['root_disk_name']
+    if ctx['password_salt'] in rendered_ci:
+        # Only VMs whose userData holds a password hash need their salt for the next render
+        vm['metadata'].setdefault('annotations', {})[PASSWORD_SALT_ANNOTATION] = ctx['password_salt']
     # Also add labels to the template for VMI tracking
     vm.setdefault('spec', {}).setdefault('template', {}).setdefault('metadata', {}).setdefault('labels', {}).update(labels)
     manifests.append(vm)
     
     return manifests
 
-def deploy_action(args):
-    project = args.project
-    spec = args.spec
-    
-    print(f"Loading configuration for Project: {project}, Spec: {spec}...")
-    context = load_config(project, spec)
-    infra_config = load_infrastructure_config(project, context)
-    
-    # --- Interactive Inputs (Auth) ---
-    # Discover passwords from the common cloud-init context
-    discovered = discover_password_inputs(context)
-    
-    # explicit inputs (legacy support)
-    config_inputs = context.get('inputs', [])
-    
-    final_inputs = []
-    seen_keys = set()
-    discovered_map = { d['key']: d['prompt'] for d in discovered }
-    
-    for item in config_inputs:
-        key = item['key']
-        if key in discovered_map:
-            item['prompt'] = discovered_map[key]
-        final_inputs.append(item)
-        seen_keys.add(key)
-        
-    for d in discovered:
-        if d['key'] not in seen_keys:
-            final_inputs.append(d)
-            seen_keys.add(d['key'])
-
-    # Fallback prompt removed to allow cloud-init hardcoded passwords
-    # if not final_inputs and 'auth' in context:
-    #      if not context['auth'].get('password'):
-    #          final_inputs.append({'key': 'password', 'prompt': f"Password for {context['auth'].get('username', 'user')}"})
-
-    if final_inputs:
-        print("\n--- Required Inputs ---")
-        for item in final_inputs:
-            key = item.get('key')
-            prompt_text = item.get('prompt', f"Enter value for '{key}'")
-            if context.get(key): continue
-            
-            # Skip interaction in dry-run mode
-            if args.dry_run:
-                print(f"  [Dry-Run] Auto-filling dummy value for '{key}'")
-                context[key] = f"(dry-run-{key})"
-                continue
-                
-            while True:
-                val = getpass.getpass(f"{prompt_text}: ")
-                if not val: continue
-                val_confirm = getpass.getpass(f"Confirm {prompt_text}: ")
-                if val != val_confirm:
-                    print("Mismatch!"); continue
-                context[key] = val
-                break
-        print("-----------------------\n")
+def resolve_hotplug(ctx):
+    """
+    'hotplug: true' (or {max_cpu, max_memory}) defines the VM's CPU as sockets and its memory as
+    memory.guest, the fields KubeVirt hot-plugs under the LiveUpdate rollout strategy ('scale').
+    KubeVirt then derives the pod requests itself. Returns the template values or None.
+    """
+    conf = ctx.get('hotplug')
+    if not conf:
+        return None
+    conf = conf if isinstance(conf, dict) else {}
+    name = ctx.get('vm_name', '?')
+    millis = parse_cpu_millis(ctx.get('cpu'))
+    if millis <= 0 or millis % 1000:
+        print(f"Error: Instance {name}: 'hotplug' needs whole vCPUs, got cpu={ctx.get('cpu')}.")
+        sys.exit(1)
+    performance = ctx.get('performance') or {}
+    for option in ('dedicated_cpu', 'limits'):
+        if performance.get(option):
+            print(f"Error: Instance {name}: 'hotplug' cannot be combined with a '{option}' performance profile.")
+            sys.exit(1)
+    return {'sockets': millis // 1000, 'max_sockets': conf.get('max_cpu'), 'max_guest': conf.get('max_memory')}
 
-    if 'password' in context:
-        context.setdefault('auth', {})['password'] = context['password']
-    
-    # --- Determine Instances ---
-    instances = context.get('instances', [])
-    if not instances:
-        # Fallback to legacy 'replicas' logic if 'instances' not found
-        replicas = args.replicas if args.replicas else context.get('replicas', 1)
-        base_name = context.get('name_prefix', spec)
-        print(f"[INFO] No 'instances' list found. Falling back to legacy replica mode (Count: {replicas})")
-        for i in range(replicas):
-            suffix = f"-{i+1:02d}" if (replicas > 1 or i > 0) else ""
-            instances.append({
-                'name': f"{base_name}{suffix}",
-                # Legacy mode doesn't support explicit static IP per instance here easily
-                # unless we rely on the old auto-calc logic.
-                # For v2 refactor, we encourage 'instances' list.
-            })
-    
-    namespace = context.get('namespace', 'default')
-    
-    # --- Network Resolution (Infra Catalog) ---
+def resolve_base_interfaces(context, infra_config):
+    """Resolves the common network(s) of the spec against the infrastructure catalog."""
     catalog = infra_config['networks']
     
     # Resolve the "Common Network" defined in common block
@@ -454,28 +821,1759 @@ def deploy_action(args):
     if not base_interfaces:
         print("Error: No valid networks resolving."); sys.exit(1)
 
-    # --- Configuration Summary ---
-    print("\n" + "═"*60)
-    print(f" 🚀  DEPLOYMENT PLAN | Project: {project.upper()}")
-    print("═"*60)
+    return base_interfaces
+
+def resolve_image(context, infra_config):
+    """Returns (catalog image key or None, image URL) for the spec."""
+    image_key = context.get('image')
+    if image_key and image_key in infra_config['images']:
+        return image_key, infra_config['images'][image_key]['url']
+    return None, context.get('image_url')
+
+IMAGE_CACHE_FILE = os.path.join(STATE_DIR, 'cache', 'images.json')
+IMAGE_PROBE_TIMEOUT = 5
+IMAGE_PROBES = {} # url -> probe result: one HEAD per image per run
+
+def load_image_cache():
+    try:
+        with open(IMAGE_CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_image_cache(cache):
+    os.makedirs(os.path.dirname(IMAGE_CACHE_FILE), exist_ok=True)
+    tmp = f"{IMAGE_CACHE_FILE}.tmp-{os.getpid()}"
+    with open(tmp, 'w') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp, IMAGE_CACHE_FILE)
+
+def image_content_digest(url, meta):
+    """Identity of the image content: the catalog checksum, else the server's ETag, else Last-Modified + size."""
+    if meta.get('checksum'):
+        return hashlib.sha256(str(meta['checksum']).encode('utf-8')).hexdigest()[:12]
+    validator = meta.get('etag') or (f"{meta['last_modified']}/{meta.get('size')}" if meta.get('last_modified') else None)
+    if not validator:
+        return None
+    return hashlib.sha256(f"{url}\n{validator}".encode('utf-8')).hexdigest()[:12]
+
+def probe_image(url, conf=None):
+    """
+    Checks whether the image behind `url` changed since the last run with one conditional HEAD
+    (If-None-Match / If-Modified-Since from the cache in .vman/cache/images.json).
+    Catalog metadata ('checksum', 'etag', 'size') is authoritative: a server answer that
+    contradicts it disables reuse. Returns {'state', 'digest', 'etag', 'last_modified', 'size',
+    'checked', 'error'}; state is new | unchanged | changed | mismatch | offline (HEAD failed,
+    cached metadata used) | unknown.
+    """
+    if url in IMAGE_PROBES:
+        return IMAGE_PROBES[url]
+    conf = conf or {}
+    cache = load_image_cache()
+    cached = cache.get(url) or {}
+    meta = {key: cached.get(key) for key in ('etag', 'last_modified', 'size')}
+    state, error = 'unknown', None
+    if url.startswith(('http://', 'https://')):
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        try:
+            request = urllib.request.Request(url, method='HEAD', headers=headers)
+            with urllib.request.urlopen(request, timeout=IMAGE_PROBE_TIMEOUT) as resp:
+                length = resp.headers.get('Content-Length')
+                fresh = {'etag': resp.headers.get('ETag'), 'last_modified': resp.headers.get('Last-Modified'),
+                         'size': int(length) if length and length.isdigit() else None}
+            state = 'new' if not cached else ('unchanged' if fresh == meta else 'changed')
+            meta = fresh
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and cached:
+                state = 'unchanged'
+            else:
+                state, error = ('offline' if cached else 'unknown'), f"HTTP {e.code}"
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            state, error = ('offline' if cached else 'unknown'), str(getattr(e, 'reason', e))
+    else:
+        error = 'not an HTTP(S) source'
+
+    for key in ('etag', 'size'):
+        if conf.get(key) is not None and meta.get(key) is not None and str(conf[key]) != str(meta[key]):
+            state, error = 'mismatch', f"server {key} {meta[key]} != catalog {conf[key]}"
+    if conf.get('checksum'):
+        meta['checksum'] = conf['checksum']
+    digest = None if state == 'mismatch' else image_content_digest(url, dict(meta, etag=conf.get('etag') or meta.get('etag')))
+
+    checked = cached.get('checked')
+    if state in ('new', 'unchanged', 'changed'):
+        checked = datetime.now().isoformat(timespec='seconds')
+        cache[url] = dict(meta, digest=digest, checked=checked)
+        try:
+            save_image_cache(cache)
+        except OSError as e:
+            print(f"[WARNING] Could not update the image cache: {e}")
+    result = dict(meta, state=state, digest=digest, checked=checked, error=error)
+    IMAGE_PROBES[url] = result
+    return result
+
+def describe_image_probe(probe):
+    facts = [probe['state']]
+    if probe.get('size'):
+        facts.append(format_gib(probe['size']) if probe['size'] >= 1024**3 else f"{probe['size'] / 1024**2:.1f}Mi")
+    if probe.get('checksum'):
+        facts.append(str(probe['checksum'])[:20])
+    elif probe.get('etag'):
+        facts.append(f"etag {probe['etag']}")
+    elif probe.get('last_modified'):
+        facts.append(probe['last_modified'])
+    if probe.get('error'):
+        facts.append(probe['error'])
+    if probe.get('checked'):
+        facts.append(f"checked {probe['checked']}")
+    return ', '.join(facts)
+
+def base_image_name(ctx):
+    """Content-addressed base DataVolume: one per image content, storage class and disk layout."""
+    opts = ctx.get('storage_opts') or {}
+    key = f"{ctx['image_digest']}/{ctx.get('base_image_size')}/{ctx.get('storage_class')}/{opts.get('volume_mode')}/{opts.get('preallocation')}"
+    return f"{slugify(ctx.get('spec_name', 'default'))[:30]}-base-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]}"
+
+VOLUME_MODES = ('Filesystem', 'Block')
+DISK_CACHE_MODES = ('none', 'writethrough', 'writeback')
+DISK_IO_MODES = ('native', 'threads')
+
+def resolve_storage_options(context, inst, infra_config):
+    """
+    Effective storage settings of one instance, merged as:
+    storage profile (catalog, 'storage.profile') < common 'storage' < instance 'storage'.
+    Returns the root disk class/access mode, disk tuning (volume_mode, preallocation, cache, io,
+    dedicated_io_thread) and the data disk list, striped round-robin across 'data_classes'.
+    """
+    vm_name = inst.get('name', '?')
+    common_storage = context.get('storage') or {}
+    inst_storage = inst.get('storage') or {}
+
+    merged = {}
+    profile_name = inst_storage.get('profile', common_storage.get('profile'))
+    if profile_name:
+        catalog = infra_config.get('storage_profiles', {})
+        if profile_name not in catalog:
+            print(f"Error: Instance {vm_name}: storage profile '{profile_name}' not found in infrastructure catalog.")
+            sys.exit(1)
+        merged.update(catalog[profile_name] or {})
+    merged.update(common_storage)
+    merged.update(inst_storage)
+
+    # An explicit class (instance > common) wins over the profile's class
+    storage_class = inst_storage.get('class') or inst.get('storage_class') or context.get('storage_class') or merged.get('class')
+    modes = merged.get('access_modes') or [context.get('access_mode', 'ReadWriteOnce')]
+
+    def tuning(conf, base):
+        return {
+            'volume_mode': conf.get('volume_mode', base.get('volume_mode')),
+            'preallocation': bool(conf.get('preallocation', base.get('preallocation', False))),
+            'cache': conf.get('cache', base.get('cache')),
+            'io': conf.get('io', base.get('io')),
+            'dedicated_io_thread': bool(conf.get('dedicated_io_thread', base.get('dedicated_io_thread', False))),
+        }
+
+    opts = tuning(merged, {})
+    opts['storage_class'] = storage_class
+    opts['access_mode'] = modes[0]
+
+    # Data disks: blank volumes, optionally striped across several classes
+    stripe = merged.get('data_classes') or []
+    opts['data_disks'] = []
+    striped = 0
+    for idx, disk in enumerate(merged.get('data_disks') or []):
+        if not isinstance(disk, dict):
+            disk = {'size': disk}
+        disk_class = disk.get('class')
+        if not disk_class and stripe:
+            disk_class = stripe[striped % len(stripe)]
+            striped += 1
+        entry = tuning(disk, opts)
+        entry.update({
+            'name': f"data-{idx}",
+            'dv_name': f"{vm_name}-data-{idx}",
+            'size': disk.get('size'),
+            'storage_class': disk_class or storage_class,
+            'access_mode': (disk.get('access_modes') or [opts['access_mode']])[0],
+        })
+        opts['data_disks'].append(entry)
+
+    errors = []
+    for label, conf in [('root disk', opts)] + [(d['name'], d) for d in opts['data_disks']]:
+        if conf['volume_mode'] and conf['volume_mode'] not in VOLUME_MODES:
+            errors.append(f"{label}: volume_mode must be one of {', '.join(VOLUME_MODES)}")
+        if conf['cache'] and conf['cache'] not in DISK_CACHE_MODES:
+            errors.append(f"{label}: cache must be one of {', '.join(DISK_CACHE_MODES)}")
+        if conf['io'] and conf['io'] not in DISK_IO_MODES:
+            errors.append(f"{label}: io must be one of {', '.join(DISK_IO_MODES)}")
+        # QEMU only does native (Linux AIO) IO on O_DIRECT, i.e. without the host page cache
+        if conf['io'] == 'native' and conf['cache'] != 'none':
+            errors.append(f"{label}: io 'native' requires cache 'none'")
+        if label != 'root disk' and not conf['size']:
+            errors.append(f"{label}: size is required")
+    if errors:
+        print(f"Error: Instance {vm_name}: invalid storage options:")
+        for err in errors:
+            print(f"  - {err}")
+        sys.exit(1)
+    return opts
+
+def format_data_disks(disks):
+    return ', '.join(f"{d['name']}={d['size']}@{d['storage_class'] or 'default'}" for d in disks)
+
+def resolve_instance_interfaces(inst, base_interfaces, infra_config, vm_name):
+    """Builds the interface list of one instance: common networks plus per-instance overrides (static IPs, extra NICs)."""
+    # Determine Interfaces for this instance
+    instance_interfaces = copy.deepcopy(base_interfaces)
     
-    # 1. Scope
-    print(f" {'Scope':<15} : {spec} (Namespace: {namespace})")
-    print(f" {'Instances':<15} : {len(instances)} VMs")
+    # --- Network Injection Logic (Multi-NIC Support) ---
+    target_interfaces = inst.get('interfaces', [])
+    legacy_ip = inst.get('ip')
     
-    # Instance List with IP Resolution (Same logic as inspect)
-    for inst in instances:
-        # IP Resolution Logic
-        direct_ip = inst.get('ip')
-        nc_ips = []
-        nc = inst.get('network_config', context.get('network_config'))
-        if nc:
+    # Normalize to list format if legacy 'ip' is used
+    if not target_interfaces and legacy_ip:
+        # Find first non-pod network to apply legacy IP
+        first_net = next((n for n in instance_interfaces if n.get('type') != 'pod'), None)
+        if first_net:
+            target_interfaces.append({'network': first_net.get('name'), 'ip': legacy_ip})
+
+    # Apply Overrides
+    for override in target_interfaces:
+        net_name = override.get('network')
+        target_ip = override.get('ip')
+        
+        # Allow override without IP (L2 mode or implicit Multus)
+        if not net_name: continue
+        
+        # Find matching interface in current instance list
+        match = next((n for n in instance_interfaces if n.get('name') == net_name), None)
+        
+        if not match:
+            # Not in common/base? Try to find in Catalog and Add it!
+            # infra_config contains {'networks': ..., 'images': ...}
+            networks_catalog = infra_config.get('networks', {})
+            catalog_entry = networks_catalog.get(net_name)
+            
+            if catalog_entry:
+                 new_iface = get_network_config(net_name, networks_catalog)
+                 if new_iface:
+                     instance_interfaces.append(new_iface)
+                     match = new_iface
+        
+        if not match:
+            print(f"[WARNING] Instance {vm_name}: Network '{net_name}' not found in infrastructure catalog.")
+            continue
+
+        # Merge any extra config from override (e.g. custom routes, mtu)
+        match.update(override)
+
+        # Inject Static IP into NAD IS ONLY DONE IF IP IS PROVIDED
+        subnet_cidr = match.get('ipam', {}).get('range')
+        if target_ip and subnet_cidr:
             try:
-                if isinstance(nc, str): nc_data = yaml.safe_load(nc)
-                else: nc_data = nc
+                network = ipaddress.IPv4Network(subnet_cidr, strict=False)
+                if ipaddress.IPv4Address(target_ip) not in network:
+                    print(f"[WARNING] Instance {vm_name} IP {target_ip} is outside subnet {subnet_cidr}.")
+                    # We proceed anyway as user might know better, or just warn.
+                    
+                safe_cidr_suffix = str(network.prefixlen)
+                match['ipam']['type'] = 'static'
+                match['ipam']['addresses'] = [{'address': f"{target_ip}/{safe_cidr_suffix}"}]
+                match['ip'] = target_ip # Expose for template (e.g. {{ interfaces[0].ip }})
                 
-                # Logic to handle both 'network: { ethernets: ... }' and direct '{ ethernets: ... }'
-                ethernets = {}
+                # Generate Instance-Specific NAD Name
+                orig_nad = match.get('nad_name', 'net')
+                match['nad_name'] = f"{vm_name}-{orig_nad}"
+                match['nad_scope'] = 'instance' # Never shared, even though 'nad_name' is set
+                
+                print(f"    [Net-Inject] {vm_name}: Static IP {target_ip} on '{net_name}' (NAD: {match['nad_name']})")
+            except Exception as e:
+                print(f"[ERROR] Invalid IP configuration for {vm_name}: {e}")
+
+    for iface in instance_interfaces:
+        check_network_options(iface, vm_name)
+    return instance_interfaces
+
+def check_network_options(iface, vm_name):
+    """Validates the throughput options of one resolved interface (mtu, multiqueue, sriov)."""
+    errors = []
+    net_name = iface.get('name', '?')
+    if iface.get('mtu') is not None:
+        try:
+            mtu = int(iface['mtu'])
+        except (TypeError, ValueError):
+            mtu = 0
+        if not 576 <= mtu <= 9216:
+            errors.append(f"mtu must be an integer between 576 and 9216, got {iface['mtu']}")
+        elif iface.get('type') == 'sriov':
+            errors.append("mtu is set by the SR-IOV node policy, not the NAD; remove it from the network")
+        elif iface.get('type') == 'pod':
+            errors.append("mtu applies to Multus bridge networks only")
+    if iface.get('type') == 'sriov':
+        if not iface.get('resource_name') and not iface.get('nad_name'):
+            errors.append("sriov networks need 'resource_name' (NAD rendered here) or 'nad_name' (NAD from the SR-IOV operator)")
+        if iface.get('multiqueue'):
+            errors.append("multiqueue applies to virtio NICs, not SR-IOV VFs")
+    if errors:
+        print(f"Error: Instance {vm_name}: network '{net_name}' is invalid:")
+        for err in errors:
+            print(f"  - {err}")
+        sys.exit(1)
+
+def describe_network_options(conf):
+    """Short suffix listing the throughput options of a catalog network (for plan/inspect output)."""
+    opts = []
+    if conf.get('mtu'): opts.append(f"MTU={conf['mtu']}")
+    if conf.get('multiqueue'): opts.append("MQ")
+    if conf.get('resource_name'): opts.append(f"VF={conf['resource_name']}")
+    if conf.get('vlan'): opts.append(f"VLAN={conf['vlan']}")
+    return f" ({', '.join(opts)})" if opts else ""
+
+HUGEPAGE_SIZES = ('2Mi', '1Gi')
+IO_THREAD_POLICIES = ('shared', 'auto')
+
+def build_performance_profile(profile_name, conf, cpu, memory):
+    """Normalizes one 'performance_profiles' entry for a VM of the given cpu/memory. Returns (profile, errors)."""
+    conf = conf or {}
+    profile = {
+        'name': profile_name,
+        'dedicated_cpu': bool(conf.get('dedicated_cpu', False)),
+        'isolate_emulator_thread': bool(conf.get('isolate_emulator_thread', False)),
+        'hugepages': conf.get('hugepages'),
+        'numa': bool(conf.get('numa', False)),
+        'io_threads': conf.get('io_threads'),
+        # Dedicated CPUs need Guaranteed QoS, i.e. limits equal to requests
+        'limits': bool(conf.get('limits', False)) or bool(conf.get('dedicated_cpu', False)),
+    }
+
+    errors = []
+    cpu_millis = parse_cpu_millis(cpu)
+    if profile['dedicated_cpu']:
+        if cpu_millis < 1000 or cpu_millis % 1000:
+            errors.append(f"dedicated_cpu needs whole cores, got cpu={cpu}")
+        profile['cores'] = max(cpu_millis // 1000, 1)
+    if profile['isolate_emulator_thread'] and not profile['dedicated_cpu']:
+        errors.append("isolate_emulator_thread requires dedicated_cpu")
+    if profile['hugepages']:
+        if profile['hugepages'] not in HUGEPAGE_SIZES:
+            errors.append(f"hugepages must be one of {', '.join(HUGEPAGE_SIZES)}")
+        elif parse_quantity(memory) % parse_quantity(profile['hugepages']):
+            errors.append(f"memory {memory} is not a multiple of the {profile['hugepages']} page size")
+    if profile['numa'] and not (profile['dedicated_cpu'] and profile['hugepages']):
+        errors.append("numa (guestMappingPassthrough) requires dedicated_cpu and hugepages")
+    if profile['io_threads'] and profile['io_threads'] not in IO_THREAD_POLICIES:
+        errors.append(f"io_threads must be one of {', '.join(IO_THREAD_POLICIES)}")
+    return profile, errors
+
+def resolve_performance_profile(ctx, infra_config):
+    """
+    Resolves the 'performance_profile' of an instance (instance > common) against the
+    'performance_profiles' catalog. Returns the normalized profile for vm_template.yaml,
+    or None if no profile is selected. Exits on unknown or inconsistent profiles.
+    """
+    profile_name = ctx.get('performance_profile')
+    if not profile_name:
+        return None
+    vm_name = ctx.get('vm_name', '?')
+    catalog = infra_config.get('performance_profiles', {})
+    if profile_name not in catalog:
+        print(f"Error: Instance {vm_name}: performance profile '{profile_name}' not found in infrastructure catalog.")
+        sys.exit(1)
+
+    profile, errors = build_performance_profile(profile_name, catalog[profile_name], ctx.get('cpu'), ctx.get('memory'))
+    if errors:
+        print(f"Error: Instance {vm_name}: performance profile '{profile_name}' is invalid:")
+        for err in errors:
+            print(f"  - {err}")
+        sys.exit(1)
+    return profile
+
+def describe_performance_profile(profile):
+    """One-line summary of a normalized profile (for inspect)."""
+    features = []
+    if profile['dedicated_cpu']: features.append('dedicated-cpu')
+    if profile['isolate_emulator_thread']: features.append('isolated-emulator')
+    if profile['hugepages']: features.append(f"hugepages={profile['hugepages']}")
+    if profile['numa']: features.append('numa-passthrough')
+    if profile['io_threads']: features.append(f"iothreads={profile['io_threads']}")
+    if profile['limits']: features.append('limits=requests')
+    return ', '.join(features) or '(no tuning)'
+
+def check_profile_nodes(profile, memory, nodes, selector=None):
+    """
+    Returns the nodes (name list) able to host a VM with this profile: CPU manager enabled
+    ('cpumanager=true') for dedicated CPUs, and enough allocatable hugepages of the page size.
+    """
+    capable = []
+    for name, node in nodes.items():
+        labels = node.get('metadata', {}).get('labels', {})
+        if selector and not node_matches(labels, selector):
+            continue
+        if profile['dedicated_cpu'] and labels.get('cpumanager') != 'true':
+            continue
+        if profile['hugepages']:
+            alloc = node.get('status', {}).get('allocatable', {})
+            if parse_quantity(alloc.get(f"hugepages-{profile['hugepages']}", 0)) < parse_quantity(memory):
+                continue
+        capable.append(name)
+    return capable
+
+def print_manifest_preview(m):
+    """Prints a manifest as block YAML; Secrets additionally get a decoded content preview."""
+    kind = m.get('kind', 'Unknown')
+    m_name = m.get('metadata', {}).get('name', 'Unknown')
+    print(f"\n ─── [ {kind:<25} | Name: {m_name:<20} ] ───")
+    # Dump YAML with block style for readability
+    print(yaml.dump(m, default_flow_style=False, sort_keys=False))
+    
+    # Special Handling for Secrets: Decode Preview
+    if kind == 'Secret':
+        # Check for stringData (Plain) or data (Base64)
+        if 'stringData' in m:
+            src = m['stringData']
+            is_b64 = False
+        elif 'data' in m:
+            src = m['data']
+            is_b64 = True
+        else:
+            src = {}
+
+        if src:
+            print("     ▼ Secret Content Preview ▼")
+            for key, val in src.items():
+                if not val: continue
+                try:
+                    note = ""
+                    if is_b64:
+                        raw = base64.b64decode(val)
+                        if raw[:2] == b'\x1f\x8b': # gzip magic (cloud_init_encoding: gzip)
+                            raw = gzip.decompress(raw)
+                            note = " (gzip, decoded)"
+                        decoded = raw.decode('utf-8')
+                    else:
+                        decoded = val
+                    
+                    # Indent the content
+                    decoded_lines = [f"       {line}" for line in decoded.splitlines()]
+                    print(f"     [Key: {key}]{note}")
+                    print("\n".join(decoded_lines))
+                except:
+                    print(f"     [Key: {key}] (Binary/Non-UTF8 data)")
+    
+    print(" " + "-"*50)
+
+def collect_shared_nads(prepared):
+    """
+    Returns the distinct shared NADs referenced by the prepared instances, and how many
+    per-instance references they stand for. Instance-scoped NADs ('<vm>-<nad>' static IP,
+    '<vm>-net-<idx>') carry the 'v-auto/name' label and are left with their instance.
+    """
+    distinct = {}
+    references = 0
+    for vm_name, manifests in prepared:
+        for m in manifests:
+            if m['kind'] != 'NetworkAttachmentDefinition' or not is_shared_manifest(m):
+                continue
+            references += 1
+            nad_name = m['metadata']['name']
+            if nad_name not in distinct:
+                distinct[nad_name] = m
+            elif distinct[nad_name].get('spec') != m.get('spec'):
+                print(f"[WARNING] Shared NAD '{nad_name}' renders differently for {vm_name}; keeping the first definition.")
+    return list(distinct.values()), references
+
+def is_shared_manifest(manifest):
+    """Shared objects (shared NADs, userData Secrets) carry no instance 'v-auto/name' label."""
+    return 'v-auto/name' not in manifest.get('metadata', {}).get('labels', {})
+
+def shared_keys(manifests):
+    return {(m['kind'], m['metadata']['name']) for m in manifests if is_shared_manifest(m)}
+
+OUTPUT_MODES = ('summary', 'json', 'ndjson')
+EXPORT_BUFFER_SIZE = 1 << 20
+EXPORT_MARKER = '.vman-export' # Only directories holding this file are replaced by a new export
+
+def manifest_details(m):
+    """Kind-specific key facts of a manifest for one-line/record output (no Secret contents)."""
+    kind = m.get('kind')
+    spec = m.get('spec') or {}
+    details = {}
+    if kind == 'VirtualMachine':
+        vm_spec = spec.get('template', {}).get('spec', {})
+        domain = vm_spec.get('domain', {})
+        requests = domain.get('resources', {}).get('requests', {})
+        details = {
+            'cpu': requests.get('cpu') or domain.get('cpu', {}).get('cores'),
+            'memory': requests.get('memory'),
+            'disks': len(domain.get('devices', {}).get('disks') or []),
+            'interfaces': len(domain.get('devices', {}).get('interfaces') or []),
+            'node_selector': vm_spec.get('nodeSelector'),
+        }
+    elif kind == 'DataVolume':
+        pvc = spec.get('pvc', {})
+        details = {
+            'size': pvc.get('resources', {}).get('requests', {}).get('storage'),
+            'storage_class': pvc.get('storageClassName'),
+            'volume_mode': pvc.get('volumeMode'),
+            'source': next(iter(spec.get('source') or {}), None),
+            'clone_of': (spec.get('source') or {}).get('pvc', {}).get('name'),
+        }
+    elif kind == 'Secret':
+        data = m.get('data') or m.get('stringData') or {}
+        details = {'keys': sorted(data)}
+    elif kind == 'NetworkAttachmentDefinition':
+        try:
+            config = json.loads(spec.get('config') or '{}')
+        except ValueError:
+            config = {}
+        details = {'type': config.get('type'), 'bridge': config.get('bridge'), 'vlan': config.get('vlan')}
+    return {k: v for k, v in details.items() if v not in (None, [], {})}
+
+def format_details(details):
+    parts = []
+    for key, value in details.items():
+        if isinstance(value, dict):
+            value = ','.join(f"{k}={v}" for k, v in value.items())
+        elif isinstance(value, list):
+            value = ','.join(str(v) for v in value)
+        parts.append(f"{key}={value}")
+    return ' '.join(parts)
+
+class ManifestOutput:
+    """
+    How deploy reports rendered manifests and apply results:
+      summary - one line per object (default)
+      json    - one JSON document with all records, printed at the end
+      ndjson  - one JSON record per line as objects are rendered/applied
+    In json/ndjson mode the human-readable log is moved to stderr so stdout stays parseable.
+    verbose restores the full YAML + decoded Secret preview.
+    """
+
+    def __init__(self, mode='summary', verbose=False):
+        self.mode = mode
+        self.verbose = verbose
+        self.records = []
+        self.closed = False
+        self.stream = sys.stdout
+        if mode != 'summary':
+            sys.stdout = sys.stderr
+
+    def header(self, title, manifests):
+        if self.verbose:
+            print(f"\n" + "═"*60)
+            print(f" 📂  {title}")
+            print("═"*60)
+        else:
+            print(f"\n [ {title} ] {len(manifests)} object(s)")
+
+    def show(self, m, instance=None, note=None):
+        kind = m.get('kind', 'Unknown')
+        m_name = m.get('metadata', {}).get('name', 'Unknown')
+        if note:
+            if self.verbose:
+                print(f"\n ─── [ {kind:<25} | Name: {m_name:<20} ] ─── ({note})")
+            else:
+                print(f"   - {kind:<29} {m_name:<32} ({note})")
+        elif self.verbose:
+            print_manifest_preview(m)
+        elif self.mode == 'summary':
+            print(f"   - {kind:<29} {m_name:<32} {format_details(manifest_details(m))}")
+        if self.mode != 'summary':
+            self.record('rendered', m, instance, note=note, details=manifest_details(m))
+
+    def result(self, m, instance, ok):
+        if self.mode != 'summary':
+            self.record('applied' if ok else 'failed', m, instance)
+
+    def record(self, event, m, instance, **fields):
+        meta = m.get('metadata', {})
+        rec = {'event': event, 'instance': instance, 'kind': m.get('kind'),
+               'name': meta.get('name'), 'namespace': meta.get('namespace')}
+        rec.update((k, v) for k, v in fields.items() if v is not None)
+        if self.mode == 'ndjson':
+            self.stream.write(json.dumps(rec) + "\n")
+            self.stream.flush()
+        else:
+            self.records.append(rec)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.mode == 'json':
+            self.stream.write(json.dumps(self.records, indent=2) + "\n")
+        if self.mode != 'summary':
+            sys.stdout = self.stream
+
+def manifest_filename(m):
+    return f"{m['kind'].lower()}-{m['metadata']['name']}.yaml"
+
+def export_manifests(export_dir, prepared):
+    """
+    Writes the rendered manifests as a kustomize tree:
+      <dir>/kustomization.yaml          -> shared + one entry per instance
+      <dir>/shared/                     -> shared NADs and userData Secrets (once)
+      <dir>/<instance>/                 -> the instance's own objects
+    The tree is built in memory, written to a sibling temp dir in large buffered writes and
+    swapped in, so a previous export (marked by EXPORT_MARKER) is replaced as a whole (no stale
+    files). Secret files are created with mode 0600.
+    """
+    files = {}
+    shared = {}
+    resources = []
+    for vm_name, manifests in prepared:
+        own = []
+        for m in manifests:
+            if is_shared_manifest(m):
+                shared.setdefault(manifest_filename(m), m)
+                continue
+            files[os.path.join(vm_name, manifest_filename(m))] = m
+            own.append(manifest_filename(m))
+        files[os.path.join(vm_name, 'kustomization.yaml')] = kustomization(own)
+        resources.append(vm_name)
+    if shared:
+        for name, m in shared.items():
+            files[os.path.join('shared', name)] = m
+        files[os.path.join('shared', 'kustomization.yaml')] = kustomization(sorted(shared))
+        resources.insert(0, 'shared')
+    files['kustomization.yaml'] = kustomization(resources)
+
+    export_dir = os.path.abspath(export_dir)
+    if os.path.isdir(export_dir) and os.listdir(export_dir) and \
+            not os.path.exists(os.path.join(export_dir, EXPORT_MARKER)):
+        print(f"[ERROR] Export directory '{export_dir}' is not empty and is not a previous vman export ({EXPORT_MARKER} missing).")
+        sys.exit(1)
+    staging = f"{export_dir}.tmp-{os.getpid()}"
+    os.makedirs(staging, mode=0o700)
+    with open(os.path.join(staging, EXPORT_MARKER), 'w') as f:
+        f.write("Generated by 'vman deploy --export-dir'; replaced as a whole by the next export.\n")
+    total = 0
+    for rel_path, m in files.items():
+        path = os.path.join(staging, rel_path)
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        data = yaml.safe_dump(m, default_flow_style=False, sort_keys=False)
+        mode = 0o600 if m.get('kind') == 'Secret' else 0o644
+        with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode), 'w', buffering=EXPORT_BUFFER_SIZE) as f:
+            f.write(data)
+        total += len(data)
+    if os.path.isdir(export_dir):
+        shutil.rmtree(export_dir)
+    os.rename(staging, export_dir)
+    print(f"[EXPORT] {len(files)} file(s), {format_bytes(total)} -> {export_dir} (kustomize build {export_dir})")
+
+def kustomization(resources):
+    return {'apiVersion': 'kustomize.config.k8s.io/v1beta1', 'kind': 'Kustomization', 'resources': list(resources)}
+
+# Kubernetes resource quantity suffixes
+BINARY_SUFFIXES = {'Ki': 1024, 'Mi': 1024**2, 'Gi': 1024**3, 'Ti': 1024**4, 'Pi': 1024**5, 'Ei': 1024**6}
+DECIMAL_SUFFIXES = {'k': 10**3, 'K': 10**3, 'M': 10**6, 'G': 10**9, 'T': 10**12, 'P': 10**15, 'E': 10**18}
+
+def parse_quantity(value):
+    """Parses a Kubernetes quantity ('1Gi', '500m', '2', 4) into a float in base units."""
+    if value is None or value == '':
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).strip()
+    for suffix, factor in BINARY_SUFFIXES.items():
+        if value.endswith(suffix):
+            return float(value[:-len(suffix)]) * factor
+    if value.endswith('m'):
+        return float(value[:-1]) / 1000
+    if value[-1:] in DECIMAL_SUFFIXES:
+        return float(value[:-1]) * DECIMAL_SUFFIXES[value[-1]]
+    return float(value)
+
+def parse_cpu_millis(value):
+    """CPU quantity in millicores ('500m' -> 500, 2 -> 2000)."""
+    return int(round(parse_quantity(value) * 1000))
+
+def format_cpu(millis):
+    return f"{millis}m" if millis % 1000 else str(millis // 1000)
+
+def format_gib(size):
+    return f"{size / 1024**3:.1f}Gi"
+
+# KubeVirt default cpuAllocationRatio: a VM without a CPU request (e.g. 'hotplug') gets a pod
+# request of 1000m / ratio per vCPU
+KUBEVIRT_CPU_ALLOCATION_RATIO = 10
+
+def instance_cpu_request(inst, context):
+    """CPU (millicores) the instance's pod will request: the spec cpu, or KubeVirt's share for 'hotplug' VMs."""
+    millis = parse_cpu_millis(inst.get('cpu', context.get('cpu')))
+    if inst.get('hotplug', context.get('hotplug')):
+        return millis // KUBEVIRT_CPU_ALLOCATION_RATIO
+    return millis
+
+def vmi_requests(vmi):
+    """CPU (millicores) and memory (bytes) requested by a running VMI."""
+    domain = vmi.get('spec', {}).get('domain', {})
+    requests = domain.get('resources', {}).get('requests', {})
+    cpu = parse_cpu_millis(requests.get('cpu')) if requests.get('cpu') else 0
+    if not cpu:
+        topo = domain.get('cpu', {})
+        cpu = 1000 * topo.get('cores', 1) * topo.get('sockets', 1) * topo.get('threads', 1)
+        if not topo.get('dedicatedCpuPlacement'):
+            cpu //= KUBEVIRT_CPU_ALLOCATION_RATIO
+    mem = parse_quantity(requests.get('memory') or domain.get('memory', {}).get('guest'))
+    return cpu, mem
+
+def node_matches(node_labels, selector):
+    return all(str(node_labels.get(k)) == str(v) for k, v in selector.items())
+
+def fetch_cluster_capacity(storage_class=None, node_labels=None):
+    """
+    Loads schedulable nodes and running VMIs (one bulk query) and CSIStorageCapacity (concurrently,
+    optional: clusters without the API or list permission simply do not track disk) and returns
+    {node_name: {'labels', 'cpu', 'mem', 'disk', 'used_cpu', 'used_mem', 'used_disk', 'vmis'}}.
+    'disk' is only known for topology-aware (local) storage classes publishing capacity per node.
+    """
+    queries = {'cluster': ['oc', 'get', 'nodes,vmi', '--all-namespaces', '-o', 'json']}
+    if storage_class:
+        queries['capacity'] = ['oc', 'get', 'csistoragecapacities', '--all-namespaces', '-o', 'json']
+    results = run_commands_parallel(queries)
+    raw = query_result(results, 'cluster')
+    items = json.loads(raw).get('items', []) if raw.strip() else []
+    if storage_class:
+        capacity_raw = results['capacity'] if not isinstance(results['capacity'], Exception) else ''
+        items += json.loads(capacity_raw).get('items', []) if capacity_raw.strip() else []
+
+    nodes = {}
+    for item in items:
+        if item.get('kind') != 'Node':
+            continue
+        labels = item.get('metadata', {}).get('labels', {})
+        spec = item.get('spec', {})
+        if spec.get('unschedulable'):
+            continue
+        if any(t.get('effect') == 'NoSchedule' for t in spec.get('taints', [])):
+            continue
+        if node_labels and not node_matches(labels, node_labels):
+            continue
+        alloc = item.get('status', {}).get('allocatable', {})
+        nodes[item['metadata']['name']] = {
+            'labels': labels,
+            'cpu': parse_cpu_millis(alloc.get('cpu', 0)),
+            'mem': parse_quantity(alloc.get('memory', 0)),
+            'disk': None,
+            'used_cpu': 0, 'used_mem': 0.0, 'used_disk': 0.0,
+            'vmis': {},
+        }
+
+    for item in items:
+        kind = item.get('kind')
+        if kind == 'VirtualMachineInstance':
+            node = item.get('status', {}).get('nodeName')
+            if node in nodes:
+                cpu, mem = vmi_requests(item)
+                nodes[node]['used_cpu'] += cpu
+                nodes[node]['used_mem'] += mem
+                meta = item.get('metadata', {})
+                nodes[node]['vmis'][(meta.get('namespace'), meta.get('name'))] = (cpu, mem)
+        elif kind == 'CSIStorageCapacity' and storage_class and item.get('storageClassName') == storage_class:
+            topology = (item.get('nodeTopology') or {}).get('matchLabels', {})
+            for name, node in nodes.items():
+                if topology and node_matches(node['labels'], topology):
+                    node['disk'] = (node['disk'] or 0.0) + parse_quantity(item.get('capacity'))
+    return nodes
+
+NODE_PIN_KEY = 'kubernetes.io/hostname'
+
+def node_utilization(node):
+    """Share of the node in use: the scarcer of CPU and memory (0.0 - 1.0)."""
+    return max(node['used_cpu'] / node['cpu'] if node['cpu'] else 1.0,
+               node['used_mem'] / node['mem'] if node['mem'] else 1.0)
+
+def node_by_hostname(nodes, hostname):
+    return next((n for n, node in nodes.items() if node['labels'].get(NODE_PIN_KEY, n) == hostname), None)
+
+def hint_affinity(affinity, hostname):
+    """`affinity` plus a preferred (not required) nodeAffinity for `hostname`."""
+    affinity = copy.deepcopy(affinity) if isinstance(affinity, dict) else {}
+    preferred = affinity.setdefault('nodeAffinity', {}).setdefault('preferredDuringSchedulingIgnoredDuringExecution', [])
+    preferred.append({'weight': 100, 'preference': {'matchExpressions': [
+        {'key': NODE_PIN_KEY, 'operator': 'In', 'values': [hostname]}]}})
+    return affinity
+
+def plan_placement(instances, context, nodes, strategy='spread', hints=None):
+    """
+    Assigns a node to every instance without a node_selector.
+    'spread' picks the least utilized node that fits, 'binpack' the most utilized one (first-fit decreasing).
+    Pinned instances and VMIs that already run are accounted for first; a placement hint
+    ({instance: hostname}, see 'rebalance --save-placement') wins over the strategy when its node fits
+    and is applied as a preferred node affinity, so the VM stays movable for a later rebalance.
+    Returns a list of plan rows: (instance, node or None, cpu_millis, mem_bytes, reason), where
+    instance is a copy of the caller's instance carrying the assigned node_selector / affinity.
+    """
+    namespace = context.get('namespace')
+    disk_tracked = any(n['disk'] is not None for n in nodes.values())
+    hints = hints or {}
+    instances = [dict(inst) for inst in instances]
+    plan = []
+    pending = []
+
+    for inst in instances:
+        cpu = instance_cpu_request(inst, context)
+        mem = parse_quantity(inst.get('memory', context.get('memory')))
+        disk = parse_quantity(inst.get('disk_size', context.get('disk_size')))
+        running_on = next((n for n, node in nodes.items() if (namespace, inst['name']) in node['vmis']), None)
+        selector = inst.get('node_selector')
+        if running_on:
+            # Already running: keep it where it is (its usage is already counted)
+            plan.append((inst, running_on, cpu, mem, 'running'))
+        elif isinstance(selector, dict) and selector:
+            pinned = [n for n, node in nodes.items() if node_matches(node['labels'], selector)]
+            if len(pinned) == 1:
+                nodes[pinned[0]]['used_cpu'] += cpu
+                nodes[pinned[0]]['used_mem'] += mem
+                nodes[pinned[0]]['used_disk'] += disk
+            plan.append((inst, pinned[0] if len(pinned) == 1 else None, cpu, mem, 'pinned'))
+        else:
+            pending.append((inst, cpu, mem, disk))
+
+    # Largest first gives the tightest packing and the fairest spread
+    pending.sort(key=lambda p: (p[1], p[2]), reverse=True)
+    for inst, cpu, mem, disk in pending:
+        fits = [n for n, node in nodes.items()
+                if node['cpu'] - node['used_cpu'] >= cpu
+                and node['mem'] - node['used_mem'] >= mem
+                # Topology-aware (local) classes: only nodes publishing capacity can hold the disk
+                and (not disk_tracked or (node['disk'] is not None and node['disk'] - node['used_disk'] >= disk))]
+        if not fits:
+            plan.append((inst, None, cpu, mem, 'no capacity'))
+            continue
+        hinted = node_by_hostname(nodes, hints.get(inst['name']))
+        reason = strategy
+        if hinted in fits:
+            chosen, reason = hinted, 'hint'
+        elif strategy == 'binpack':
+            chosen = max(fits, key=lambda n: (node_utilization(nodes[n]), n))
+        else:
+            chosen = min(fits, key=lambda n: (node_utilization(nodes[n]), n))
+        node = nodes[chosen]
+        node['used_cpu'] += cpu
+        node['used_mem'] += mem
+        node['used_disk'] += disk
+        hostname = node['labels'].get(NODE_PIN_KEY, chosen)
+        if reason == 'hint':
+            inst['affinity'] = hint_affinity(inst.get('affinity', context.get('affinity')), hostname)
+        else:
+            inst['node_selector'] = {NODE_PIN_KEY: hostname}
+        plan.append((inst, chosen, cpu, mem, reason))
+    return plan
+
+def print_placement_plan(plan, nodes, strategy):
+    print("-" * 60)
+    print(f" 🧭  Placement Plan ({strategy})")
+    for inst, node, cpu, mem, reason in plan:
+        target = node or "-"
+        print(f"       {inst['name']:<15} -> {target:<28} CPU={format_cpu(cpu):<6} MEM={format_gib(mem):<8} ({reason})")
+    print("       " + "-"*52)
+    for name, node in sorted(nodes.items()):
+        cpu_pct = node['used_cpu'] * 100 // node['cpu'] if node['cpu'] else 0
+        mem_pct = int(node['used_mem'] * 100 // node['mem']) if node['mem'] else 0
+        disk = f" DISK={format_gib(node['disk'] - node['used_disk'])} free" if node['disk'] is not None else ""
+        print(f"       {name:<28} CPU {cpu_pct:>3}%  MEM {mem_pct:>3}%{disk}")
+
+def instance_demand(inst, context, data_disks=()):
+    """Resources one instance will request: cpu (millicores), memory/storage (bytes), object counts."""
+    return {
+        'cpu': instance_cpu_request(inst, context),
+        'memory': parse_quantity(inst.get('memory', context.get('memory'))),
+        'storage': parse_quantity(inst.get('disk_size', context.get('disk_size'))) + sum(parse_quantity(d['size']) for d in data_disks),
+        'pvcs': 1 + len(data_disks),
+    }
+
+def quota_demand_key(key, storage_class):
+    """Maps a ResourceQuota key to the demand bucket it constrains (None if not relevant)."""
+    sc_prefix = f"{storage_class}.storageclass.storage.k8s.io/" if storage_class else None
+    if key in ('requests.cpu', 'cpu', 'limits.cpu'): return 'cpu'
+    if key in ('requests.memory', 'memory', 'limits.memory'): return 'memory'
+    if key == 'requests.storage': return 'storage'
+    if key == 'persistentvolumeclaims': return 'pvcs'
+    if key in ('pods', 'count/pods'): return 'vms'
+    if key == 'count/virtualmachines.kubevirt.io': return 'vms'
+    if sc_prefix and key == sc_prefix + 'requests.storage': return 'storage'
+    if sc_prefix and key == sc_prefix + 'persistentvolumeclaims': return 'pvcs'
+    return None
+
+def format_demand(bucket, value):
+    if bucket == 'cpu': return format_cpu(int(value))
+    if bucket in ('memory', 'storage'): return format_gib(value)
+    return str(int(value))
+
+def preflight_check(namespace, selector, instances, context, data_disks=None):
+    """
+    Checks the total demand of the instances about to be created against ResourceQuotas,
+    LimitRanges and storage class capacity (one batched, concurrent fetch).
+    Instances whose VM already exists are already counted in quota usage and are skipped.
+    data_disks ({vm_name: [data disk]}) adds the extra volumes of each instance to the storage demand.
+    Returns a list of (resource, need, available, detail) shortfalls; empty if everything fits.
+    """
+    data_disks = data_disks or {}
+    storage_class = context.get('storage_class')
+    results = run_commands_parallel({
+        'policy': ['oc', 'get', 'resourcequota,limitrange', '-n', namespace, '-o', 'json'],
+        'existing': ['oc', 'get', 'vm', '-n', namespace, '-l', selector, '-o', 'json'],
+        'capacity': ['oc', 'get', 'csistoragecapacities', '--all-namespaces', '-o', 'json'],
+    })
+    policy = json.loads(query_result(results, 'policy') or '{}').get('items', [])
+    existing = {i['metadata']['name'] for i in json.loads(query_result(results, 'existing') or '{}').get('items', [])}
+    # CSIStorageCapacity is optional (older clusters / non-CSI classes)
+    capacity_raw = results['capacity'] if not isinstance(results['capacity'], Exception) else ''
+    capacities = json.loads(capacity_raw).get('items', []) if capacity_raw.strip() else []
+
+    new_instances = [i for i in instances if i['name'] not in existing]
+    total = {'cpu': 0, 'memory': 0.0, 'storage': 0.0, 'pvcs': 0, 'vms': len(new_instances)}
+    shortfalls = []
+    for inst in new_instances:
+        demand = instance_demand(inst, context, data_disks.get(inst['name'], ()))
+        for bucket, value in demand.items():
+            total[bucket] += value
+
+        # LimitRange bounds apply per object, not to the total
+        for lr in (p for p in policy if p.get('kind') == 'LimitRange'):
+            for limit in lr.get('spec', {}).get('limits', []):
+                if limit.get('type') in ('Container', 'Pod'):
+                    for res, bucket in (('cpu', 'cpu'), ('memory', 'memory')):
+                        if res in limit.get('max', {}):
+                            bound = parse_cpu_millis(limit['max'][res]) if res == 'cpu' else parse_quantity(limit['max'][res])
+                            if demand[bucket] > bound:
+                                shortfalls.append((f"{res} per {limit['type'].lower()} ({inst['name']})", format_demand(bucket, demand[bucket]),
+                                                   format_demand(bucket, bound), f"LimitRange/{lr['metadata']['name']} max"))
+                elif limit.get('type') == 'PersistentVolumeClaim' and 'storage' in limit.get('max', {}):
+                    # Checked per volume: the root disk and each data disk are separate PVCs
+                    bound = parse_quantity(limit['max']['storage'])
+                    volumes = [('root disk', inst.get('disk_size', context.get('disk_size')))]
+                    volumes += [(d['name'], d['size']) for d in data_disks.get(inst['name'], ())]
+                    for label, size in volumes:
+                        if parse_quantity(size) > bound:
+                            shortfalls.append((f"storage per pvc ({inst['name']} {label})", format_gib(parse_quantity(size)),
+                                               format_gib(bound), f"LimitRange/{lr['metadata']['name']} max"))
+
+    if context.get('image_digest') and new_instances:
+        # Image cache base volume (counted even if it exists already: at most one volume too many)
+        total['storage'] += parse_quantity(context['base_image_size'])
+        total['pvcs'] += 1
+
+    for quota in (p for p in policy if p.get('kind') == 'ResourceQuota'):
+        status = quota.get('status', {})
+        hard, used = status.get('hard', {}), status.get('used', {})
+        for key, hard_value in hard.items():
+            bucket = quota_demand_key(key, storage_class)
+            if not bucket or not total[bucket]:
+                continue
+            parse = parse_cpu_millis if bucket == 'cpu' else parse_quantity
+            available = parse(hard_value) - parse(used.get(key, 0))
+            if total[bucket] > available:
+                shortfalls.append((key, format_demand(bucket, total[bucket]), format_demand(bucket, max(available, 0)),
+                                   f"ResourceQuota/{quota['metadata']['name']}"))
+
+    if storage_class and total['storage']:
+        published = [parse_quantity(c.get('capacity')) for c in capacities if c.get('storageClassName') == storage_class]
+        if published and total['storage'] > sum(published):
+            shortfalls.append((f"storage class {storage_class}", format_gib(total['storage']), format_gib(sum(published)),
+                               "CSIStorageCapacity"))
+
+    print("-" * 60)
+    print(f" 🛡   Preflight Check | {len(new_instances)} new / {len(instances) - len(new_instances)} existing instance(s)")
+    print(f"       Demand: CPU={format_cpu(total['cpu'])} MEM={format_gib(total['memory'])} DISK={format_gib(total['storage'])} PVC={total['pvcs']}")
+    return shortfalls
+
+LOCK_LEASE_SECONDS = 120
+LOCK_RENEW_SECONDS = 40
+
+def parse_shard(value):
+    """Parses '--shard i/n' (1-based) into (i, n)."""
+    match = re.match(r'^(\d+)/(\d+)$', value.strip())
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        print(f"Error: Invalid --shard '{value}'. Use i/n with 1 <= i <= n (e.g. 2/4)."); sys.exit(1)
+    return int(match.group(1)), int(match.group(2))
+
+def in_shard(name, shard):
+    """Stable partition of instance names: the same name lands on the same shard on every host."""
+    index, count = shard
+    return int(hashlib.sha1(name.encode('utf-8')).hexdigest(), 16) % count == index - 1
+
+def lock_name(spec):
+    return f"vman-lock-{slugify(spec)}"[:63]
+
+def read_lock(namespace, name):
+    raw = run_command(['oc', 'get', 'configmap', name, '-n', namespace, '-o', 'json', '--ignore-not-found'])
+    return json.loads(raw) if raw.strip() else None
+
+def write_lock(namespace, configmap):
+    """create (new) or replace (existing, guarded by its resourceVersion). False on a lost race."""
+    verb = 'replace' if configmap['metadata'].get('resourceVersion') else 'create'
+    try:
+        run_command(['oc', verb, '-f', '-', '-n', namespace], input_data=json.dumps(configmap))
+        return True
+    except Exception as e:
+        if re.search(r'Conflict|AlreadyExists|has been modified|NotFound', str(e)):
+            return False
+        raise
+
+def live_lock_entries(configmap, now):
+    entries = {}
+    for key, value in ((configmap or {}).get('data') or {}).items():
+        try:
+            entry = json.loads(value)
+        except ValueError:
+            continue
+        if entry.get('expires', 0) > now:
+            entries[key] = entry
+    return entries
+
+def acquire_deploy_lock(namespace, project, spec, shard):
+    """
+    Takes the shard's lease in the per project/spec lock ConfigMap ('vman-lock-<spec>').
+    Each shard is a key holding {holder, shard, expires}; writes use optimistic concurrency
+    (resourceVersion), so two workers can never both win. Overlapping partitions (a live lease
+    with a different shard count, or the same shard) abort the run. A daemon thread renews the lease.
+    """
+    name = lock_name(spec)
+    key = f"shard-{shard[0]}-of-{shard[1]}"
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = 'unknown'
+    holder = f"{user}@{socket.gethostname()}:{os.getpid()}"
+
+    for _ in range(5):
+        configmap = read_lock(namespace, name) or {
+            'apiVersion': 'v1', 'kind': 'ConfigMap',
+            'metadata': {'name': name, 'namespace': namespace, 'labels': {
+                'v-auto/managed': 'true', 'v-auto/project': project, 'v-auto/spec': spec, 'v-auto/lock': 'true'}},
+        }
+        now = time.time()
+        live = live_lock_entries(configmap, now)
+        blockers = [(k, e) for k, e in live.items()
+                    if e.get('holder') != holder and (k == key or e.get('shard', [0, 0])[1] != shard[1])]
+        if blockers:
+            print(f"[ERROR] {project}/{spec} is being deployed by another worker:")
+            for k, e in blockers:
+                print(f"        {k:<16} {e.get('holder')} (lease expires in {int(e['expires'] - now)}s)")
+            print(f"        Wait for it, or use the same shard count (--shard i/{blockers[0][1].get('shard', [0, '?'])[1]}).")
+            sys.exit(1)
+        configmap['data'] = {k: json.dumps(e) for k, e in live.items()} # Expired leases are dropped
+        configmap['data'][key] = json.dumps({'holder': holder, 'shard': list(shard), 'acquired': now,
+                                             'expires': now + LOCK_LEASE_SECONDS})
+        if write_lock(namespace, configmap):
+            break
+    else:
+        print(f"[ERROR] Could not acquire the deploy lock {name} (too much contention)."); sys.exit(1)
+
+    # The renewal thread inherits this thread's cluster binding ('--context', captured output)
+    lock = {'namespace': namespace, 'name': name, 'key': key, 'holder': holder, 'lost': None,
+            'stop': threading.Event(), 'binding': dict(vars(CLUSTER_LOCAL))}
+    lock['thread'] = threading.Thread(target=renew_deploy_lock, args=(lock,), daemon=True)
+    lock['thread'].start()
+    print(f"[LOCK] Holding {name}/{key} as {holder} (lease {LOCK_LEASE_SECONDS}s, renewed every {LOCK_RENEW_SECONDS}s).")
+    return lock
+
+def update_lock_entry(lock, update):
+    """Read-modify-write of our own lease entry; `update(entry)` returns the new entry or None to drop it."""
+    for _ in range(5):
+        configmap = read_lock(lock['namespace'], lock['name'])
+        raw = ((configmap or {}).get('data') or {}).get(lock['key'])
+        entry = json.loads(raw) if raw else None
+        if not entry or entry.get('holder') != lock['holder']:
+            return False
+        new_entry = update(entry)
+        if new_entry is None:
+            del configmap['data'][lock['key']]
+        else:
+            configmap['data'][lock['key']] = json.dumps(new_entry)
+        if write_lock(lock['namespace'], configmap):
+            return True
+    return False
+
+def renew_deploy_lock(lock):
+    vars(CLUSTER_LOCAL).update(lock['binding'])
+    def extend(entry):
+        entry['expires'] = time.time() + LOCK_LEASE_SECONDS
+        return entry
+    while not lock['stop'].wait(LOCK_RENEW_SECONDS):
+        try:
+            if not update_lock_entry(lock, extend):
+                lock['lost'] = "lease taken over by another worker"
+                return
+        except Exception as e:
+            # Keep trying until the lease actually runs out
+            print(f"  [WARNING] Deploy lock renewal failed: {e}")
+
+def release_deploy_lock(lock):
+    if lock['stop'].is_set():
+        return
+    lock['stop'].set()
+    try:
+        if update_lock_entry(lock, lambda entry: None):
+            print(f"[LOCK] Released {lock['name']}/{lock['key']}.")
+    except Exception as e:
+        print(f"[WARNING] Could not release deploy lock {lock['name']}/{lock['key']} (expires on its own): {e}")
+
+def journal_dir(project, spec):
+    return os.path.join(STATE_DIR, 'journal', project, spec)
+
+def journal_append(path, event, **fields):
+    """Appends one JSON line to a deploy journal and fsyncs it, so a crash never loses an acknowledged apply."""
+    record = {'ts': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'), 'event': event}
+    record.update(fields)
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def journal_suffix(shard):
+    """Journal file suffix: one journal series per shard, so shards never resume each other's runs."""
+    return f".shard-{shard[0]}-of-{shard[1]}.jsonl" if shard else ".jsonl"
+
+def load_resume_journal(project, spec, shard=None):
+    """
+    Returns the state of the latest unfinished deploy run of project/spec (and shard), or None:
+    {'path', 'run_id', 'spec_digest', 'targets', 'done' (instances), 'applied' ((kind, name) set)}.
+    A truncated last line (crash mid-write) is ignored.
+    """
+    directory = journal_dir(project, spec)
+    if not os.path.isdir(directory):
+        return None
+    suffix = journal_suffix(shard)
+    runs = sorted(f for f in os.listdir(directory) if f.endswith(suffix) and f.count('.') == suffix.count('.'))
+    if not runs:
+        return None
+    path = os.path.join(directory, runs[-1])
+    state = {'path': path, 'run_id': runs[-1][:-len(suffix)], 'spec_digest': None,
+             'targets': None, 'done': set(), 'applied': set()}
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            event = record.get('event')
+            if event == 'start':
+                state['spec_digest'] = record.get('spec_digest')
+                state['targets'] = record.get('targets')
+            elif event == 'applied':
+                state['applied'].add((record['kind'], record['name']))
+            elif event == 'instance_done':
+                state['done'].add(record['instance'])
+            elif event == 'finish':
+                return None
+    return state
+
+def spec_digest(context):
+    """Fingerprint of the loaded spec (before interactive inputs), to refuse resuming a changed spec."""
+    return hashlib.sha256(json.dumps(context, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+DEFAULT_WAVE_TIMEOUT = 600
+
+def parse_failure_threshold(value, total):
+    """'--max-failures' as a count ('2') or a share of the rollout ('10%')."""
+    value = str(value).strip()
+    try:
+        limit = int(total * float(value[:-1]) / 100) if value.endswith('%') else int(value)
+        if limit >= 0:
+            return limit
+    except ValueError:
+        pass
+    print(f"[ERROR] Invalid --max-failures '{value}': expected a count (2) or a percentage (10%).")
+    sys.exit(1)
+
+def wave_limits(args):
+    """(instances per wave, instances allowed to be unavailable at once)."""
+    if args.wave_size < 1 or (args.max_unavailable is not None and args.max_unavailable < 1):
+        print("[ERROR] --wave-size and --max-unavailable must be at least 1.")
+        sys.exit(1)
+    max_unavailable = args.max_unavailable or args.wave_size
+    return min(args.wave_size, max_unavailable), max_unavailable
+
+def print_wave_plan(names, args):
+    size, _ = wave_limits(args)
+    print(f"\n Rollout plan ({size} per wave, gate: VMI Ready{' + guest agent' if args.wait_agent else ''}):")
+    for i in range(0, len(names), size):
+        print(f"   wave {i // size + 1}: {', '.join(names[i:i + size])}")
+
+def vmi_health(vmi, wait_agent=False):
+    """'ready', 'failed' or None (still starting) for one VMI."""
+    status = vmi.get('status') or {}
+    if status.get('phase') == 'Failed':
+        return 'failed'
+    conditions = {c.get('type'): c.get('status') for c in status.get('conditions') or []}
+    if conditions.get('Ready') == 'True' and (not wait_agent or conditions.get('AgentConnected') == 'True'):
+        return 'ready'
+    return None
+
+def vmi_selector(names):
+    """VMIs inherit 'kubevirt.io/vm' from the VM template (the v-auto labels stay on the VM)."""
+    return f"kubevirt.io/vm in ({','.join(sorted(names))})"
+
+def fetch_vmi_health(namespace, names, wait_agent=False):
+    raw = run_command(['oc', 'get', 'vmi', '-n', namespace, '-l', vmi_selector(names), '-o', 'json'])
+    items = json.loads(raw).get('items', []) if raw.strip() else []
+    return {vmi['metadata']['name']: vmi_health(vmi, wait_agent) for vmi in items}
+
+def watch_vmi_health(namespace, names, wait_agent, timeout, stale=None, ready_at=None):
+    """
+    Streams 'oc get vmi -w -o json' until every VMI in `names` is Ready (and its guest agent
+    connected if `wait_agent`), has failed, or `timeout` seconds passed. The watch is re-opened
+    when the API server closes it; a watch that fails with a non-transient error (e.g. Forbidden)
+    is reported and ends the wait. `stale` ({name: uid}) ignores VMIs being replaced by a restart;
+    `ready_at` collects the seconds each VMI took.
+    Returns {name: 'ready' | 'failed' | 'timeout' | 'error'}.
+    """
+    pending = set(names)
+    stale = stale or {}
+    results = {}
+    started = time.time()
+    deadline = started + timeout
+    cmd = with_cluster_context(['oc', 'get', 'vmi', '-n', namespace, '-l', vmi_selector(names), '-w', '-o', 'json'])
+
+    def handle(obj):
+        if obj.get('kind', '').endswith('List'):
+            for item in obj.get('items', []):
+                handle(item)
+            return
+        name = obj.get('metadata', {}).get('name')
+        if stale.get(name) and obj.get('metadata', {}).get('uid') == stale[name]:
+            return
+        health = vmi_health(obj, wait_agent) if name in pending else None
+        if health:
+            pending.discard(name)
+            results[name] = health
+            if ready_at is not None:
+                ready_at[name] = time.time() - started
+            tag = 'READY  ' if health == 'ready' else 'FAILED '
+            print(f"  [{tag}] {name} ({format_duration(time.time() - started)})")
+
+    while pending and time.time() < deadline:
+        time.sleep(rate_limiter().reserve())
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        decoder = json.JSONDecoder()
+        utf8 = codecs.getincrementaldecoder('utf-8')('replace')
+        buffer = ''
+        errors = b''
+        streams = [proc.stdout, proc.stderr]
+        try:
+            while pending:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                readable = select.select(streams, [], [], remaining)[0]
+                if not readable:
+                    break
+                if proc.stderr in readable:
+                    data = os.read(proc.stderr.fileno(), 65536)
+                    errors += data
+                    if not data:
+                        streams.remove(proc.stderr)
+                    if proc.stdout not in readable:
+                        continue
+                chunk = os.read(proc.stdout.fileno(), 65536)
+                if not chunk:
+                    break
+                buffer += utf8.decode(chunk)
+                # The watch prints one JSON document per event; decode every complete one
+                while True:
+                    buffer = buffer.lstrip()
+                    try:
+                        obj, end = decoder.raw_decode(buffer)
+                    except ValueError:
+                        break
+                    buffer = buffer[end:]
+                    handle(obj)
+        finally:
+            proc.kill()
+            proc.wait()
+            errors += proc.stderr.read()
+            proc.stderr.close()
+            proc.stdout.close()
+        if not pending or time.time() >= deadline:
+            break
+        # The watch closed early: the server timed it out, or oc failed
+        message = errors.decode('utf-8', 'replace').strip()
+        if message and not is_retriable_error(message):
+            print(f"  [ERROR  ] VMI watch failed: {message.splitlines()[0][:200]}")
+            for name in pending:
+                results[name] = 'error'
+            return results
+        if message:
+            print(f"  [WARNING] VMI watch closed ({message.splitlines()[0][:100]}); reconnecting.")
+        time.sleep(1)
+
+    for name in pending:
+        print(f"  [TIMEOUT] {name} not ready after {format_duration(timeout)}")
+        results[name] = 'timeout'
+    return results
+
+def starts_vm(manifests):
+    """False when the instance's VirtualMachine is created stopped ('running: false' / runStrategy Halted)."""
+    vm = next((m for m in manifests if m.get('kind') == 'VirtualMachine'), None)
+    if not vm:
+        return False
+    spec = vm.get('spec') or {}
+    return spec.get('running') is not False and spec.get('runStrategy') != 'Halted'
+
+def rollout_waves(prepared, namespace, args, lock, preview_instance, apply_instance):
+    """
+    Applies the prepared instances in waves and gates each wave on VMI readiness.
+    Wave size is --wave-size, further limited so that at most --max-unavailable instances
+    (that were Ready before the rollout, or were rolled by it) are down at any time.
+    Stops once failures exceed --max-failures. Returns True when every instance became ready.
+    """
+    size, max_unavailable = wave_limits(args)
+    names = [vm_name for vm_name, _ in prepared]
+    manifests = dict(prepared)
+    max_failures = parse_failure_threshold(args.max_failures, len(names))
+    timeout = args.wave_timeout
+    gate = 'VMI Ready' + (' + guest agent' if args.wait_agent else '')
+
+    try:
+        health = fetch_vmi_health(namespace, names, args.wait_agent)
+    except Exception as e:
+        print(f"[ERROR] Rollout needs the current VMI state: {e}")
+        sys.exit(1)
+    # Instances that serve traffic now; brand-new ones do not count against --max-unavailable
+    serving = {name for name in names if health.get(name) == 'ready'}
+    print(f"\n[ROLLOUT] {len(names)} instance(s), {size} per wave, max unavailable {max_unavailable}, "
+          f"max failures {max_failures}, gate: {gate} (timeout {format_duration(timeout)})")
+
+    pending = list(names)
+    rolled = set()
+    failures = []
+    wave = 0
+    started = time.time()
+    while pending:
+        if lock and lock['lost']:
+            print(f"[ERROR] Deploy lock was lost ({lock['lost']}). Stopping before the next wave; resume with --resume.")
+            return False
+        unavailable = [n for n in (serving | rolled) if health.get(n) != 'ready']
+        headroom = max_unavailable - len(unavailable)
+        if headroom <= 0:
+            print(f"[ROLLOUT] Stopped: {len(unavailable)} instance(s) unavailable ({', '.join(sorted(unavailable))}), "
+                  f"--max-unavailable is {max_unavailable}. {len(pending)} instance(s) not rolled.")
+            return False
+
+        batch, pending = pending[:min(size, headroom)], pending[min(size, headroom):]
+        wave += 1
+        print("\n" + "═"*60)
+        print(f" 🌊  Wave {wave}: {', '.join(batch)} ({len(pending)} remaining after this wave)")
+        print("═"*60)
+        applied_ok = []
+        for vm_name in batch:
+            preview_instance(vm_name, manifests[vm_name])
+            rolled.add(vm_name)
+            health[vm_name] = None
+            if apply_instance(vm_name, manifests[vm_name]):
+                applied_ok.append(vm_name)
+            else:
+                failures.append(vm_name)
+
+        # Stopped instances never get a VMI: nothing to gate, and they are not unavailable
+        stopped = [name for name in applied_ok if not starts_vm(manifests[name])]
+        for name in stopped:
+            print(f"  [STOPPED] {name}: created stopped (running: false), not gated.")
+            rolled.discard(name)
+            serving.discard(name)
+        applied_ok = [name for name in applied_ok if name not in stopped]
+        if applied_ok:
+            print(f"  [WAIT   ] {gate} for {len(applied_ok)} instance(s)...")
+            for name, result in watch_vmi_health(namespace, applied_ok, args.wait_agent, timeout).items():
+                health[name] = 'ready' if result == 'ready' else None
+                if result != 'ready':
+                    failures.append(name)
+
+        if len(failures) > max_failures:
+            print(f"\n[ROLLOUT] Stopped after wave {wave}: {len(failures)} failure(s) ({', '.join(failures)}) "
+                  f"exceed --max-failures {max_failures}. {len(pending)} instance(s) not rolled.")
+            return False
+
+    print(f"\n[ROLLOUT] Completed {len(names)} instance(s) in {wave} wave(s), {format_duration(time.time() - started)}"
+          + (f"; {len(failures)} failure(s) tolerated: {', '.join(failures)}" if failures else "") + ".")
+    return not failures
+
+def resolve_clusters(args, context):
+    """
+    Target clusters of a multi-cluster fan-out, from '--contexts a,b' or the spec's 'clusters' list.
+    Entries are kubeconfig context names or mappings with 'context' and optional
+    'namespace', 'storage_class', 'images' ({catalog key: url}) or 'image_url' overrides.
+    Returns [] for the classic single-cluster mode (current context).
+    """
+    clusters = []
+    for entry in context.get('clusters') or []:
+        if isinstance(entry, str):
+            entry = {'context': entry}
+        if not isinstance(entry, dict) or not entry.get('context'):
+            print(f"[ERROR] Invalid 'clusters' entry {entry!r}: expected a context name or a mapping with 'context'.")
+            sys.exit(1)
+        clusters.append(dict(entry))
+
+    if args.contexts:
+        by_context = {c['context']: c for c in clusters}
+        names = [n.strip() for n in args.contexts.split(',') if n.strip()]
+        clusters = [by_context.get(n, {'context': n}) for n in names]
+
+    contexts = [c['context'] for c in clusters]
+    duplicates = sorted({c for c in contexts if contexts.count(c) > 1})
+    if duplicates:
+        print(f"[ERROR] Cluster context listed more than once: {', '.join(duplicates)}")
+        sys.exit(1)
+    return clusters
+
+def describe_cluster(cluster, context):
+    namespace = cluster.get('namespace') or context.get('namespace', 'default')
+    extras = [f"ns={namespace}"]
+    if cluster.get('storage_class'):
+        extras.append(f"class={cluster['storage_class']}")
+    if cluster.get('image_url') or cluster.get('images'):
+        extras.append("image override")
+    return f"{cluster['context']} ({', '.join(extras)})"
+
+def run_on_cluster(cluster, fn, *fn_args):
+    """
+    Runs fn(*fn_args) on a worker thread bound to one cluster: its 'oc' calls get '--context',
+    load_config applies the cluster overrides and everything printed is captured.
+    Returns (ok, result, output, seconds).
+    """
+    CLUSTER_LOCAL.context = cluster['context']
+    CLUSTER_LOCAL.cluster = cluster
+    CLUSTER_LOCAL.output = io.StringIO()
+    started = time.time()
+    try:
+        result, ok = fn(*fn_args), True
+    except SystemExit as e:
+        # The action already printed its [ERROR] into the captured output
+        result, ok = f"exit {e.code}", False
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        result, ok = str(e), False
+    finally:
+        output = CLUSTER_LOCAL.output.getvalue()
+        CLUSTER_LOCAL.context = CLUSTER_LOCAL.cluster = CLUSTER_LOCAL.output = None
+    return ok, result, output, time.time() - started
+
+def fan_out(clusters, fn, *fn_args):
+    """Runs fn once per cluster, all clusters concurrently. Returns {context: (ok, result, output, seconds)}."""
+    original = sys.stdout
+    sys.stdout = ThreadLocalStdout(original)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(clusters)) as pool:
+            futures = [(c['context'], pool.submit(run_on_cluster, c, fn, *fn_args)) for c in clusters]
+            results = {context: future.result() for context, future in futures}
+    finally:
+        sys.stdout = original
+    return results
+
+def print_cluster_outputs(results):
+    for context, (ok, _, output, seconds) in results.items():
+        print("\n" + "═"*60)
+        print(f" 🌐  Cluster: {context} ({'done' if ok else 'ABORTED'} in {format_duration(seconds)})")
+        print("═"*60)
+        print(output.rstrip() or "(no output)")
+
+def fan_out_action(args, clusters, action_fn):
+    """status/list/delete on every cluster at once, followed by a per-cluster result matrix."""
+    print(f"[FAN-OUT] '{args.action}' on {len(clusters)} cluster(s): {', '.join(c['context'] for c in clusters)}")
+    results = fan_out(clusters, action_fn, args)
+    print_cluster_outputs(results)
+
+    print("\n" + "═"*60)
+    print(f" 🌐  Result Matrix | {args.project}/{args.spec} {args.action}")
+    print("═"*60)
+    print(f"   {'CLUSTER':<30} {'RESULT':<10} {'TIME':>8}")
+    for context, (ok, result, _, seconds) in results.items():
+        print(f"   {context:<30} {'OK' if ok else 'FAILED':<10} {format_duration(seconds):>8}")
+    if not all(ok for ok, _, _, _ in results.values()):
+        sys.exit(1)
+
+def patch_manifests_for_cluster(manifests, cluster, base_class, image_key, vm_name, claimed_disk=None):
+    """
+    Copy of one instance's rendered manifests adapted to a cluster: namespace, the storage class
+    of volumes that use the spec-level class, the root disk image URL and a warm-pool disk
+    already bound to this VM on that cluster.
+    """
+    image_url = cluster.get('image_url') or (cluster.get('images') or {}).get(image_key)
+    patched = []
+    for m in copy.deepcopy(manifests):
+        meta = m.setdefault('metadata', {})
+        if cluster.get('namespace'):
+            meta['namespace'] = cluster['namespace']
+
+        if m['kind'] == 'DataVolume':
+            if claimed_disk and meta['name'] == f"{vm_name}-root-disk":
+                continue
+            pvc = m['spec'].get('pvc', {})
+            if cluster.get('storage_class') and pvc.get('storageClassName') == base_class:
+                pvc['storageClassName'] = cluster['storage_class']
+            http = m['spec'].get('source', {}).get('http')
+            if http and image_url and meta['name'] == f"{vm_name}-root-disk":
+                http['url'] = image_url
+
+        if m['kind'] == 'VirtualMachine' and claimed_disk:
+            for volume in m['spec']['template']['spec'].get('volumes', []):
+                if volume['name'] == 'root-disk':
+                    volume['dataVolume']['name'] = claimed_disk
+            meta.setdefault('annotations', {})['v-auto/root-disk'] = claimed_disk
+        patched.append(m)
+    return patched
+
+def print_preflight_shortfalls(shortfalls):
+    print(f"\n       {'RESOURCE':<58} {'NEED':>9} {'AVAILABLE':>10}  SOURCE")
+    for resource, need, available, source in shortfalls:
+        print(f"       {resource:<58} {need:>9} {available:>10}  {source}")
+    print("\n[ERROR] Preflight failed: the spec does not fit. Nothing has been applied.")
+
+def deploy_to_cluster(args, project, spec, context, prepared, targeted, data_disks, shard, image_key):
+    """
+    Applies the already rendered instances to the cluster bound to this thread.
+    Returns {row: result} with one row per instance plus '(shared)' for the shared NADs.
+    """
+    cluster = CLUSTER_LOCAL.cluster
+    namespace = cluster.get('namespace') or context.get('namespace', 'default')
+    selector = f"v-auto/project={project},v-auto/spec={spec}"
+    results = {}
+
+    ensure_namespace(namespace)
+    lock = acquire_deploy_lock(namespace, project, spec, shard or (1, 1))
+    try:
+        try:
+            claimed_disks = claimed_root_disks(fetch_vm_annotations(namespace, selector))
+        except Exception as e:
+            # Without them a claimed VM would be re-pointed to a new, empty root disk
+            print(f"[ERROR] Could not list the VMs' claimed root disks (needed to keep them attached): {e}")
+            return {row: 'DISK LOOKUP' for row in ['(shared)'] + [vm_name for vm_name, _ in prepared]}
+        patched = [(vm_name, patch_manifests_for_cluster(manifests, cluster, context.get('storage_class'),
+                                                         image_key, vm_name, claimed_disks.get(vm_name)))
+                   for vm_name, manifests in prepared]
+
+        if not args.skip_preflight:
+            cluster_ctx = dict(context, namespace=namespace,
+                               storage_class=cluster.get('storage_class') or context.get('storage_class'))
+            shortfalls = preflight_check(namespace, selector, targeted, cluster_ctx, data_disks)
+            if shortfalls:
+                print_preflight_shortfalls(shortfalls)
+                return {row: 'PREFLIGHT' for row in ['(shared)'] + [vm_name for vm_name, _ in patched]}
+            print("       [OK] Fits within namespace quotas and storage capacity.")
+
+        shared_nads, _ = collect_shared_nads(patched)
+        if shared_nads:
+            ok = [apply_k8s_resource(m, namespace) for m in shared_nads]
+            results['(shared)'] = 'OK' if all(ok) else f"FAIL({ok.count(False)})"
+        seen_shared = shared_keys(shared_nads)
+
+        for vm_name, manifests in patched:
+            if lock['lost']:
+                print(f"[ERROR] Deploy lock was lost ({lock['lost']}). Not applying {vm_name}.")
+                results[vm_name] = 'LOCK LOST'
+                continue
+            print(f"Applying resources for {vm_name}...")
+            failed = 0
+            for m in manifests:
+                key = (m['kind'], m['metadata']['name'])
+                if is_shared_manifest(m) and key in seen_shared:
+                    continue
+                if not apply_k8s_resource(m, namespace):
+                    failed += 1
+            seen_shared.update(shared_keys(manifests))
+            results[vm_name] = f"FAIL({failed})" if failed else 'OK'
+        if any(result == 'OK' for result in results.values()):
+            prune_userdata_secrets(namespace, project, spec, userdata_secret_names(prepared))
+            prune_base_images(namespace, project, spec, base_image_volume_names(prepared))
+    finally:
+        release_deploy_lock(lock)
+    return results
+
+def deploy_multi_cluster(args, project, spec, context, clusters, prepared, targeted, data_disks, shard, image_key):
+    """Fans the rendered manifests out to every cluster in parallel and prints the result matrix."""
+    print(f"\n[FAN-OUT] Applying {len(prepared)} instance(s) to {len(clusters)} cluster(s) in parallel...")
+    results = fan_out(clusters, deploy_to_cluster, args, project, spec, context, prepared,
+                      targeted, data_disks, shard, image_key)
+    print_cluster_outputs(results)
+
+    rows = [vm_name for vm_name, _ in prepared]
+    if any(ok and '(shared)' in result for ok, result, _, _ in results.values()):
+        rows.insert(0, '(shared)')
+    width = max(12, max(len(c) for c in results) + 2)
+    print("\n" + "═"*60)
+    print(f" 🌐  Result Matrix | {project}/{spec} deploy")
+    print("═"*60)
+    print(f"   {'INSTANCE':<20}" + ''.join(f"{c:<{width}}" for c in results))
+    failed = False
+    for row in rows:
+        cells = []
+        for ok, result, _, _ in results.values():
+            cell = result.get(row, '-') if ok else 'ABORTED'
+            failed = failed or cell not in ('OK', '-')
+            cells.append(f"{cell:<{width}}")
+        print(f"   {row:<20}" + ''.join(cells))
+    print(f"   {'(time)':<20}" + ''.join(f"{format_duration(s):<{width}}" for _, _, _, s in results.values()))
+    if failed:
+        print("\n[ERROR] Deploy incomplete on some clusters (see matrix). Re-running the deploy re-applies idempotently.")
+        sys.exit(1)
+    print(f"\n[OK] {len(prepared)} instance(s) deployed to {len(clusters)} cluster(s).")
+
+def deploy_action(args):
+    project = args.project
+    spec = args.spec
+    output = ManifestOutput(args.output, args.verbose)
+    atexit.register(output.close)
+    
+    print(f"Loading configuration for Project: {project}, Spec: {spec}...")
+    context = load_config(project, spec)
+    infra_config = load_infrastructure_config(project, context)
+    digest = spec_digest(context)
+    shard = parse_shard(args.shard) if args.shard else None
+
+    # --- Multi-cluster fan-out (render once, apply to every cluster in parallel) ---
+    clusters = resolve_clusters(args, context)
+    if clusters and args.resume:
+        print("[ERROR] --resume is not supported for multi-cluster deploys (the journal is per cluster run).")
+        print("        Re-run the deploy: applies are idempotent.")
+        sys.exit(1)
+    if clusters and not (args.yes or args.dry_run):
+        print("[ERROR] Multi-cluster deploy applies without per-instance prompts: pass --yes (or --dry-run to review).")
+        sys.exit(1)
+    if args.wave_size is not None:
+        if clusters:
+            print("[ERROR] --wave-size is not supported for multi-cluster deploys; roll out one cluster at a time with --contexts.")
+            sys.exit(1)
+        wave_limits(args)
+        parse_failure_threshold(args.max_failures, 1)
+    elif args.max_unavailable is not None or args.wait_agent:
+        print("[ERROR] --max-unavailable and --wait-agent only apply to a wave rollout (--wave-size).")
+        sys.exit(1)
+
+    # --- Resume (continue the latest unfinished run from its journal) ---
+    resume = None
+    if args.resume:
+        resume = load_resume_journal(project, spec, shard)
+        if not resume:
+            print(f"[INFO] No unfinished deploy journal for {project}/{spec}. Starting a fresh run.")
+        elif resume['spec_digest'] != digest:
+            print(f"[ERROR] Spec '{spec}' changed since run {resume['run_id']}; resuming would mix configurations.")
+            print("        Re-run without --resume to deploy the current spec from the start.")
+            sys.exit(1)
+        else:
+            print(f"[RESUME] Run {resume['run_id']}: {len(resume['done'])} instance(s) and {len(resume['applied'])} object(s) already applied.")
+
+    # Spec-level storage settings (a storage profile may supply the class)
+    root_opts = resolve_storage_options(context, {}, infra_config)
+    context['storage_class'] = root_opts['storage_class']
+    context['access_mode'] = root_opts['access_mode']
+    
+    # --- Interactive Inputs (Auth) ---
+    # Discover passwords from the common cloud-init context
+    discovered = discover_password_inputs(context)
+    
+    # explicit inputs (legacy support)
+    config_inputs = context.get('inputs', [])
+    
+    final_inputs = []
+    seen_keys = set()
+    discovered_map = { d['key']: d['prompt'] for d in discovered }
+    
+    for item in config_inputs:
+        key = item['key']
+        if key in discovered_map:
+            item['prompt'] = discovered_map[key]
+        final_inputs.append(item)
+        seen_keys.add(key)
+        
+    for d in discovered:
+        if d['key'] not in seen_keys:
+            final_inputs.append(d)
+            seen_keys.add(d['key'])
+
+    # Fallback prompt removed to allow cloud-init hardcoded passwords
+    # if not final_inputs and 'auth' in context:
+    #      if not context['auth'].get('password'):
+    #          final_inputs.append({'key': 'password', 'prompt': f"Password for {context['auth'].get('username', 'user')}"})
+
+    if final_inputs:
+        print("\n--- Required Inputs ---")
+        for item in final_inputs:
+            key = item.get('key')
+            prompt_text = item.get('prompt', f"Enter value for '{key}'")
+            if context.get(key): continue
+            
+            # Skip interaction in dry-run mode
+            if args.dry_run:
+                print(f"  [Dry-Run] Auto-filling dummy value for '{key}'")
+                context[key] = f"(dry-run-{key})"
+                continue
+                
+            while True:
+                val = getpass.getpass(f"{prompt_text}: ")
+                if not val: continue
+                val_confirm = getpass.getpass(f"Confirm {prompt_text}: ")
+                if val != val_confirm:
+                    print("Mismatch!"); continue
+                context[key] = val
+                break
+        print("-----------------------\n")
+
+    if 'password' in context:
+        context.setdefault('auth', {})['password'] = context['password']
+    
+    # --- Determine Instances ---
+    if not context.get('instances'):
+        replicas = args.replicas if args.replicas else context.get('replicas', 1)
+        print(f"[INFO] No 'instances' list found. Falling back to legacy replica mode (Count: {replicas})")
+    instances = resolve_instances(context, spec, args.replicas)
+    if shard:
+        total = len(instances)
+        instances = [i for i in instances if in_shard(i['name'], shard)]
+        print(f"[SHARD] {shard[0]}/{shard[1]}: {len(instances)} of {total} instance(s) belong to this worker.")
+    
+    namespace = context.get('namespace', 'default')
+    
+    # --- Network Resolution (Infra Catalog) ---
+    base_interfaces = resolve_base_interfaces(context, infra_config)
+
+    # --- Placement (optional, fills node_selector for unpinned instances) ---
+    placement_conf = context.get('placement') or {}
+    strategy = args.placement or placement_conf.get('strategy')
+    if strategy and clusters:
+        print("[WARNING] Placement reads one cluster's node capacity; skipped for multi-cluster deploy.")
+        strategy = None
+    placement = None
+    if strategy:
+        targeted = [i for i in instances if not args.target or i['name'] == args.target]
+        try:
+            nodes = fetch_cluster_capacity(context.get('storage_class'), placement_conf.get('node_labels'))
+        except Exception as e:
+            print(f"[ERROR] Placement requires cluster access to read node capacity: {e}")
+            sys.exit(1)
+        placement = (plan_placement(targeted, context, nodes, strategy, load_placement_hints(project, spec)), nodes)
+
+    # --- Configuration Summary ---
+    print("\n" + "═"*60)
+    print(f" 🚀  DEPLOYMENT PLAN | Project: {project.upper()}")
+    print("═"*60)
+    
+    # 1. Scope
+    print(f" {'Scope':<15} : {spec} (Namespace: {namespace})")
+    print(f" {'Instances':<15} : {len(instances)} VMs")
+    for i, cluster in enumerate(clusters):
+        print(f" {'Clusters' if i == 0 else '':<15} {':' if i == 0 else ' '} {describe_cluster(cluster, context)}")
+    
+    # Instance List with IP Resolution (Same logic as inspect)
+    for inst in instances:
+        # IP Resolution Logic
+        direct_ip = inst.get('ip')
+        nc_ips = []
+        nc = inst.get('network_config', context.get('network_config'))
+        if nc:
+            try:
+                if isinstance(nc, str): nc_data = yaml.safe_load(nc)
+                else: nc_data = nc
+                
+                # Logic to handle both 'network: { ethernets: ... }' and direct '{ ethernets: ... }'
+                ethernets = {}
                 if 'network' in nc_data:
                     ethernets = nc_data['network'].get('ethernets', {})
                 else:
@@ -495,213 +2593,1182 @@ def deploy_action(args):
                  print(f"       IP Address: {ip_entry}") # Newline for each IP
         else:
              print(f"       IP Address: Auto/DHCP")
+        inst_disks = resolve_storage_options(context, inst, infra_config)['data_disks']
+        if inst_disks:
+             print(f"       Data Disks: {format_data_disks(inst_disks)}")
+
+    # 2. Authentication
+    users = [d['prompt'].split("'")[1] for d in discovered]
+    if not users:
+        # Try to parse from cloud-init if discovery didn't find prompts (e.g. hardcoded)
+        try:
+             ci_data = yaml.safe_load(context.get('cloud_init', ''))
+             users = [u.get('name') for u in ci_data.get('users', [])]
+        except:
+             users = ['N/A']
+    print(f"\n {'Users':<15} : {', '.join(users)}")
+
+    # 3. Compute & Storage
+    image_key, image_url = resolve_image(context, infra_config)
+    if image_key:
+        print(f" {'Image':<15} : {image_key}")
+    else:
+        print(f" {'Image':<15} : {image_url} (Direct/Raw)")
+    context['image_url'] = image_url # Store resolved
+    image_conf = (infra_config['images'].get(image_key) or {}) if image_key else {}
+    if image_conf.get('base_image') and image_url:
+        probe = probe_image(image_url, image_conf)
+        if clusters:
+            reuse = "direct import (base images are not shared across clusters)"
+        elif probe['digest']:
+            context['image_digest'] = probe['digest']
+            # Every root disk is cloned from the base: it takes the smallest root disk of the spec
+            sizes = [inst.get('disk_size', context.get('disk_size')) for inst in resolve_instances(context, spec, args.replicas)]
+            context['base_image_size'] = min(sizes, key=parse_quantity)
+            reuse = "clone from base image"
+        else:
+            reuse = "direct import (content identity unknown)"
+        print(f" {'Image Cache':<15} : {describe_image_probe(probe)} -> {reuse}")
+
+    print(f" {'Compute':<15} : CPU={context.get('cpu')} / MEM={context.get('memory')}")
+    sc = context.get('storage_class')
+    sc_display = sc if sc else "Cluster Default"
+    print(f" {'Storage':<15} : {context.get('disk_size', 'N/A')} (Class: {sc_display})")
+    tuning = [f"{k}={root_opts[k]}" for k in ('volume_mode', 'cache', 'io') if root_opts[k]]
+    tuning += [k for k in ('preallocation', 'dedicated_io_thread') if root_opts[k]]
+    if tuning:
+        print(f" {'Disk Tuning':<15} : {', '.join(tuning)}")
+    
+    # 4. Networking (Catalog)
+    print("-" * 60)
+    print(" 📡  Infrastructure Catalog")
+    networks = infra_config.get('networks', {})
+    if not networks:
+         print("    (None defined)")
+    for net_name, net_conf in networks.items():
+        net_type = net_conf.get('type', 'multus').upper()
+        nad = net_conf.get('nad_name', '-')
+        subnet = net_conf.get('ipam', {}).get('range', '-') if isinstance(net_conf.get('ipam'), dict) else '-'
+        print(f"       {net_name:<15} [{net_type:<6}] NAD: {nad:<15} Subnet: {subnet}{describe_network_options(net_conf)}")
+
+    if placement:
+        print_placement_plan(placement[0], placement[1], strategy)
+
+    print("═"*60 + "\n")
+
+    if placement and any(node is None and reason == 'no capacity' for _, node, _, _, reason in placement[0]):
+        print("[ERROR] Some instances do not fit on any schedulable node (see Placement Plan).")
+        if not args.dry_run:
+            sys.exit(1)
+    
+    if not args.yes and not args.dry_run:
+        if input("Proceed with dry-run/review? [Y/n]: ").lower() == 'n':
+            print("Cancelled.")
+            return
+
+    # Cluster-scoped steps below run per cluster in deploy_to_cluster when fanning out
+    single = not args.dry_run and not clusters
+
+    # --- Ensure Namespace ---
+    if single:
+        ensure_namespace(namespace)
+
+    # --- Deploy Lock (one live worker per shard; unsharded runs hold 1/1) ---
+    lock = None
+    if single:
+        lock = acquire_deploy_lock(namespace, project, spec, shard or (1, 1))
+        atexit.register(release_deploy_lock, lock)
+
+    # --- Journal (append-only record of what this run applied, for --resume) ---
+    journal = None
+    if single:
+        if resume:
+            journal = resume['path']
+            journal_append(journal, 'resume')
+        else:
+            os.makedirs(journal_dir(project, spec), exist_ok=True)
+            run_id = datetime.utcnow().strftime('%Y%m%d-%H%M%S')
+            journal = os.path.join(journal_dir(project, spec), f"{run_id}{journal_suffix(shard)}")
+            targets = [i['name'] for i in instances if not args.target or i['name'] == args.target]
+            journal_append(journal, 'start', spec_digest=digest, targets=targets)
+            print(f"[INFO] Deploy journal: {journal}")
+    applied = resume['applied'] if resume else set()
+
+    # VMs claimed from the warm pool keep the pre-imported disk they were bound to, and existing
+    # VMs keep their password salt (an unchanged userData keeps its Secret name)
+    existing_vms = {}
+    claimed_disks = {}
+    selector = f"v-auto/project={project},v-auto/spec={spec}"
+    if not clusters:
+        try:
+            existing_vms = fetch_vm_annotations(namespace, selector)
+            claimed_disks = claimed_root_disks(existing_vms)
+        except Exception as e:
+            if not args.dry_run:
+                print(f"[ERROR] Could not list the VMs' claimed root disks (needed to keep them attached): {e}")
+                sys.exit(1)
+            print(f"[WARNING] Could not list the VMs' claimed root disks ({e}); the dry-run renders every root disk as new.")
+    else:
+        # One rendering serves every cluster: the salts are carried forward from the first one
+        # (claimed disks are resolved per cluster in deploy_to_cluster)
+        first = clusters[0]
+        ok, result, _, _ = run_on_cluster(first, fetch_vm_annotations, first.get('namespace') or namespace, selector)
+        if ok:
+            existing_vms = result
+        else:
+            print(f"[WARNING] Could not read the existing VMs on {first['context']} ({result}); new password salts change their userData Secrets.")
+
+    # Image cache: root disks that already exist are reused as they are (a DataVolume's source is immutable)
+    existing_disks = {}
+    if context.get('image_digest'):
+        try:
+            existing_disks = fetch_root_disk_digests(namespace, f"v-auto/project={project},v-auto/spec={spec}")
+        except Exception as e:
+            if not args.dry_run:
+                print(f"[ERROR] Could not list the existing root disks (needed to keep their image source): {e}")
+                sys.exit(1)
+            print(f"[WARNING] Could not list the existing root disks ({e}); the dry-run renders every disk as new.")
+
+    # --- Render Phase (all targeted instances, before anything is applied) ---
+    prepared = []
+    data_disks = {}
+    placed = {inst['name']: inst for inst, *_ in placement[0]} if placement else {}
+    for inst in instances:
+        vm_name = inst['name']
+        inst = placed.get(vm_name, inst) # With the node assigned by the placement plan
+        
+        # Target Filtering
+        if args.target and args.target != vm_name:
+            continue
+        if resume:
+            if resume['targets'] is not None and vm_name not in resume['targets']:
+                continue
+            if vm_name in resume['done']:
+                print(f"[RESUME] {vm_name} completed in run {resume['run_id']}, skipping.")
+                continue
+
+        instance_ctx = context.copy()
+        instance_ctx.update(inst) # Override common with instance specific (e.g. cpu, memory)
+        instance_ctx['vm_name'] = vm_name
+        instance_ctx['project_name'] = project
+        instance_ctx['spec_name'] = spec
+        instance_ctx['interfaces'] = resolve_instance_interfaces(inst, base_interfaces, infra_config, vm_name)
+        instance_ctx['performance'] = resolve_performance_profile(instance_ctx, infra_config)
+        storage_opts = resolve_storage_options(context, inst, infra_config)
+        instance_ctx.update(storage_opts=storage_opts, storage_class=storage_opts['storage_class'],
+                            access_mode=storage_opts['access_mode'])
+        data_disks[vm_name] = storage_opts['data_disks']
+        if vm_name in claimed_disks:
+            instance_ctx['root_disk_name'] = claimed_disks[vm_name]
+        instance_ctx['password_salt'] = existing_vms.get(vm_name, {}).get(PASSWORD_SALT_ANNOTATION)
+        
+        print(f"\n>>> Preparing Instance: {vm_name}")
+        if vm_name in existing_disks and vm_name not in claimed_disks:
+            instance_ctx['root_disk_exists'] = True
+            imported = existing_disks[vm_name]
+            if imported == context['image_digest']:
+                print(f"    [REUSE  ] {vm_name}-root-disk holds the current image ({imported}); not re-imported.")
+            else:
+                print(f"    [REUSE  ] {vm_name}-root-disk kept (imported {imported or 'before the image cache'}); delete the VM to re-image.")
+        prepared.append((vm_name, render_manifests(instance_ctx)))
+
+    if args.export_dir and prepared:
+        export_manifests(args.export_dir, prepared)
+
+    targeted = [i for i in instances if not args.target or i['name'] == args.target]
+    if clusters and not args.dry_run:
+        if prepared:
+            deploy_multi_cluster(args, project, spec, context, clusters, prepared, targeted, data_disks, shard, image_key)
+        return
+
+    # --- Preflight (quota / capacity for the whole spec, before the first apply) ---
+    if not args.dry_run and not args.skip_preflight and prepared:
+        selector = f"v-auto/project={project},v-auto/spec={spec}"
+        try:
+            shortfalls = preflight_check(namespace, selector, targeted, context, data_disks)
+        except Exception as e:
+            print(f"[ERROR] Preflight check could not read quotas/capacity: {e}")
+            print("        Re-run with --skip-preflight to deploy without it.")
+            sys.exit(1)
+        if shortfalls:
+            print_preflight_shortfalls(shortfalls)
+            sys.exit(1)
+        print("       [OK] Fits within namespace quotas and storage capacity.")
+
+    # --- Shared NADs (deduplicated across instances, applied exactly once) ---
+    # Applied together with the first confirmed instance referencing them, so declining an
+    # instance never leaves its network behind.
+    shared_nads, nad_refs = collect_shared_nads(prepared)
+    shared_defs = {(m['kind'], m['metadata']['name']): m for m in shared_nads}
+    if shared_nads:
+        output.header(f"🔗  Shared Network Attachments ({len(shared_nads)} distinct, referenced {nad_refs}x)", shared_nads)
+        for m in shared_nads:
+            output.show(m)
+        if args.dry_run:
+            print(f" [Dry-Run] Skipping creation of {len(shared_nads)} shared NAD(s).")
+        else:
+            print(" [NAD] Each one is created with the first confirmed instance referencing it.")
+        print(f" [NAD] {nad_refs} instance reference(s) -> {len(shared_nads)} apply call(s) ({nad_refs - len(shared_nads)} saved)")
+
+    # Shared objects (no 'v-auto/name' label, e.g. the userData Secret) already shown / applied in this run
+    shown_shared = shared_keys(shared_nads)
+    seen_shared = set()
+
+    # --- Instance Loop ---
+    completed = set()
+
+    def preview_instance(vm_name, manifests):
+        output.header(f"Manifests Generated for Instance: {vm_name}", manifests)
+        for m in manifests:
+            key = (m.get('kind', 'Unknown'), m.get('metadata', {}).get('name', 'Unknown'))
+            if is_shared_manifest(m) and key in shown_shared:
+                output.show(m, vm_name, note='shared, shown above')
+                continue
+            output.show(m, vm_name)
+        shown_shared.update(shared_keys(manifests))
+
+    def apply_instance(vm_name, manifests):
+        """Applies one instance's objects (shared/journaled ones once); True if all succeeded."""
+        print(f"Applying resources for {vm_name}...")
+        failed = 0
+        for m in manifests:
+            key = (m['kind'], m['metadata']['name'])
+            if is_shared_manifest(m) and key in seen_shared:
+                print(f"  [SHARED ] {key[0]} {key[1]} already applied in this run.")
+                continue
+            if key in applied:
+                print(f"  [RESUME ] {key[0]} {key[1]} applied in run {resume['run_id']}.")
+                continue
+            m = shared_defs.get(key, m) # The one definition of a shared NAD shown above
+            ok = apply_k8s_resource(m, namespace)
+            output.result(m, vm_name, ok)
+            if ok:
+                applied.add(key)
+                journal_append(journal, 'applied', instance=vm_name, kind=key[0], name=key[1])
+                if is_shared_manifest(m):
+                    seen_shared.add(key)
+            else:
+                failed += 1 # A failed shared object is retried with the next instance referencing it
+        if failed:
+            print(f"--> {vm_name} incomplete ({failed} object(s) failed); 'deploy --resume' retries it.")
+            return False
+        journal_append(journal, 'instance_done', instance=vm_name)
+        completed.add(vm_name)
+        print(f"--> {vm_name} Deployed.")
+        return True
+
+    rollout_failed = False
+    if args.wave_size and not args.dry_run:
+        # Unattended rollout: waves gated on VMI readiness instead of per-instance prompts
+        if not args.yes:
+            print_wave_plan([vm_name for vm_name, _ in prepared], args)
+            if input("\nStart the rollout? Waves proceed without further prompts. [y/N]: ").lower() != 'y':
+                return
+        rollout_failed = not rollout_waves(prepared, namespace, args, lock, preview_instance, apply_instance)
+    else:
+        for vm_name, manifests in prepared:
+            if lock and lock['lost']:
+                print(f"[ERROR] Deploy lock was lost ({lock['lost']}). Stopping before {vm_name}; resume with --resume.")
+                sys.exit(1)
+
+            # Dry Run Output
+            preview_instance(vm_name, manifests)
+            
+            if args.dry_run:
+                print(f" [Dry-Run] Skipping resource creation for {vm_name}.")
+                continue
+
+            if args.yes:
+                ans = 'y'
+            else:
+                # Confirm
+                ans = input(f"\nCreate resources for {vm_name}? [y/N/q(uit)]: ").lower()
+        
+            if ans == 'q': return
+            if ans != 'y': 
+                print(f"Skipping {vm_name}."); continue
+            
+            apply_instance(vm_name, manifests)
+
+    if args.wave_size and args.dry_run:
+        print_wave_plan([vm_name for vm_name, _ in prepared], args)
+
+    if journal and all(name in completed for name, _ in prepared):
+        journal_append(journal, 'finish')
+    if completed:
+        prune_userdata_secrets(namespace, project, spec, userdata_secret_names(prepared))
+        prune_base_images(namespace, project, spec, base_image_volume_names(prepared))
+    if lock:
+        release_deploy_lock(lock)
+    if clusters:
+        return
+
+    # Show final status
+    print("\n" + "="*50)
+    print(" [ Final Status Summary ]")
+    print("="*50)
+    status_action(args)
+    output.close()
+    if rollout_failed:
+        sys.exit(1)
+
+def prune_userdata_secrets(namespace, project, spec, keep):
+    """
+    Deletes the spec's userData Secrets that no VM references anymore: each cloud-init change
+    produces a new content-addressed '<spec>-userdata-<hash>' Secret. `keep` holds this run's names.
+    """
+    selector = f"v-auto/project={project},v-auto/spec={spec}"
+    results = run_commands_parallel({
+        'vms': ['oc', 'get', 'vm', '-n', namespace, '-l', selector, '-o', 'json'],
+        'secrets': ['oc', 'get', 'secret', '-n', namespace, '-l', f"{selector},!v-auto/name", '-o', 'json'],
+    })
+    try:
+        vms = json.loads(query_result(results, 'vms') or '{}').get('items', [])
+        secrets = json.loads(query_result(results, 'secrets') or '{}').get('items', [])
+    except Exception as e:
+        print(f"[WARNING] Could not check for superseded userData Secrets: {e}")
+        return
+    referenced = set(keep)
+    for vm in vms:
+        for volume in vm.get('spec', {}).get('template', {}).get('spec', {}).get('volumes', []):
+            ref = (volume.get('cloudInitNoCloud') or {}).get('secretRef') or {}
+            if ref.get('name'):
+                referenced.add(ref['name'])
+    stale = sorted(s['metadata']['name'] for s in secrets
+                   if s['metadata']['name'].startswith(f"{spec}-userdata-") and s['metadata']['name'] not in referenced)
+    if not stale:
+        return
+    try:
+        run_command(['oc', 'delete', 'secret'] + stale + ['-n', namespace, '--ignore-not-found'], retry=True)
+        print(f"[CLEANUP] Removed {len(stale)} superseded userData Secret(s): {', '.join(stale)}")
+    except Exception as e:
+        print(f"[WARNING] Could not remove superseded userData Secrets: {e}")
+
+def prune_base_images(namespace, project, spec, keep):
+    """
+    Deletes the spec's image cache base DataVolumes ('v-auto/base-image') that no root disk was
+    cloned from: every image content change produces a new '<spec>-base-<hash>' volume.
+    `keep` holds the base volumes of this run.
+    """
+    selector = f"v-auto/project={project},v-auto/spec={spec}"
+    try:
+        raw = run_command(['oc', 'get', 'dv', '-n', namespace, '-l', selector, '-o', 'json'])
+        items = json.loads(raw).get('items', []) if raw.strip() else []
+    except Exception as e:
+        print(f"[WARNING] Could not check for superseded base image volumes: {e}")
+        return
+    bases = [dv['metadata']['name'] for dv in items
+             if dv['metadata'].get('labels', {}).get('v-auto/base-image') == 'true']
+    referenced = set(keep)
+    for dv in items:
+        source = (dv.get('spec', {}).get('source') or {}).get('pvc') or {}
+        if source.get('name'):
+            referenced.add(source['name'])
+    stale = sorted(name for name in bases if name not in referenced)
+    if not stale:
+        return
+    try:
+        run_command(['oc', 'delete', 'dv'] + stale + ['-n', namespace, '--ignore-not-found'], retry=True)
+        print(f"[CLEANUP] Removed {len(stale)} superseded base image volume(s): {', '.join(stale)}")
+    except Exception as e:
+        print(f"[WARNING] Could not remove superseded base image volumes: {e}")
+
+def base_image_volume_names(prepared):
+    return {m['metadata']['name'] for _, manifests in prepared for m in manifests
+            if m['kind'] == 'DataVolume' and m['metadata'].get('labels', {}).get('v-auto/base-image') == 'true'}
+
+def userdata_secret_names(prepared):
+    return {m['metadata']['name'] for _, manifests in prepared for m in manifests
+            if m['kind'] == 'Secret' and is_shared_manifest(m)}
+
+def fetch_vm_annotations(namespace, selector):
+    """{vm_name: annotations} of the spec's existing VMs."""
+    return parse_vm_annotations(run_command(['oc', 'get', 'vm', '-n', namespace, '-l', selector, '-o', 'json']))
+
+def parse_vm_annotations(raw):
+    items = json.loads(raw).get('items', []) if raw.strip() else []
+    return {vm['metadata']['name']: vm['metadata'].get('annotations') or {} for vm in items}
+
+def claimed_root_disks(annotations):
+    """{vm_name: root disk DataVolume} for existing VMs whose disk came from the warm pool."""
+    return {name: notes['v-auto/root-disk'] for name, notes in annotations.items() if notes.get('v-auto/root-disk')}
+
+def fetch_root_disk_digests(namespace, selector):
+    """{vm_name: image digest it was imported from, or None} for the spec's existing root disk DataVolumes."""
+    raw = run_command(['oc', 'get', 'dv', '-n', namespace, '-l', selector, '-o', 'json'])
+    items = json.loads(raw).get('items', []) if raw.strip() else []
+    disks = {}
+    for dv in items:
+        meta = dv.get('metadata', {})
+        vm_name = meta.get('labels', {}).get('v-auto/name')
+        if vm_name and meta.get('name') == f"{vm_name}-root-disk":
+            disks[vm_name] = meta.get('annotations', {}).get('v-auto/image-digest')
+    return disks
+
+def slugify(value):
+    return re.sub(r'[^a-z0-9-]+', '-', str(value).lower()).strip('-')
+
+def pool_image_slug(image_key, image_url):
+    """Label-safe identifier of the pooled image (catalog key, or a digest of a raw URL)."""
+    if image_key:
+        return slugify(image_key)[:50]
+    return "img-" + hashlib.sha1((image_url or '').encode('utf-8')).hexdigest()[:10]
+
+def pool_selector(project, spec, image_slug):
+    return f"v-auto/project={project},v-auto/spec={spec},v-auto/pool=true,v-auto/pool-image={image_slug}"
+
+def pool_labels(project, spec, image_slug):
+    return {
+        'v-auto/managed': 'true', 'v-auto/project': project, 'v-auto/spec': spec,
+        'v-auto/pool': 'true', 'v-auto/pool-image': image_slug, 'v-auto/pool-state': 'available',
+    }
+
+def fetch_pool_members(namespace, selector):
+    """Lists warm pool members (stopped VM + pre-imported root disk) with their import and claim state."""
+    raw = run_command(['oc', 'get', 'vm,dv', '-n', namespace, '-l', selector, '-o', 'json'])
+    items = json.loads(raw).get('items', []) if raw.strip() else []
+    dvs = {i['metadata']['name']: i for i in items if i.get('kind') == 'DataVolume'}
+    members = []
+    for vm in (i for i in items if i.get('kind') == 'VirtualMachine'):
+        meta = vm['metadata']
+        dv = dvs.get(f"{meta['name']}-root-disk", {})
+        dv_status = dv.get('status', {})
+        members.append({
+            'name': meta['name'],
+            'state': meta.get('labels', {}).get('v-auto/pool-state', 'available'),
+            'resource_version': meta.get('resourceVersion'),
+            'dv_phase': dv_status.get('phase', 'Pending') if dv else 'Missing',
+            'progress': dv_status.get('progress', '-'),
+            'node': dv.get('metadata', {}).get('annotations', {}).get('cdi.kubevirt.io/storage.node.selector'),
+            'size': parse_quantity(dv.get('spec', {}).get('pvc', {}).get('resources', {}).get('requests', {}).get('storage')),
+            'created': meta.get('creationTimestamp', ''),
+        })
+    return sorted(members, key=lambda m: m['created'])
+
+def render_pool_member(context, member_name, labels):
+    """Renders a stopped, network-less VM and its DataVolume for the warm pool."""
+    ctx = context.copy()
+    ctx.update({'vm_name': member_name, 'running': False, 'interfaces': [], 'userdata_secret_name': None,
+                'network_config': None, 'root_disk_name': None})
+    manifests = []
+    for tpl in ('datavolume_template.yaml', 'vm_template.yaml'):
+        m = yaml.safe_load(render_template(tpl, ctx))
+        m.setdefault('metadata', {}).setdefault('labels', {}).update(labels)
+        manifests.append(m)
+    return manifests
+
+def spawn_pool_refill(project, spec, size):
+    """Refills the warm pool to `size` in a detached background 'pool' run (output in .vman/logs)."""
+    log_dir = os.path.join(STATE_DIR, 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, f"pool-{project}-{spec}.log")
+    with open(log_path, 'a') as log:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(sys.argv[0]), project, spec, 'pool', '--yes', '--pool-size', str(size),
+             '--qps', str(API_RATE_LIMITER.qps), '--burst', str(API_RATE_LIMITER.burst)],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+            cwd=BASE_DIR, start_new_session=True
+        )
+    return log_path
+
+def pool_action(args):
+    """Keeps N pre-imported, stopped VMs per spec and image ready for instant 'claim'."""
+    project = args.project
+    spec = args.spec
+    context = load_config(project, spec)
+    infra_config = load_infrastructure_config(project, context)
+    namespace = context.get('namespace', 'default')
+
+    image_key, image_url = resolve_image(context, infra_config)
+    if not image_url:
+        print("Error: The spec defines no image to pre-import."); sys.exit(1)
+    context['image_url'] = image_url
+    slug = pool_image_slug(image_key, image_url)
+    # Pool disks become root disks later: give them the spec's root disk settings (no data disks)
+    storage_opts = resolve_storage_options(context, {'name': f"{spec}-pool"}, infra_config)
+    storage_opts['data_disks'] = []
+    context.update(storage_opts=storage_opts, storage_class=storage_opts['storage_class'],
+                   access_mode=storage_opts['access_mode'])
+    size = args.pool_size if args.pool_size is not None else (context.get('pool') or {}).get('size')
+    selector = pool_selector(project, spec, slug)
+
+    print(f"\n[ Warm Pool: {project}/{spec} | Image: {image_key or image_url} | Target Size: {size if size is not None else '-'} ]")
+    try:
+        members = fetch_pool_members(namespace, selector)
+    except Exception as e:
+        if not args.dry_run:
+            print(f"[ERROR] Failed to list pool members: {e}"); sys.exit(1)
+        members = []
+    available = [m for m in members if m['state'] == 'available']
+
+    print(f"{'NAME':<45} {'STATE':<10} {'DISK':<12} {'PROGRESS'}")
+    for m in members:
+        print(f"{m['name']:<45} {m['state']:<10} {m['dv_phase']:<12} {m['progress']}")
+    if not members:
+        print("   - Pool is empty.")
+
+    if size is None:
+        print("\n[INFO] No pool size configured (spec 'pool.size' or --pool-size). Listing only.")
+        return
+
+    missing = size - len(available)
+    if missing > 0:
+        labels = pool_labels(project, spec, slug)
+        print(f"\nCreating {missing} pool member(s)...")
+        if not args.dry_run:
+            ensure_namespace(namespace)
+        for _ in range(missing):
+            member_name = f"{slugify(spec)}-pool-{slug[:20]}-{os.urandom(3).hex()}"
+            manifests = render_pool_member(context, member_name, labels)
+            if args.dry_run:
+                print(f" [Dry-Run] Would create {member_name} (DataVolume + stopped VM)")
+                continue
+            for m in manifests:
+                apply_k8s_resource(m, namespace)
+    elif missing < 0:
+        # Trim the surplus, least provisioned first
+        surplus = sorted(available, key=lambda m: (m['dv_phase'] == 'Succeeded', m['created']))[:-missing]
+        print(f"\nPool exceeds target by {-missing}; removing surplus member(s)...")
+        for m in surplus:
+            if args.dry_run:
+                print(f" [Dry-Run] Would remove {m['name']}")
+                continue
+            try:
+                run_command(['oc', 'delete', 'vm,dv', m['name'], f"{m['name']}-root-disk", '-n', namespace, '--ignore-not-found'],
+                            retry=True)
+                print(f"  [DELETED] {m['name']}")
+            except Exception as e:
+                print(f"  [FAILED ] {m['name']}: {e}")
+    else:
+        print("\n[OK] Pool is at target size.")
+
+def claim_action(args):
+    """Binds a ready warm pool disk to a spec instance, attaches its cloud-init/network Secrets and starts it."""
+    project = args.project
+    spec = args.spec
+    if not args.target:
+        print("Error: 'claim' requires --target <instance name>."); sys.exit(1)
+
+    started = time.time()
+    context = load_config(project, spec)
+    infra_config = load_infrastructure_config(project, context)
+    namespace = context.get('namespace', 'default')
+    inst = next((i for i in resolve_instances(context, spec, args.replicas) if i['name'] == args.target), None)
+    if not inst:
+        print(f"Error: Instance '{args.target}' is not defined in spec '{spec}'."); sys.exit(1)
+
+    # Claims cannot prompt: passwords must come from the spec or the environment
+    for item in discover_password_inputs(context):
+        if not context.get(item['key']):
+            env_value = os.environ.get(f"VMAN_{item['key'].upper()}")
+            if not env_value:
+                print(f"Error: '{item['key']}' is required. Export VMAN_{item['key'].upper()} for non-interactive claims.")
+                sys.exit(1)
+            context[item['key']] = env_value
+
+    image_key, image_url = resolve_image(context, infra_config)
+    context['image_url'] = image_url
+    slug = pool_image_slug(image_key, image_url)
+    members = fetch_pool_members(namespace, pool_selector(project, spec, slug))
+    ready = [m for m in members if m['state'] == 'available' and m['dv_phase'] == 'Succeeded']
+    if not ready:
+        print(f"[ERROR] No ready pool member for image '{image_key or image_url}'. Run: ./vman {project} {spec} pool")
+        sys.exit(1)
+
+    # Pool disks are created with the common disk_size; a node-bound (local) disk only suits an
+    # instance allowed on that node
+    disk_size = parse_quantity(inst.get('disk_size', context.get('disk_size')))
+    wanted = inst.get('node_selector') or context.get('node_selector')
+    wanted_keys = {f"{k}={v}" for k, v in wanted.items()} if isinstance(wanted, dict) else None
+    suitable = [m for m in ready if m['size'] == disk_size
+                and (not m['node'] or wanted_keys is None or m['node'] in wanted_keys)]
+    if not suitable:
+        print(f"[ERROR] None of the {len(ready)} ready pool member(s) fits {inst['name']} "
+              f"(disk_size {format_gib(disk_size)}, node_selector {wanted or '-'}). Deploy it instead.")
+        sys.exit(1)
+    ready = suitable
+
+    # Optimistic lock: the claim label only sticks if nobody touched the member since we listed it
+    member = None
+    for candidate in ready:
+        try:
+            run_command(['oc', 'label', 'vm', candidate['name'], 'v-auto/pool-state=claimed', '--overwrite',
+                         '--resource-version', candidate['resource_version'], '-n', namespace])
+            member = candidate
+            break
+        except Exception:
+            continue
+    if not member:
+        print("[ERROR] All ready pool members were claimed concurrently. Retry or refill the pool."); sys.exit(1)
+    root_disk = f"{member['name']}-root-disk"
+    print(f"[CLAIM] {member['name']} -> {inst['name']} (disk: {root_disk})")
+
+    def return_to_pool(stage):
+        """Puts the member back into the pool after a failed claim (stage: claimed / disk / orphaned)."""
+        try:
+            if stage in ('disk', 'orphaned'):
+                run_command(['oc', 'label', f"dv/{root_disk}", f"pvc/{root_disk}", 'v-auto/name-', 'v-auto/pool=true',
+                             f"v-auto/pool-image={slug}", 'v-auto/pool-state=available', '--overwrite', '-n', namespace], retry=True)
+            if stage == 'orphaned':
+                placeholder = render_pool_member(context, member['name'], pool_labels(project, spec, slug))[1]
+                if not apply_k8s_resource(placeholder, namespace):
+                    raise Exception(f"could not re-create the placeholder VM {member['name']}")
+            else:
+                run_command(['oc', 'label', 'vm', member['name'], 'v-auto/pool-state=available', '--overwrite', '-n', namespace],
+                            retry=True)
+            print(f"[ROLLBACK] {member['name']} returned to the pool.")
+        except Exception as e:
+            print(f"[ERROR] Could not return {member['name']} to the pool: {e}")
+            print(f"        Remove it with: oc delete vm,dv {member['name']} {root_disk} -n {namespace} --ignore-not-found")
+
+    stage = 'claimed'
+    try:
+        instance_ctx = context.copy()
+        instance_ctx.update(inst)
+        instance_ctx['vm_name'] = inst['name']
+        instance_ctx['project_name'] = project
+        instance_ctx['spec_name'] = spec
+        instance_ctx['interfaces'] = resolve_instance_interfaces(inst, resolve_base_interfaces(context, infra_config), infra_config, inst['name'])
+        instance_ctx['performance'] = resolve_performance_profile(instance_ctx, infra_config)
+        storage_opts = resolve_storage_options(context, inst, infra_config)
+        instance_ctx.update(storage_opts=storage_opts, storage_class=storage_opts['storage_class'],
+                            access_mode=storage_opts['access_mode'])
+        instance_ctx['root_disk_name'] = root_disk
+        manifests = render_manifests(instance_ctx)
+
+        # Hand the disk over to the instance, then drop the placeholder VM (keeping its disk)
+        run_command(['oc', 'label', f"dv/{root_disk}", f"pvc/{root_disk}", f"v-auto/name={inst['name']}",
+                     'v-auto/pool-', 'v-auto/pool-image-', 'v-auto/pool-state-', '--overwrite', '-n', namespace], retry=True)
+        stage = 'disk'
+        run_command(['oc', 'delete', 'vm', member['name'], '--cascade=orphan', '-n', namespace])
+        stage = 'orphaned'
+    except SystemExit:
+        # Rendering already printed its error
+        return_to_pool(stage)
+        raise
+    except Exception as e:
+        print(f"[ERROR] Claim of {member['name']} failed: {e}")
+        return_to_pool(stage)
+        sys.exit(1)
+
+    failed = [m for m in manifests if not apply_k8s_resource(m, namespace)]
+    if any(m['kind'] == 'VirtualMachine' for m in failed):
+        print(f"[ERROR] Could not create {inst['name']} on the claimed disk.")
+        return_to_pool(stage)
+        sys.exit(1)
+    if failed:
+        print(f"[ERROR] {inst['name']} was created but {len(failed)} object(s) failed; "
+              f"re-apply them with: ./vman {project} {spec} deploy --target {inst['name']}")
+    else:
+        print(f"--> {inst['name']} started from the warm pool in {time.time() - started:.1f}s.")
+
+    # Refill to the configured size, or to what the pool held before this claim
+    refill_size = (context.get('pool') or {}).get('size') or len([m for m in members if m['state'] == 'available'])
+    log_path = spawn_pool_refill(project, spec, refill_size)
+    print(f"[INFO] Refilling the pool in the background (log: {log_path}).")
+    if failed:
+        sys.exit(1)
+
+MIGRATION_TIMEOUT = 900 # Seconds before an unfinished migration is cancelled
+MIGRATION_POLL_SECONDS = 5
+MIGRATION_DONE_PHASES = ('Succeeded', 'Failed')
+
+def rebalance_candidates(context, spec, nodes, vmis, target=None):
+    """
+    Spec VMIs running on the candidate nodes, with the nodes each may move to.
+    Returns (movable, fixed): movable rows are {'name', 'node', 'cpu', 'mem', 'allowed'},
+    fixed rows are (name, node, reason) for VMIs that have to stay where they are.
+    """
+    namespace = context.get('namespace')
+    movable, fixed = [], []
+    for inst in resolve_instances(context, spec):
+        name = inst['name']
+        if target and name != target:
+            continue
+        node = next((n for n, info in nodes.items() if (namespace, name) in info['vmis']), None)
+        if not node:
+            continue
+        vmi = vmis.get(name) or {}
+        status = vmi.get('status') or {}
+        conditions = {c.get('type'): c for c in status.get('conditions') or []}
+        migratable = conditions.get('LiveMigratable', {})
+        migration = status.get('migrationState') or {}
+        if migratable.get('status') == 'False':
+            fixed.append((name, node, f"not live-migratable ({migratable.get('reason', 'unknown')})"))
+            continue
+        if migration and not migration.get('completed') and not migration.get('failed'):
+            fixed.append((name, node, 'migration in progress'))
+            continue
+        # Pinning rules: the instance (or common) node_selector and the nodeSelector the VMI actually
+        # carries (e.g. a hostname pin from the placement planner) limit the target nodes
+        selector = inst.get('node_selector') or context.get('node_selector')
+        vmi_selector_labels = (vmi.get('spec') or {}).get('nodeSelector') or {}
+        allowed = {n for n, info in nodes.items()
+                   if n != node and (not isinstance(selector, dict) or node_matches(info['labels'], selector))
+                   and node_matches(info['labels'], vmi_selector_labels)}
+        if not allowed:
+            fixed.append((name, node, 'pinned'))
+            continue
+        cpu, mem = nodes[node]['vmis'][(namespace, name)]
+        movable.append({'name': name, 'node': node, 'cpu': cpu, 'mem': mem, 'allowed': allowed})
+    return movable, fixed
+
+def plan_rebalance(nodes, movable, threshold):
+    """
+    Greedy live-migration plan: moves a VMI off the hottest node that can be relieved to the
+    allowed node that minimizes the hotter of the two afterwards, until the utilization spread
+    (hottest - coolest node) is within `threshold` (0.0 - 1.0). Each VMI moves at most once.
+    Updates `nodes` usage in place. Returns [(row, source, target, util_before, util_after)].
+    """
+    moves = []
+    moved = set()
+
+    def shifted(node, cpu, mem):
+        return node_utilization(dict(node, used_cpu=node['used_cpu'] + cpu, used_mem=node['used_mem'] + mem))
+
+    while len(nodes) > 1:
+        ranked = sorted(nodes, key=lambda n: (node_utilization(nodes[n]), n), reverse=True)
+        if node_utilization(nodes[ranked[0]]) - node_utilization(nodes[ranked[-1]]) <= threshold:
+            break
+        best, key = None, None
+        for hot in ranked[:-1]:
+            before = node_utilization(nodes[hot])
+            for row in movable:
+                if row['node'] != hot or row['name'] in moved:
+                    continue
+                for target in sorted(row['allowed']):
+                    info = nodes[target]
+                    if info['cpu'] - info['used_cpu'] < row['cpu'] or info['mem'] - info['used_mem'] < row['mem']:
+                        continue
+                    target_after = shifted(info, row['cpu'], row['mem'])
+                    after = max(shifted(nodes[hot], -row['cpu'], -row['mem']), target_after)
+                    # Ties go to the coolest target
+                    if after < before and (best is None or (after, target_after) < (best[4], key)):
+                        best, key = (row, hot, target, before, after), target_after
+            if best:
+                break
+        if not best:
+            break
+        row, source, target = best[:3]
+        for node, sign in ((source, -1), (target, 1)):
+            nodes[node]['used_cpu'] += sign * row['cpu']
+            nodes[node]['used_mem'] += sign * row['mem']
+        row['node'] = target
+        moved.add(row['name'])
+        moves.append(best)
+    return moves
+
+def print_rebalance_plan(moves, fixed, before, nodes, threshold):
+    print("-" * 60)
+    print(f" ⚖   Rebalance Plan (target spread <= {threshold * 100:.0f}%)")
+    for row, source, target, util_before, util_after in moves:
+        print(f"       {row['name']:<15} {source:<22} -> {target:<22} CPU={format_cpu(row['cpu']):<6} MEM={format_gib(row['mem'])}")
+    if not moves:
+        print("       - No migration improves the balance.")
+    for name, node, reason in fixed:
+        print(f"       {name:<15} {node:<22}    (stays: {reason})")
+    print("       " + "-"*52)
+    for name in sorted(nodes):
+        print(f"       {name:<28} {before[name] * 100:>5.1f}% -> {node_utilization(nodes[name]) * 100:>5.1f}%")
+
+def migration_manifest(vm_name, project, spec, run_id, target_host=None):
+    labels = {'v-auto/managed': 'true', 'v-auto/project': project, 'v-auto/spec': spec,
+              'v-auto/name': vm_name, 'v-auto/rebalance': run_id}
+    manifest = {
+        'apiVersion': 'kubevirt.io/v1',
+        'kind': 'VirtualMachineInstanceMigration',
+        'metadata': {'name': f"{vm_name}-rebalance-{run_id}", 'labels': labels},
+        'spec': {'vmiName': vm_name},
+    }
+    if target_host:
+        # Restricts the scheduler to the planned node (KubeVirt 1.6+; older releases reject the field)
+        manifest['spec']['addedNodeSelector'] = {NODE_PIN_KEY: target_host}
+    return manifest
+
+def run_migrations(moves, namespace, project, spec, nodes, limit, steer):
+    """
+    Creates the planned migrations with at most `limit` in flight and polls their phase in bulk
+    until each one succeeded, failed or hit MIGRATION_TIMEOUT (then it is cancelled).
+    Returns {vm_name: final phase}.
+    """
+    run_id = datetime.now().strftime('%Y%m%d%H%M%S')
+    queue = list(moves)
+    active = {}   # vm_name -> (started, planned target)
+    phases = {}
+    results = {}
+    selector = f"v-auto/project={project},v-auto/spec={spec},v-auto/rebalance={run_id}"
+    while queue or active:
+        while queue and len(active) < limit:
+            row, source, target = queue.pop(0)[:3]
+            host = nodes[target]['labels'].get(NODE_PIN_KEY, target) if steer else None
+            if apply_k8s_resource(migration_manifest(row['name'], project, spec, run_id, host), namespace):
+                active[row['name']] = (time.time(), target)
+            else:
+                results[row['name']] = 'Failed'
+        if not active:
+            continue
+        time.sleep(MIGRATION_POLL_SECONDS)
+        try:
+            raw = run_command(['oc', 'get', 'vmim', '-n', namespace, '-l', selector, '-o', 'json'])
+            items = json.loads(raw).get('items', []) if raw.strip() else []
+        except Exception as e:
+            print(f"  [WARNING] Could not read migration status: {e}")
+            items = []
+        for item in items:
+            name = item.get('spec', {}).get('vmiName')
+            phase = item.get('status', {}).get('phase') or 'Pending'
+            if name not in active or phases.get(name) == phase:
+                continue
+            phases[name] = phase
+            elapsed = time.time() - active[name][0]
+            tag = {'Succeeded': 'SUCCESS', 'Failed': 'FAILED '}.get(phase, 'MIGRATE')
+            print(f"  [{tag}] {name}: {phase} ({format_duration(elapsed)})")
+            if phase in MIGRATION_DONE_PHASES:
+                results[name] = phase
+                del active[name]
+        for name, (started, _) in list(active.items()):
+            if time.time() - started > MIGRATION_TIMEOUT:
+                print(f"  [TIMEOUT] {name}: not finished after {format_duration(MIGRATION_TIMEOUT)}, cancelling.")
+                try:
+                    run_command(['oc', 'delete', 'vmim', f"{name}-rebalance-{run_id}", '-n', namespace, '--ignore-not-found'],
+                                retry=True)
+                except Exception as e:
+                    print(f"  [WARNING] Could not cancel the migration of {name}: {e}")
+                results[name] = 'Timeout'
+                del active[name]
+    return results
+
+def save_placement_hints(project, spec, hints):
+    path = placement_hints_path(project, spec)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'w') as f:
+        f.write(f"# Written by 'vman {project} {spec} rebalance --save-placement' at {datetime.now().isoformat(timespec='seconds')}\n")
+        f.write("# Preferred node per instance for the deploy placement planner (see 'placement.strategy').\n")
+        yaml.safe_dump({'hints': hints}, f, default_flow_style=False, sort_keys=True)
+    os.replace(tmp, path)
+    return path
+
+def rebalance_action(args):
+    """Live-migrates spec VMIs off hot nodes, within their node_selector, until node utilization is even."""
+    project = args.project
+    spec = args.spec
+    context = load_config(project, spec)
+    namespace = context.get('namespace', 'default')
+    placement_conf = context.get('placement') or {}
+    if args.max_migrations < 1 or args.threshold < 0:
+        print("[ERROR] --max-migrations must be at least 1 and --threshold not negative."); sys.exit(1)
+    threshold = args.threshold / 100.0
+
+    print(f"\n[ Rebalance: {project}/{spec} | Namespace: {namespace} ]")
+    names = [i['name'] for i in resolve_instances(context, spec)]
+    try:
+        nodes = fetch_cluster_capacity(node_labels=placement_conf.get('node_labels'))
+        raw = run_command(['oc', 'get', 'vmi', '-n', namespace, '-l', vmi_selector(names), '-o', 'json'])
+    except Exception as e:
+        print(f"[ERROR] Rebalance needs node utilization and the spec's VMIs: {e}")
+        sys.exit(1)
+    vmis = {v['metadata']['name']: v for v in (json.loads(raw).get('items', []) if raw.strip() else [])}
+    if not nodes:
+        print("[ERROR] No schedulable candidate nodes (check 'placement.node_labels')."); sys.exit(1)
 
-    # 2. Authentication
-    users = [d['prompt'].split("'")[1] for d in discovered]
-    if not users:
-        # Try to parse from cloud-init if discovery didn't find prompts (e.g. hardcoded)
+    before = {name: node_utilization(node) for name, node in nodes.items()}
+    movable, fixed = rebalance_candidates(context, spec, nodes, vmis, args.target)
+    moves = plan_rebalance(nodes, movable, threshold)
+    print_rebalance_plan(moves, fixed, before, nodes, threshold)
+
+    results = {}
+    if moves and args.dry_run:
+        print(f" [Dry-Run] Skipping {len(moves)} migration(s).")
+    elif moves:
+        if not args.yes and input(f"\nLive-migrate {len(moves)} VMI(s), {args.max_migrations} at a time? [y/N]: ").lower() != 'y':
+            print("Cancelled."); return
+        print(f"\nMigrating ({args.max_migrations} in flight{', steered to the planned nodes' if args.steer else ''})...")
+        started = time.time()
+        results = run_migrations(moves, namespace, project, spec, nodes, args.max_migrations, args.steer)
+        done = sum(1 for phase in results.values() if phase == 'Succeeded')
+        print(f"\n[REBALANCE] {done}/{len(moves)} migration(s) succeeded in {format_duration(time.time() - started)}.")
+
+    if args.save_placement and not args.dry_run:
+        # Record where the spec's VMIs run now (after the migrations) as the planner's preferred nodes
         try:
-             ci_data = yaml.safe_load(context.get('cloud_init', ''))
-             users = [u.get('name') for u in ci_data.get('users', [])]
-        except:
-             users = ['N/A']
-    print(f"\n {'Users':<15} : {', '.join(users)}")
+            raw = run_command(['oc', 'get', 'vmi', '-n', namespace, '-l', vmi_selector(names), '-o', 'json'])
+        except Exception as e:
+            print(f"[ERROR] Could not read the VMI placement to save: {e}"); sys.exit(1)
+        hints = {}
+        for vmi in (json.loads(raw).get('items', []) if raw.strip() else []):
+            node = vmi.get('status', {}).get('nodeName')
+            if node:
+                hints[vmi['metadata']['name']] = nodes.get(node, {}).get('labels', {}).get(NODE_PIN_KEY, node)
+        path = save_placement_hints(project, spec, hints)
+        print(f"[SUCCESS] Placement hints for {len(hints)} instance(s) written to {os.path.relpath(path, BASE_DIR)}")
 
-    # 3. Compute & Storage
-    image_key = context.get('image')
-    image_url = context.get('image_url')
-    if image_key and image_key in infra_config['images']:
-        image_info = infra_config['images'][image_key]
-        image_url = image_info['url']
-        print(f" {'Image':<15} : {image_key}")
+    if any(phase != 'Succeeded' for phase in results.values()):
+        sys.exit(1)
+
+SCALE_POLL_SECONDS = 5
+
+def vm_compute(vm):
+    """vCPUs (millicores) and memory (bytes) a VirtualMachine defines: topology / guest memory, else requests."""
+    domain = vm.get('spec', {}).get('template', {}).get('spec', {}).get('domain', {})
+    topo = domain.get('cpu') or {}
+    requests = (domain.get('resources') or {}).get('requests') or {}
+    if topo.get('sockets') or topo.get('cores'):
+        cpu = 1000 * (topo.get('sockets') or 1) * (topo.get('cores') or 1) * (topo.get('threads') or 1)
     else:
-        print(f" {'Image':<15} : {image_url} (Direct/Raw)")
-    context['image_url'] = image_url # Store resolved
+        cpu = parse_cpu_millis(requests['cpu']) if requests.get('cpu') else 0
+    return cpu, parse_quantity((domain.get('memory') or {}).get('guest') or requests.get('memory'))
 
-    print(f" {'Compute':<15} : CPU={context.get('cpu')} / MEM={context.get('memory')}")
-    sc = context.get('storage_class')
-    sc_display = sc if sc else "Cluster Default"
-    print(f" {'Storage':<15} : {context.get('disk_size', 'N/A')} (Class: {sc_display})")
-    
-    # 4. Networking (Catalog)
-    print("-" * 60)
-    print(" 📡  Infrastructure Catalog")
-    networks = infra_config.get('networks', {})
-    if not networks:
-         print("    (None defined)")
-    for net_name, net_conf in networks.items():
-        net_type = net_conf.get('type', 'multus').upper()
-        nad = net_conf.get('nad_name', '-')
-        subnet = net_conf.get('ipam', {}).get('range', '-') if isinstance(net_conf.get('ipam'), dict) else '-'
-        print(f"       {net_name:<15} [{net_type:<6}] NAD: {nad:<15} Subnet: {subnet}")
+def scale_patch(vm, cpu=None, memory=None):
+    """
+    Merge patch setting the spec values `cpu` / `memory` (None = unchanged) in the fields the VM
+    already uses: sockets (or dedicated cores) and memory.guest, plus any requests/limits.
+    """
+    domain = vm.get('spec', {}).get('template', {}).get('spec', {}).get('domain', {})
+    topo = domain.get('cpu') or {}
+    resources = domain.get('resources') or {}
+    patch = {}
+    if cpu is not None:
+        millis = parse_cpu_millis(cpu)
+        if topo.get('dedicatedCpuPlacement') or (topo.get('cores') and not topo.get('sockets')):
+            patch['cpu'] = {'cores': max(millis // 1000, 1)}
+        elif topo.get('sockets'):
+            patch['cpu'] = {'sockets': max(millis // (1000 * (topo.get('cores') or 1) * (topo.get('threads') or 1)), 1)}
+    if memory is not None and (domain.get('memory') or {}).get('guest'):
+        patch['memory'] = {'guest': str(memory)}
+    for key, value in (('cpu', cpu), ('memory', memory)):
+        if value is None:
+            continue
+        sections = [s for s in ('requests', 'limits') if key in (resources.get(s) or {})]
+        if not sections and key not in patch:
+            sections = ['requests']
+        for section in sections:
+            patch.setdefault('resources', {}).setdefault(section, {})[key] = str(value)
+    return {'spec': {'template': {'spec': {'domain': patch}}}}
 
-    print("═"*60 + "\n")
-    
-    if not args.yes and not args.dry_run:
-        if input("Proceed with dry-run/review? [Y/n]: ").lower() == 'n':
-            print("Cancelled.")
-            return
+def hotplug_blocker(vm, vmi, live_update, cpu=None, memory=None):
+    """Why a running VM cannot take the new cpu (millicores) / memory (bytes) live; None if it can."""
+    if not live_update:
+        return "cluster vmRolloutStrategy is not LiveUpdate"
+    domain = vm.get('spec', {}).get('template', {}).get('spec', {}).get('domain', {})
+    topo = domain.get('cpu') or {}
+    vmi_domain = vmi.get('spec', {}).get('domain', {})
+    conditions = {c.get('type'): c.get('status') for c in (vmi.get('status') or {}).get('conditions') or []}
+    if conditions.get('LiveMigratable') == 'False':
+        return "not live-migratable"
+    if cpu is not None:
+        if not topo.get('sockets') or topo.get('dedicatedCpuPlacement'):
+            return "CPU is not defined as sockets (spec 'hotplug')"
+        per_socket = 1000 * (topo.get('cores') or 1) * (topo.get('threads') or 1)
+        if cpu % per_socket:
+            return f"{format_cpu(cpu)} vCPUs is not a whole number of sockets"
+        max_sockets = (vmi_domain.get('cpu') or {}).get('maxSockets')
+        if max_sockets and cpu // per_socket > max_sockets:
+            return f"above maxSockets {max_sockets}"
+    if memory is not None:
+        guest = (domain.get('memory') or {}).get('guest')
+        if not guest:
+            return "memory is not defined as memory.guest (spec 'hotplug')"
+        if memory < parse_quantity(guest):
+            return "memory cannot be hot-unplugged"
+        max_guest = (vmi_domain.get('memory') or {}).get('maxGuest')
+        if max_guest and memory > parse_quantity(max_guest):
+            return f"above maxGuest {max_guest}"
+    return None
 
-    # --- Ensure Namespace ---
-    if not args.dry_run:
-        ensure_namespace(namespace)
+def hotplug_applied(vmi, cpu=None, memory=None):
+    """True once the running guest reports the new CPU topology / memory size."""
+    status = vmi.get('status') or {}
+    if cpu is not None:
+        topo = status.get('currentCPUTopology') or {}
+        if 1000 * (topo.get('sockets') or 0) * (topo.get('cores') or 1) * (topo.get('threads') or 1) != cpu:
+            return False
+    if memory is not None:
+        if parse_quantity((status.get('memory') or {}).get('guestCurrent')) < memory:
+            return False
+    return True
 
-    # --- Instance Loop ---
-    for inst in instances:
-        vm_name = inst['name']
-        
-        # Target Filtering
-        if args.target and args.target != vm_name:
+def wait_hotplug(namespace, selector, changes, timeout):
+    """
+    Polls the spec's VMs and VMIs (two bulk calls per round) until each hot-plug in `changes`
+    ({name: (cpu millis or None, memory bytes or None)}) shows in the guest.
+    Returns {name: ('live', seconds) | ('restart', reason) | ('timeout', seconds)}.
+    """
+    pending = dict(changes)
+    results = {}
+    started = time.time()
+    while pending and time.time() - started < timeout:
+        time.sleep(SCALE_POLL_SECONDS)
+        polled = run_commands_parallel({
+            'vms': ['oc', 'get', 'vm', '-n', namespace, '-l', selector, '-o', 'json'],
+            'vmis': ['oc', 'get', 'vmi', '-n', namespace, '-l', vmi_selector(pending), '-o', 'json'],
+        })
+        try:
+            vms = {v['metadata']['name']: v for v in json.loads(query_result(polled, 'vms') or '{}').get('items', [])}
+            vmis = {v['metadata']['name']: v for v in json.loads(query_result(polled, 'vmis') or '{}').get('items', [])}
+        except Exception as e:
+            print(f"  [WARNING] Could not read hot-plug progress: {e}")
             continue
-
-        instance_ctx = context.copy()
-        instance_ctx.update(inst) # Override common with instance specific (e.g. cpu, memory)
-        instance_ctx['vm_name'] = vm_name
-        instance_ctx['project_name'] = project
-        instance_ctx['spec_name'] = spec
-        
-        # Determine Interfaces for this instance
-        instance_interfaces = copy.deepcopy(base_interfaces)
-        
-        # --- Network Injection Logic (Multi-NIC Support) ---
-        target_interfaces = inst.get('interfaces', [])
-        legacy_ip = inst.get('ip')
-        
-        # Normalize to list format if legacy 'ip' is used
-        if not target_interfaces and legacy_ip:
-            # Find first non-pod network to apply legacy IP
-            first_net = next((n for n in instance_interfaces if n.get('type') != 'pod'), None)
-            if first_net:
-                target_interfaces.append({'network': first_net.get('name'), 'ip': legacy_ip})
-
-        # Apply Overrides
-        for override in target_interfaces:
-            net_name = override.get('network')
-            target_ip = override.get('ip')
-            
-            # Allow override without IP (L2 mode or implicit Multus)
-            if not net_name: continue
-            
-            # Find matching interface in current instance list
-            match = next((n for n in instance_interfaces if n.get('name') == net_name), None)
-            
-            if not match:
-                # Not in common/base? Try to find in Catalog and Add it!
-                # infra_config contains {'networks': ..., 'images': ...}
-                networks_catalog = infra_config.get('networks', {})
-                catalog_entry = networks_catalog.get(net_name)
-                
-                if catalog_entry:
-                     new_iface = get_network_config(net_name, networks_catalog)
-                     if new_iface:
-                         instance_interfaces.append(new_iface)
-                         match = new_iface
-            
-            if not match:
-                print(f"[WARNING] Instance {vm_name}: Network '{net_name}' not found in infrastructure catalog.")
+        for name, (cpu, memory) in list(pending.items()):
+            conditions = {c.get('type'): c for c in (vms.get(name, {}).get('status') or {}).get('conditions') or []}
+            if (conditions.get('RestartRequired') or {}).get('status') == 'True':
+                results[name] = ('restart', conditions['RestartRequired'].get('message') or 'RestartRequired')
+            elif name in vmis and hotplug_applied(vmis[name], cpu, memory):
+                results[name] = ('live', time.time() - started)
+                print(f"  [LIVE   ] {name}: hot-plugged in {format_duration(time.time() - started)}")
+            else:
                 continue
+            del pending[name]
+    for name in pending:
+        results[name] = ('timeout', time.time() - started)
+    return results
 
-            # Merge any extra config from override (e.g. custom routes, mtu)
-            match.update(override)
+def scale_action(args):
+    """Applies changed cpu/memory of the spec to existing VMs: live hotplug where possible, else batched restarts."""
+    project = args.project
+    spec = args.spec
+    context = load_config(project, spec)
+    namespace = context.get('namespace', 'default')
+    selector = f"v-auto/project={project},v-auto/spec={spec}"
+    batch_size = args.wave_size or 1
+    if batch_size < 1:
+        print("[ERROR] --wave-size must be at least 1."); sys.exit(1)
+    instances = [i for i in resolve_instances(context, spec, args.replicas) if not args.target or i['name'] == args.target]
+    if not instances:
+        print(f"Error: Instance '{args.target}' is not defined in spec '{spec}'."); sys.exit(1)
+    names = [i['name'] for i in instances]
 
-            # Inject Static IP into NAD IS ONLY DONE IF IP IS PROVIDED
-            subnet_cidr = match.get('ipam', {}).get('range')
-            if target_ip and subnet_cidr:
-                try:
-                    network = ipaddress.IPv4Network(subnet_cidr, strict=False)
-                    if ipaddress.IPv4Address(target_ip) not in network:
-                        print(f"[WARNING] Instance {vm_name} IP {target_ip} is outside subnet {subnet_cidr}.")
-                        # We proceed anyway as user might know better, or just warn.
-                        
-                    safe_cidr_suffix = str(network.prefixlen)
-                    match['ipam']['type'] = 'static'
-                    match['ipam']['addresses'] = [{'address': f"{target_ip}/{safe_cidr_suffix}"}]
-                    match['ip'] = target_ip # Expose for template (e.g. {{ interfaces[0].ip }})
-                    
-                    # Generate Instance-Specific NAD Name
-                    orig_nad = match.get('nad_name', 'net')
-                    match['nad_name'] = f"{vm_name}-{orig_nad}"
-                    
-                    print(f"    [Net-Inject] {vm_name}: Static IP {target_ip} on '{net_name}' (NAD: {match['nad_name']})")
-                except Exception as e:
-                    print(f"[ERROR] Invalid IP configuration for {vm_name}: {e}")
+    # Live state in one round: VMs, their VMIs and the cluster's rollout strategy
+    results = run_commands_parallel({
+        'vms': ['oc', 'get', 'vm', '-n', namespace, '-l', selector, '-o', 'json'],
+        'vmis': ['oc', 'get', 'vmi', '-n', namespace, '-l', vmi_selector(names), '-o', 'json'],
+        'kubevirt': ['oc', 'get', 'kubevirt', '--all-namespaces', '-o', 'json'],
+    })
+    try:
+        vms = {v['metadata']['name']: v for v in json.loads(query_result(results, 'vms') or '{}').get('items', [])}
+        vmis = {v['metadata']['name']: v for v in json.loads(query_result(results, 'vmis') or '{}').get('items', [])}
+    except Exception as e:
+        print(f"[ERROR] Could not read the spec's VMs: {e}"); sys.exit(1)
+    try:
+        kubevirt = json.loads(query_result(results, 'kubevirt') or '{}').get('items', [])
+        live_update = any((kv.get('spec', {}).get('configuration') or {}).get('vmRolloutStrategy') == 'LiveUpdate'
+                          for kv in kubevirt)
+    except Exception as e:
+        print(f"[WARNING] Could not read the KubeVirt configuration ({e}); changes are applied by restart.")
+        live_update = False
 
-        instance_ctx['interfaces'] = instance_interfaces
-        
-        print(f"\n>>> Preparing Instance: {vm_name}")
-        manifests = render_manifests(instance_ctx)
-        
-        # Dry Run Output
-        print(f"\n" + "═"*60)
-        print(f" 📂  Manifests Generated for Instance: {vm_name}")
-        print("═"*60)
-        for m in manifests:
-            kind = m.get('kind', 'Unknown')
-            m_name = m.get('metadata', {}).get('name', 'Unknown')
-            
-            print(f"\n ─── [ {kind:<25} | Name: {m_name:<20} ] ───")
-            # Dump YAML with block style for readability
-            print(yaml.dump(m, default_flow_style=False, sort_keys=False))
-            
-            # Special Handling for Secrets: Decode Preview
-            if kind == 'Secret':
-                # Check for stringData (Plain) or data (Base64)
-                if 'stringData' in m:
-                    src = m['stringData']
-                    is_b64 = False
-                elif 'data' in m:
-                    src = m['data']
-                    is_b64 = True
-                else:
-                    src = {}
-
-                if src:
-                    print("     ▼ Secret Content Preview ▼")
-                    for key, val in src.items():
-                        if not val: continue
-                        try:
-                            if is_b64:
-                                decoded = base64.b64decode(val).decode('utf-8')
-                            else:
-                                decoded = val
-                            
-                            # Indent the content
-                            decoded_lines = [f"       {line}" for line in decoded.splitlines()]
-                            print(f"     [Key: {key}]")
-                            print("\n".join(decoded_lines))
-                        except:
-                            print(f"     [Key: {key}] (Binary/Non-UTF8 data)")
-            
-            print(" " + "-"*50)
-            
-        if args.dry_run:
-            print(f" [Dry-Run] Skipping resource creation for {vm_name}.")
+    print(f"\n[ Scale: {project}/{spec} | Namespace: {namespace} | Rollout strategy: {'LiveUpdate' if live_update else 'Stage (restart)'} ]")
+    print(f"{'NAME':<20} {'CPU':<14} {'MEMORY':<18} {'METHOD':<10} NOTE")
+    plan = {}  # name -> (method, cpu value or None, memory value or None, cpu millis, memory bytes)
+    for inst in instances:
+        name = inst['name']
+        cpu_value = inst.get('cpu', context.get('cpu'))
+        mem_value = inst.get('memory', context.get('memory'))
+        vm = vms.get(name)
+        if not vm:
+            print(f"{name:<20} {'-':<14} {'-':<18} {'-':<10} not deployed")
             continue
-
-        if args.yes:
-            ans = 'y'
+        cur_cpu, cur_mem = vm_compute(vm)
+        want_cpu, want_mem = parse_cpu_millis(cpu_value), parse_quantity(mem_value)
+        cpu_col = f"{format_cpu(cur_cpu)}" + (f" -> {format_cpu(want_cpu)}" if want_cpu != cur_cpu else "")
+        mem_col = f"{format_gib(cur_mem)}" + (f" -> {format_gib(want_mem)}" if want_mem != cur_mem else "")
+        if want_cpu == cur_cpu and want_mem == cur_mem:
+            print(f"{name:<20} {cpu_col:<14} {mem_col:<18} {'-':<10} unchanged")
+            continue
+        cpu_change = want_cpu if want_cpu != cur_cpu else None
+        mem_change = want_mem if want_mem != cur_mem else None
+        if name not in vmis:
+            method, note = 'patch', "stopped: takes effect at next start"
         else:
-            # Confirm
-            ans = input(f"\nCreate resources for {vm_name}? [y/N/q(uit)]: ").lower()
-        
-        if ans == 'q': return
-        if ans != 'y': 
-            print(f"Skipping {vm_name}."); continue
-            
-        # Apply
-        print(f"Applying resources for {vm_name}...")
-        for m in manifests:
-            ignore = (m['kind'] == 'NetworkAttachmentDefinition')
-            apply_k8s_resource(m, namespace, ignore_exists=ignore)
-        print(f"--> {vm_name} Deployed.")
+            blocker = hotplug_blocker(vm, vmis[name], live_update, cpu_change, mem_change)
+            method, note = ('restart', blocker) if blocker else ('hotplug', "live")
+        plan[name] = (method, cpu_value if cpu_change is not None else None,
+                      mem_value if mem_change is not None else None, cpu_change, mem_change)
+        print(f"{name:<20} {cpu_col:<14} {mem_col:<18} {method:<10} {note}")
 
-    # Show final status
-    print("\n" + "="*50)
-    print(" [ Final Status Summary ]")
-    print("="*50)
-    status_action(args)
+    if not plan:
+        print("\n[OK] Every deployed VM already matches the spec.")
+        return
+    counts = {m: sum(1 for p in plan.values() if p[0] == m) for m in ('hotplug', 'restart', 'patch')}
+    if args.dry_run:
+        print(f"\n [Dry-Run] {counts['hotplug']} hot-plug(s), {counts['restart']} restart(s), {counts['patch']} stopped VM(s) to patch.")
+        return
+    if not args.yes:
+        ans = input(f"\nApply: {counts['hotplug']} live, {counts['restart']} by restart ({batch_size} at a time), "
+                    f"{counts['patch']} stopped? [y/N]: ").lower()
+        if ans != 'y':
+            print("Cancelled."); return
+
+    def patch_vm(name):
+        _, cpu_value, mem_value, _, _ = plan[name]
+        try:
+            run_command(['oc', 'patch', 'vm', name, '-n', namespace, '--type', 'merge',
+                         '-p', json.dumps(scale_patch(vms[name], cpu_value, mem_value))], retry=True)
+            print(f"  [PATCHED] {name}")
+            return True
+        except Exception as e:
+            print(f"  [FAILED ] {name}: {e}")
+            return False
+
+    outcome = {}  # name -> (result, downtime text)
+    for name, (method, *_rest) in plan.items():
+        if method == 'patch':
+            outcome[name] = ('patched', '-') if patch_vm(name) else ('FAILED', '-')
+
+    # 1. Live hot-plug (KubeVirt live-migrates the VMI onto a resized pod: no guest downtime)
+    restarts = [name for name, p in plan.items() if p[0] == 'restart']
+    live = [name for name, p in plan.items() if p[0] == 'hotplug' and patch_vm(name)]
+    outcome.update({name: ('FAILED', '-') for name, p in plan.items() if p[0] == 'hotplug' and name not in live})
+    if live:
+        print(f"\nWaiting for {len(live)} hot-plug(s) to reach the guest...")
+        changes = {name: (plan[name][3], plan[name][4]) for name in live}
+        for name, (result, value) in wait_hotplug(namespace, selector, changes, args.wave_timeout).items():
+            if result == 'live':
+                outcome[name] = (f"live ({format_duration(value)})", '0s')
+            elif result == 'restart':
+                print(f"  [RESTART] {name}: {value}")
+                restarts.append(name)
+            else:
+                print(f"  [TIMEOUT] {name}: not visible in the guest after {format_duration(value)}")
+                outcome[name] = ('FAILED (timeout)', '-')
 
-def apply_k8s_resource(manifest, namespace, ignore_exists=False):
+    # 2. Restarts in batches; the next batch only starts once the previous one is Ready again
+    for i in range(0, len(restarts), batch_size):
+        batch = restarts[i:i + batch_size]
+        print(f"\nRestarting {', '.join(batch)} ({i // batch_size + 1}/{-(-len(restarts) // batch_size)})...")
+        batch = [name for name in batch if plan[name][0] != 'restart' or patch_vm(name)]
+        outcome.update({name: ('FAILED', '-') for name in restarts[i:i + batch_size] if name not in batch})
+        stale = {name: vmis[name]['metadata'].get('uid') for name in batch if name in vmis}
+        try:
+            run_command(['oc', 'delete', 'vmi'] + batch + ['-n', namespace, '--wait=false'])
+        except Exception as e:
+            print(f"  [FAILED ] Could not restart {', '.join(batch)}: {e}")
+            outcome.update({name: ('FAILED', '-') for name in batch})
+            break
+        downtime = {}
+        health = watch_vmi_health(namespace, batch, args.wait_agent, args.wave_timeout, stale=stale, ready_at=downtime)
+        for name in batch:
+            ok = health.get(name) == 'ready'
+            outcome[name] = ('restarted' if ok else f"FAILED ({health.get(name)})",
+                             format_duration(downtime[name]) if ok else '-')
+        if not all(health.get(name) == 'ready' for name in batch):
+            for name in restarts[i + batch_size:]:
+                outcome[name] = ('skipped', '-')
+            print("[ERROR] A restarted VM did not come back; remaining restarts skipped.")
+            break
+
+    print("\n" + "="*60)
+    print(f" [ Scale Summary: {project}/{spec} ]")
+    print("="*60)
+    print(f"   {'NAME':<20} {'RESULT':<24} {'DOWNTIME':>8}")
+    for name in plan:
+        result, downtime = outcome.get(name, ('-', '-'))
+        print(f"   {name:<20} {result:<24} {downtime:>8}")
+    if any(result.startswith(('FAILED', 'skipped')) for result, _ in outcome.values()):
+        sys.exit(1)
+
+def apply_k8s_resource(manifest, namespace):
+    """'oc apply' is idempotent: an existing object is updated, so every error is a real failure."""
     kind = manifest['kind']
     name = manifest['metadata']['name']
     
@@ -711,11 +3778,10 @@ def apply_k8s_resource(manifest, namespace, ignore_exists=False):
     try:
         run_command(cmd, input_data=input_str)
         print(f"  [SUCCESS] Created {kind}: {name}")
+        return True
     except Exception as e:
-        if ignore_exists:
-            print(f"  [SKIPPED] {kind} {name} already exists.")
-        else:
-            print(f"  [FAILED ] {kind} {name}: {e}")
+        print(f"  [FAILED ] {kind} {name}: {e}")
+        return False
 
 def delete_action(args):
     project = args.project
@@ -735,14 +3801,20 @@ def delete_action(args):
     # 1. Gather all targets
     print(f"Gathering resources for deletion in namespace '{namespace}'...")
     
+    # Label lookup and legacy name-prefix lookup are independent: run them concurrently
+    lookups = {'label': ['oc', 'get', kinds, '-n', namespace, '-l', selector, '-o', 'name', '--ignore-not-found']}
+    if not target:
+        lookups['all'] = ['oc', 'get', 'vm,dv,pvc,secret', '-n', namespace, '-o', 'name', '--ignore-not-found']
+    lookup_results = run_commands_parallel(lookups)
+
     # Find by labels
-    found_by_label = run_command(['oc', 'get', kinds, '-n', namespace, '-l', selector, '-o', 'name', '--ignore-not-found']).splitlines()
+    found_by_label = query_result(lookup_results, 'label').splitlines()
     found_by_label = [r for r in found_by_label if r.strip()]
     
     # Find by name prefix (Legacy Fallback)
     found_by_name = []
     if not target:
-        all_res = run_command(['oc', 'get', 'vm,dv,pvc,secret', '-n', namespace, '-o', 'name', '--ignore-not-found']).splitlines()
+        all_res = query_result(lookup_results, 'all').splitlines()
         found_by_name = [r for r in all_res if r.split('/')[-1].startswith(base_name) and r.strip()]
         found_by_name = [r for r in found_by_name if r not in found_by_label]
 
@@ -750,20 +3822,24 @@ def delete_action(args):
         print(f"\n[INFO] No matching resources found for Spec '{spec}' in {namespace}.")
         return
 
+    # Intelligent status: Use printableStatus if available, else Phase
+    cols = "KIND:.kind,NAME:.metadata.name,STATUS:.status.printableStatus,PHASE:.status.phase,READY:.status.ready"
+    tables = {}
+    if found_by_label:
+        tables['label'] = ['oc', 'get', kinds, '-n', namespace, '-l', selector, '-o', f'custom-columns={cols}']
+    if found_by_name:
+        # Pass names as individual arguments to avoid slash error in some OC versions
+        tables['name'] = ['oc', 'get'] + found_by_name + ['-n', namespace, '-o', f'custom-columns={cols}', '--ignore-not-found']
+    table_results = run_commands_parallel(tables)
+
     print("\nTHE FOLLOWING RESOURCES WILL BE PERMANENTLY DELETED:")
     if found_by_label:
         print(f"\n[ 1. Managed Resources (Selector: {selector}) ]")
-        # Intelligent status: Use printableStatus if available, else Phase
-        cols = "KIND:.kind,NAME:.metadata.name,STATUS:.status.printableStatus,PHASE:.status.phase,READY:.status.ready"
-        table = run_command(['oc', 'get', kinds, '-n', namespace, '-l', selector, '-o', f'custom-columns={cols}'])
-        clean_print_table(table, "Resources")
+        clean_print_table(query_result(table_results, 'label'), "Resources")
         
     if found_by_name:
         print(f"\n[ 2. Legacy/Unmanaged (Matching Prefix: {base_name}-*) ]")
-        cols = "KIND:.kind,NAME:.metadata.name,STATUS:.status.printableStatus,PHASE:.status.phase,READY:.status.ready"
-        # Pass names as individual arguments to avoid slash error in some OC versions
-        table = run_command(['oc', 'get'] + found_by_name + ['-n', namespace, '-o', f'custom-columns={cols}', '--ignore-not-found'])
-        clean_print_table(table, "Resources")
+        clean_print_table(query_result(table_results, 'name'), "Resources")
 
     if args.yes:
         print("\n[--yes flag] Skipping confirmation prompt.")
@@ -778,7 +3854,7 @@ def delete_action(args):
     if found_by_label:
         try:
             cmd = ['oc', 'delete', kinds, '-n', namespace, '-l', selector]
-            run_command(cmd)
+            run_command(cmd, retry=True) # Selector deletes are idempotent
             print(f"  [SUCCESS] Managed resources deleted.")
         except Exception as e:
             print(f"  [FAILED ] Bulk deletion: {e}")
@@ -789,7 +3865,7 @@ def delete_action(args):
             if "/" not in r: continue
             kind, name = r.split('/')
             try:
-                run_command(['oc', 'delete', kind, name, '-n', namespace])
+                run_command(['oc', 'delete', kind, name, '-n', namespace, '--ignore-not-found'], retry=True)
                 print(f"  [DELETED] {kind}/{name}")
             except Exception as e:
                 print(f"  [FAILED ] {kind}/{name}: {e}")
@@ -813,6 +3889,78 @@ def clean_print_table(output, title):
     for line in lines[1:]:
         print(line.replace("<none>", "  -   "))
 
+def parse_k8s_timestamp(value):
+    """Parses a Kubernetes RFC3339 timestamp (with or without fractional seconds) into a naive UTC datetime."""
+    if not value:
+        return None
+    value = value.replace('Z', '')
+    if '.' in value:
+        head, frac = value.split('.', 1)
+        value = f"{head}.{frac[:6]}"
+        fmt = "%Y-%m-%dT%H:%M:%S.%f"
+    else:
+        fmt = "%Y-%m-%dT%H:%M:%S"
+    try:
+        return datetime.strptime(value, fmt)
+    except ValueError:
+        return None
+
+def format_age(ts):
+    """Formats a datetime as a kubectl-style age (e.g. 45s, 12m, 3h, 2d)."""
+    if not ts:
+        return "-"
+    seconds = int((datetime.utcnow() - ts).total_seconds())
+    if seconds < 120: return f"{max(seconds, 0)}s"
+    if seconds < 7200: return f"{seconds // 60}m"
+    if seconds < 172800: return f"{seconds // 3600}h"
+    return f"{seconds // 86400}d"
+
+def event_timestamp(event):
+    """Best available timestamp of a core/v1 Event (series, last, event time, first, creation)."""
+    for value in (
+        (event.get('series') or {}).get('lastObservedTime'),
+        event.get('lastTimestamp'),
+        event.get('eventTime'),
+        event.get('firstTimestamp'),
+        event.get('metadata', {}).get('creationTimestamp'),
+    ):
+        ts = parse_k8s_timestamp(value)
+        if ts:
+            return ts
+    return datetime.min
+
+def event_queries(namespace, objects):
+    """One server-side filtered event query per managed (kind, name) object (field selectors cannot OR)."""
+    return {
+        f"events:{kind}/{name}": ['oc', 'get', 'events', '-n', namespace, '--field-selector',
+                                  f'involvedObject.kind={kind},involvedObject.name={name}', '-o', 'json']
+        for kind, name in objects
+    }
+
+def index_events(results):
+    """
+    Builds {(kind, name): [events sorted by timestamp]} from the 'events:*' query results.
+    Returns it with the list of objects whose events could not be read (skipped, not raised).
+    """
+    index = {}
+    failed = []
+    for key, raw in results.items():
+        if not key.startswith('events:'):
+            continue
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+            items = json.loads(raw).get('items', []) if raw.strip() else []
+        except Exception:
+            failed.append(key[len('events:'):])
+            continue
+        for ev in items:
+            obj = ev.get('involvedObject', {})
+            index.setdefault((obj.get('kind', '?'), obj.get('name', '?')), []).append(ev)
+    for events in index.values():
+        events.sort(key=event_timestamp)
+    return index, failed
+
 def status_action(args):
     project = args.project
     spec = args.spec
@@ -827,19 +3975,47 @@ def status_action(args):
     print(f"Target Namespace: {ns}")
     print("=" * 100)
 
+    vm_cols = "KIND:.kind,NAME:.metadata.name,STATUS:.status.printableStatus,READY:.status.ready"
+    rt_cols = "KIND:.kind,NAME:.metadata.name,PHASE:.status.phase,VMI-IP:.status.interfaces[0].ipAddress,POD-IP:.status.podIP,NODE:.spec.nodeName"
+    dv_cols = "KIND:.kind,NAME:.metadata.name,PHASE:.status.phase,PROGRESS:.status.progress"
+    pvc_cols = "KIND:.kind,NAME:.metadata.name,STATUS:.status.phase,CAPACITY:.status.capacity.storage,ACCESS-MODES:.spec.accessModes"
+    cfg_cols = "KIND:.kind,NAME:.metadata.name,CREATED:.metadata.creationTimestamp"
+
+    # Events are fetched per managed object: VM/VMI share a name, each disk is a DV and a PVC
+    instances = resolve_instances(context, spec, args.replicas)
+    if args.target:
+        instances = [i for i in instances if i['name'] == args.target] or [{'name': args.target}]
+    infra_config = load_infrastructure_config(project, context)
+    event_objects = []
+    for inst in instances:
+        vm_name = inst['name']
+        disks = [f"{vm_name}-root-disk"] + [d['dv_name'] for d in resolve_storage_options(context, inst, infra_config)['data_disks']]
+        event_objects += [('VirtualMachine', vm_name), ('VirtualMachineInstance', vm_name)]
+        event_objects += [(kind, disk) for disk in disks for kind in ('DataVolume', 'PersistentVolumeClaim')]
+
+    # All sections are independent: fetch them concurrently, then print in order
+    queries = {
+        'vms': ['oc', 'get', 'vm', '-n', ns, '-l', selector, '--ignore-not-found', '-o', f'custom-columns={vm_cols}'],
+        'runtime': ['oc', 'get', 'vmi,pod', '-n', ns, '-l', selector, '--ignore-not-found', '-o', f'custom-columns={rt_cols}'],
+        'dvs': ['oc', 'get', 'dv', '-n', ns, '-l', selector, '--ignore-not-found', '-o', f'custom-columns={dv_cols}'],
+        'pvcs': ['oc', 'get', 'pvc', '-n', ns, '-l', selector, '--ignore-not-found', '-o', f'custom-columns={pvc_cols}'],
+        'configs': ['oc', 'get', 'net-attach-def,secret', '-n', ns, '-l', selector, '--ignore-not-found', '-o', f'custom-columns={cfg_cols}'],
+        'claimed': ['oc', 'get', 'vm', '-n', ns, '-l', selector, '-o', 'json'],
+    }
+    queries.update(event_queries(ns, event_objects))
+    results = run_commands_parallel(queries)
+
     try:
         # 1. Virtual Machines (Managed)
         print("\n1. Managed Virtual Machines (Health & Power)")
         print("-" * 100)
-        vm_cols = "KIND:.kind,NAME:.metadata.name,STATUS:.status.printableStatus,READY:.status.ready"
-        vms = run_command(['oc', 'get', 'vm', '-n', ns, '-l', selector, '--ignore-not-found', '-o', f'custom-columns={vm_cols}'])
+        vms = query_result(results, 'vms')
         clean_print_table(vms, "Virtual Machines")
 
         # 2. Active Runtime & IP Addresses (VMI / Pod)
         print("\n2. Active Runtime & IP Addresses (VMI / Pod)")
         print("-" * 100)
-        rt_cols = "KIND:.kind,NAME:.metadata.name,PHASE:.status.phase,VMI-IP:.status.interfaces[0].ipAddress,POD-IP:.status.podIP,NODE:.spec.nodeName"
-        runtime_raw = run_command(['oc', 'get', 'vmi,pod', '-n', ns, '-l', selector, '--ignore-not-found', '-o', f'custom-columns={rt_cols}'])
+        runtime_raw = query_result(results, 'runtime')
         
         if not runtime_raw.strip() or "No resources found" in runtime_raw:
             print("   - No active runtimes found.")
@@ -860,15 +4036,13 @@ def status_action(args):
         print("\n3. Storage & Disk Provisioning (DataVolumes / PVC)")
         print("-" * 100)
         # DataVolume Status
-        dv_cols = "KIND:.kind,NAME:.metadata.name,PHASE:.status.phase,PROGRESS:.status.progress"
-        dvs = run_command(['oc', 'get', 'dv', '-n', ns, '-l', selector, '--ignore-not-found', '-o', f'custom-columns={dv_cols}'])
+        dvs = query_result(results, 'dvs')
         clean_print_table(dvs, "DataVolumes")
         
         print("-" * 30)
         # PVC Status (Physical allocation)
-        pvc_cols = "KIND:.kind,NAME:.metadata.name,STATUS:.status.phase,CAPACITY:.status.capacity.storage,ACCESS-MODES:.spec.accessModes"
         # Search by label first
-        pvcs = run_command(['oc', 'get', 'pvc', '-n', ns, '-l', selector, '--ignore-not-found', '-o', f'custom-columns={pvc_cols}'])
+        pvcs = query_result(results, 'pvcs')
         
         # If no labeled PVCs, try name prefix fallback
         if not pvcs.strip() or "No resources found" in pvcs:
@@ -892,49 +4066,59 @@ def status_action(args):
         # 4. Configuration & Network (NAD / Secret)
         print("\n4. Network (NAD) & Config (Secret) Resources")
         print("-" * 100)
-        cfg_cols = "KIND:.kind,NAME:.metadata.name,CREATED:.metadata.creationTimestamp"
-        configs = run_command(['oc', 'get', 'net-attach-def,secret', '-n', ns, '-l', selector, '--ignore-not-found', '-o', f'custom-columns={cfg_cols}'])
+        configs = query_result(results, 'configs')
         clean_print_table(configs, "Config Resources")
 
         # 5. Recent Events (Intelligent Diagnostics)
         print("\n5. Recent Events (Priority: Warning first, Max 15)")
         print("-" * 100)
-        events_raw = run_command(['oc', 'get', 'events', '-n', ns, '--sort-by=.lastTimestamp', '--ignore-not-found'])
-        if events_raw.strip():
-            base_name = context.get('name_prefix', spec)
-            lines = events_raw.splitlines()
-            
-            # Filter: Only events related to this spec/base_name/target
-            # If target is provided, we strictly filter by target name to avoid noise from other instances
-            search_term = args.target if args.target else spec
-            relevant = [l for l in lines if search_term in l or base_name in l]
-            
-            # If specific target, ensure it's actually about that target (more strict)
-            if args.target:
-                relevant = [l for l in relevant if args.target in l]
-            
-            if relevant:
-                # Prioritize: Warning events go to top, then Normal
-                warnings = [l for l in relevant if "Warning" in l]
-                normals = [l for l in relevant if "Normal" in l]
-                
-                # Combine and limit to 15
-                final_list = (warnings + normals)[-15:]
-                
-                print(f"{'AGE':<10} {'TYPE':<8} {'REASON':<15} {'OBJECT':<40} {'MESSAGE'}")
-                for e in final_list:
-                    p = e.split()
-                    if len(p) < 5: continue
-                    # AGE(0), TYPE(1), REASON(2), OBJECT(3), MESSAGE(4...)
-                    age, etype, reason, obj = p[0], p[1], p[2], p[3]
-                    msg = " ".join(p[4:])
-                    # Truncate object name if too long to keep table aligned
-                    if len(obj) > 38: obj = obj[:35] + "..."
-                    print(f"{age:<10} {etype:<8} {reason:<15} {obj:<40} {msg}")
-            else:
-                print("   - No specific events found for this spec recently.")
-        else:
-            print("   - No events found in namespace.")
+        # virt-launcher pod names are only known from the runtime query above
+        pod_names = [l.split()[1] for l in runtime_raw.splitlines()[1:]
+                     if len(l.split()) > 1 and l.split()[0] == 'Pod']
+        late_objects = [('Pod', name) for name in pod_names]
+        # Root disks claimed from the warm pool are only known from the VMs' annotations
+        try:
+            claimed = claimed_root_disks(parse_vm_annotations(query_result(results, 'claimed')))
+        except Exception as e:
+            print(f"   [WARNING] Could not read the warm pool disks claimed by the VMs: {e}")
+            claimed = {}
+        for vm_name in sorted(claimed):
+            if any(inst['name'] == vm_name for inst in instances):
+                late_objects += [(kind, claimed[vm_name]) for kind in ('DataVolume', 'PersistentVolumeClaim')]
+        if late_objects:
+            results.update(run_commands_parallel(event_queries(ns, late_objects)))
+        events_by_object, failed_events = index_events(results)
+        if failed_events:
+            # Events are diagnostics only: report and keep the objects that could be read
+            names = sorted(failed_events)
+            more = f" (+{len(names) - 5} more)" if len(names) > 5 else ""
+            print(f"   [WARNING] Could not read events for {len(names)} object(s): {', '.join(names[:5])}{more}")
+
+        all_events = [ev for evs in events_by_object.values() for ev in evs]
+        if all_events:
+            # Prioritize: most recent Warning events first, then fill up with Normal ones
+            warnings = [e for e in all_events if e.get('type') == 'Warning']
+            normals = [e for e in all_events if e.get('type') != 'Warning']
+            warnings.sort(key=event_timestamp)
+            normals.sort(key=event_timestamp)
+            final_list = warnings[-15:]
+            final_list += normals[-(15 - len(final_list)):] if len(final_list) < 15 else []
+
+            print(f"{'AGE':<10} {'TYPE':<8} {'REASON':<15} {'OBJECT':<40} {'MESSAGE'}")
+            for e in final_list:
+                obj_ref = e.get('involvedObject', {})
+                obj = f"{obj_ref.get('kind', '?').lower()}/{obj_ref.get('name', '?')}"
+                # Truncate object name if too long to keep table aligned
+                if len(obj) > 38: obj = obj[:35] + "..."
+                msg = " ".join((e.get('message') or '').split())
+                count = e.get('count') or (e.get('series') or {}).get('count')
+                if count and count > 1:
+                    msg = f"{msg} (x{count})"
+                ts = event_timestamp(e)
+                age = format_age(ts if ts != datetime.min else None)
+                print(f"{age:<10} {e.get('type', '-'):<8} {e.get('reason', '-'):<15} {obj:<40} {msg}")
+        elif len(failed_events) < len(event_objects) + len(late_objects):
+            print("   - No events found for the managed objects of this spec.")
     except Exception as e:
         print(f"\n[WARNING] Could not retrieve full status summary: {e}")
         print("This may be expected if resources are still being created or if permissions are restricted.")
@@ -946,6 +4130,375 @@ def list_action(args):
     status_action(args)
 
 
+REPORT_STAGES = (
+    ('wait', 'created', 'import_start'),     # VM created -> root disk bound (importer can start)
+    ('import', 'import_start', 'import_done'),
+    ('schedule', 'sched_start', 'scheduled'),  # disk ready (or VMI created) -> launcher pod scheduled
+    ('boot', 'scheduled', 'running'),
+    ('agent', 'running', 'agent'),           # VMI running -> guest agent connected
+    ('total', 'created', 'ready'),
+)
+
+def condition_time(obj, cond_type, status='True'):
+    """lastTransitionTime of a status condition in the given state, or None."""
+    for cond in obj.get('status', {}).get('conditions', []) or []:
+        if cond.get('type') == cond_type and str(cond.get('status')) == status:
+            return parse_k8s_timestamp(cond.get('lastTransitionTime'))
+    return None
+
+def collect_provision_timeline(items):
+    """
+    Builds {vm_name: {milestone: datetime}} from one bulk list of VMs, VMIs, DataVolumes and launcher pods.
+    Milestones: created, import_start, import_done, vmi_created, scheduled, running, agent.
+    """
+    by_kind = {}
+    for item in items:
+        by_kind.setdefault(item.get('kind'), {})[item['metadata']['name']] = item
+
+    timeline = {}
+    for vm_name, vm in by_kind.get('VirtualMachine', {}).items():
+        meta = vm['metadata']
+        marks = {'created': parse_k8s_timestamp(meta.get('creationTimestamp'))}
+
+        dv_name = meta.get('annotations', {}).get('v-auto/root-disk', f"{vm_name}-root-disk")
+        dv = by_kind.get('DataVolume', {}).get(dv_name)
+        if dv:
+            marks['import_start'] = condition_time(dv, 'Bound') or parse_k8s_timestamp(dv['metadata'].get('creationTimestamp'))
+            if dv.get('status', {}).get('phase') == 'Succeeded':
+                marks['import_done'] = condition_time(dv, 'Ready')
+            # Disk claimed from the warm pool: imported before this VM existed
+            if marks.get('import_done') and marks['created'] and marks['import_done'] < marks['created']:
+                marks['import_start'] = marks['import_done'] = None
+
+        vmi = by_kind.get('VirtualMachineInstance', {}).get(vm_name)
+        if vmi:
+            marks['vmi_created'] = parse_k8s_timestamp(vmi['metadata'].get('creationTimestamp'))
+            for entry in vmi.get('status', {}).get('phaseTransitionTimestamps', []) or []:
+                phase = entry.get('phase')
+                if phase in ('Scheduled', 'Running'):
+                    marks[phase.lower()] = parse_k8s_timestamp(entry.get('phaseTransitionTimestamp'))
+            marks['agent'] = condition_time(vmi, 'AgentConnected')
+
+        if not marks.get('scheduled'):
+            # Older KubeVirt without phaseTransitionTimestamps: fall back to the launcher pod
+            pod = next((p for p in by_kind.get('Pod', {}).values()
+                        if p['metadata'].get('labels', {}).get('kubevirt.io/vm') == vm_name
+                        or p['metadata'].get('labels', {}).get('vm.kubevirt.io/name') == vm_name), None)
+            if pod:
+                marks['scheduled'] = condition_time(pod, 'PodScheduled')
+
+        starts = [t for t in (marks.get('import_done'), marks.get('vmi_created')) if t]
+        marks['sched_start'] = max(starts) if starts else None
+        marks['ready'] = marks.get('agent') or marks.get('running')
+        timeline[vm_name] = marks
+    return timeline
+
+def stage_durations(marks):
+    """{stage: seconds or None} for one VM's milestones."""
+    durations = {}
+    for stage, start, end in REPORT_STAGES:
+        t0, t1 = marks.get(start), marks.get(end)
+        durations[stage] = max((t1 - t0).total_seconds(), 0.0) if t0 and t1 else None
+    return durations
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (None if empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(-(-pct * len(ordered) // 100)), 1)
+    return ordered[rank - 1]
+
+def format_duration(seconds):
+    if seconds is None:
+        return "-"
+    if seconds < 120:
+        return f"{seconds:.0f}s"
+    if seconds < 7200:
+        return f"{int(seconds // 60)}m{int(seconds % 60):02d}s"
+    return f"{int(seconds // 3600)}h{int(seconds % 3600 // 60):02d}m"
+
+def render_report_prometheus(project, spec, per_vm, summary):
+    """Node exporter textfile format: per-VM stage gauges plus p50/p95 across the spec."""
+    lines = [
+        "# HELP vauto_provision_stage_seconds Duration of a VM provisioning stage.",
+        "# TYPE vauto_provision_stage_seconds gauge",
+    ]
+    for vm_name, durations in sorted(per_vm.items()):
+        for stage, value in durations.items():
+            if value is not None:
+                lines.append(f'vauto_provision_stage_seconds{{project="{project}",spec="{spec}",vm="{vm_name}",stage="{stage}"}} {value:.0f}')
+    lines += [
+        "# HELP vauto_provision_stage_quantile_seconds Percentile of a provisioning stage across the spec.",
+        "# TYPE vauto_provision_stage_quantile_seconds gauge",
+    ]
+    for stage, stats in summary.items():
+        for quantile, key in (('0.5', 'p50'), ('0.95', 'p95')):
+            if stats[key] is not None:
+                lines.append(f'vauto_provision_stage_quantile_seconds{{project="{project}",spec="{spec}",stage="{stage}",quantile="{quantile}"}} {stats[key]:.0f}')
+    return "\n".join(lines) + "\n"
+
+def report_action(args):
+    """Provisioning latency per VM and stage (import, scheduling, boot, guest agent) from cluster timestamps."""
+    project = args.project
+    spec = args.spec
+    context = load_config(project, spec)
+    namespace = context.get('namespace', 'default')
+    selector = f"v-auto/project={project},v-auto/spec={spec}"
+    if args.target:
+        selector = f"{selector},v-auto/name={args.target}"
+
+    try:
+        raw = run_command(['oc', 'get', 'vm,vmi,dv,pod', '-n', namespace, '-l', selector, '-o', 'json'])
+    except Exception as e:
+        print(f"[ERROR] Failed to read provisioning timestamps: {e}"); sys.exit(1)
+    items = json.loads(raw).get('items', []) if raw.strip() else []
+
+    timeline = collect_provision_timeline(items)
+    per_vm = {name: stage_durations(marks) for name, marks in timeline.items()}
+    if not per_vm:
+        print(f"[INFO] No VMs found for selector '{selector}' in {namespace}.")
+        return
+    summary = {}
+    for stage, _, _ in REPORT_STAGES:
+        values = [d[stage] for d in per_vm.values() if d[stage] is not None]
+        summary[stage] = {'count': len(values), 'p50': percentile(values, 50), 'p95': percentile(values, 95),
+                          'max': max(values) if values else None}
+
+    if args.format == 'json':
+        output = json.dumps({
+            'project': project, 'spec': spec, 'namespace': namespace,
+            'generated': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'stages': [stage for stage, _, _ in REPORT_STAGES],
+            'instances': {name: {'durations': per_vm[name],
+                                 'milestones': {k: v.strftime('%Y-%m-%dT%H:%M:%SZ') for k, v in marks.items() if v}}
+                          for name, marks in sorted(timeline.items())},
+            'summary': summary,
+        }, indent=2)
+    elif args.format == 'prometheus':
+        output = render_report_prometheus(project, spec, per_vm, summary)
+    else:
+        stages = [stage for stage, _, _ in REPORT_STAGES]
+        lines = [f"\n[ Provisioning Latency: {project}/{spec} | {len(per_vm)} VM(s) | Namespace: {namespace} ]",
+                 f"{'NAME':<25} " + " ".join(f"{s.upper():>9}" for s in stages)]
+        for name in sorted(per_vm):
+            lines.append(f"{name:<25} " + " ".join(f"{format_duration(per_vm[name][s]):>9}" for s in stages))
+        lines.append("-" * (26 + 10 * len(stages)))
+        for key in ('p50', 'p95', 'max'):
+            lines.append(f"{key.upper():<25} " + " ".join(f"{format_duration(summary[s][key]):>9}" for s in stages))
+        # Which stage dominates the median end-to-end time?
+        ranked = [(summary[s]['p50'], s) for s in stages if s != 'total' and summary[s]['p50'] is not None]
+        if ranked:
+            lines.append(f"\n[INFO] Dominant stage (p50): {max(ranked)[1]}")
+        output = "\n".join(lines)
+
+    if args.report_file:
+        # Write-then-rename so a textfile collector never reads a partial file
+        tmp_path = f"{args.report_file}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(output if output.endswith("\n") else output + "\n")
+        os.replace(tmp_path, args.report_file)
+        print(f"[SUCCESS] Report ({args.format}) written to {args.report_file}")
+    else:
+        print(output)
+
+MAC_ADDRESS = re.compile(r'^([0-9a-f]{2}:){5}[0-9a-f]{2}$')
+
+def project_spec_names(project):
+    """Spec names of a project: '<project>/*.yaml' and legacy '<project>/specs/*.yaml'."""
+    root = os.path.join(PROJECTS_DIR, project)
+    names = set()
+    for directory in (root, os.path.join(root, 'specs')):
+        if os.path.isdir(directory):
+            names.update(n[:-len('.yaml')] for n in os.listdir(directory) if n.endswith('.yaml'))
+    return sorted(names)
+
+def network_config_ethernets(nc, cache):
+    """'ethernets' of a network_config (string or mapping); identical strings are parsed once."""
+    if isinstance(nc, str):
+        if nc not in cache:
+            cache[nc] = yaml.safe_load(nc)
+        nc = cache[nc]
+    if not isinstance(nc, dict):
+        return {}
+    return (nc.get('network') if isinstance(nc.get('network'), dict) else nc).get('ethernets') or {}
+
+def instance_addresses(inst, context, nc_cache):
+    """Raw (IPs, MACs) an instance claims: 'ip', interfaces[].ip/mac and its network_config."""
+    ips, macs = [], []
+    if inst.get('ip'):
+        ips.append(inst['ip'])
+    for iface in inst.get('interfaces') or []:
+        if isinstance(iface, dict):
+            if iface.get('ip'):
+                ips.append(iface['ip'])
+            if iface.get('mac') or iface.get('macAddress'):
+                macs.append(iface.get('mac') or iface.get('macAddress'))
+    for eth in network_config_ethernets(inst.get('network_config', context.get('network_config')), nc_cache).values():
+        if isinstance(eth, dict):
+            ips.extend(eth.get('addresses') or [])
+            if (eth.get('match') or {}).get('macaddress'):
+                macs.append(eth['match']['macaddress'])
+    return ips, macs
+
+def node_pin(selector):
+    if isinstance(selector, dict):
+        if 'key' in selector and 'value' in selector:
+            selector = {selector['key']: selector['value']}
+        return selector.get(NODE_PIN_KEY)
+    return None
+
+def nad_definition(conf):
+    """What a shared NAD renders from: two networks with the same nad_name must agree on it."""
+    keys = ('bridge', 'vlan', 'resource_name', 'mtu', 'ipam')
+    definition = {k: conf.get(k) for k in keys if conf.get(k) is not None}
+    definition['type'] = conf.get('type') or 'multus'
+    return json.dumps(definition, sort_keys=True)
+
+def index_spec(project, spec, context, infra, index, issues, nc_cache):
+    """Adds one spec's instances to the conflict indexes; reference errors go straight to `issues`."""
+    namespace = context.get('namespace', 'default')
+    catalog = infra['networks']
+    instances = resolve_instances(context, spec)
+
+    def error(message):
+        issues.append(('ERROR', message, {(project, spec)}))
+
+    common = context.get('networks') or ([context['network']] if context.get('network') else [])
+    if not isinstance(common, list):
+        common = [common]
+    common_names = [e.get('name') if isinstance(e, dict) else e for e in common]
+    for name in common_names:
+        if isinstance(name, str) and name not in catalog and not any(isinstance(e, dict) and e.get('name') == name for e in common):
+            error(f"{project}/{spec}: common network '{name}' is not in the infrastructure catalog")
+    if not common and 'default' not in catalog:
+        error(f"{project}/{spec}: no 'network(s)' set and the catalog has no 'default' network")
+
+    if context.get('image') and context['image'] not in infra['images'] and not context.get('image_url'):
+        error(f"{project}/{spec}: image '{context['image']}' is not in the image catalog")
+
+    used_networks = {n for n in common_names if n in catalog}
+    for inst in instances:
+        vm_name = inst.get('name')
+        where = f"{project}/{spec}:{vm_name}"
+        index['names'].setdefault((namespace, vm_name), []).append(where)
+
+        for iface in inst.get('interfaces') or []:
+            net = iface.get('network') if isinstance(iface, dict) else iface
+            if not net:
+                continue
+            if net in catalog:
+                used_networks.add(net)
+            elif net not in common_names:
+                error(f"{where}: interface network '{net}' is not in the infrastructure catalog")
+
+        profile = inst.get('performance_profile', context.get('performance_profile'))
+        if profile and profile not in infra['performance_profiles']:
+            error(f"{where}: performance profile '{profile}' is not in the catalog")
+        storage_profile = (inst.get('storage') or {}).get('profile', (context.get('storage') or {}).get('profile'))
+        if storage_profile and storage_profile not in infra['storage_profiles']:
+            error(f"{where}: storage profile '{storage_profile}' is not in the catalog")
+
+        try:
+            raw_ips, raw_macs = instance_addresses(inst, context, nc_cache)
+        except yaml.YAMLError as e:
+            error(f"{where}: network_config is not valid YAML: {e}")
+            raw_ips, raw_macs = [], []
+        ips = set()
+        for raw in raw_ips:
+            try:
+                ips.add(str(ipaddress.ip_interface(str(raw)).ip))
+            except ValueError:
+                error(f"{where}: invalid IP address '{raw}'")
+        for ip in ips:
+            index['ips'].setdefault((project, ip), []).append(where)
+        macs = {str(m).lower().replace('-', ':') for m in raw_macs}
+        for mac in macs:
+            if not MAC_ADDRESS.match(mac):
+                error(f"{where}: invalid MAC address '{mac}'")
+            else:
+                index['macs'].setdefault((project, mac), []).append(where)
+
+        pin = node_pin(inst.get('node_selector', context.get('node_selector')))
+        if pin:
+            index['pins'].setdefault((project, spec, pin), []).append(vm_name)
+
+    for net in sorted(used_networks):
+        conf = catalog[net] or {}
+        if conf.get('type') != 'pod' and conf.get('nad_name'):
+            index['nads'].setdefault((namespace, conf['nad_name']), {}).setdefault(nad_definition(conf), []).append(f"{project}/{spec}:{net}")
+    return len(instances)
+
+def find_conflicts(index, issues):
+    """Single pass over the indexes: every key claimed more than once is a conflict."""
+    def specs_of(locations):
+        return {tuple(loc.split(':')[0].split('/', 1)) for loc in locations}
+
+    for (namespace, vm_name), where in index['names'].items():
+        if len(where) > 1:
+            issues.append(('ERROR', f"VM name '{vm_name}' defined {len(where)}x in namespace {namespace}: {', '.join(where)}", specs_of(where)))
+    for label, key in (('IP', 'ips'), ('MAC', 'macs')):
+        for (_, address), where in index[key].items():
+            if len(where) > 1:
+                issues.append(('ERROR', f"{label} {address} claimed by {len(where)} instances: {', '.join(where)}", specs_of(where)))
+    for (namespace, nad_name), definitions in index['nads'].items():
+        if len(definitions) > 1:
+            variants = '; '.join(f"{', '.join(where)} -> {definition}" for definition, where in definitions.items())
+            where = [loc for locs in definitions.values() for loc in locs]
+            issues.append(('ERROR', f"NAD '{nad_name}' in {namespace} is defined differently: {variants}", specs_of(where)))
+    for (project, spec, node), vms in index['pins'].items():
+        if len(vms) > 1 and len(vms) == index['spec_sizes'][(project, spec)]:
+            issues.append(('WARNING', f"{project}/{spec}: all {len(vms)} instances are pinned to node {node} (no failure-domain spread)", {(project, spec)}))
+
+def validate_action(args):
+    """
+    Loads every spec of a project (or of all projects) once, indexes VM names, static IPs, MACs,
+    shared NAD names and node pins, and reports every conflict and dangling catalog reference
+    in one pass. Works offline; exits 1 on errors (usable as a pre-commit hook).
+    """
+    started = time.time()
+    projects = [args.project] if args.project else sorted(
+        p for p in os.listdir(PROJECTS_DIR) if os.path.isdir(os.path.join(PROJECTS_DIR, p)))
+    index = {'names': {}, 'ips': {}, 'macs': {}, 'nads': {}, 'pins': {}, 'spec_sizes': {}}
+    issues = []
+    nc_cache = {}
+    spec_count = instance_count = 0
+
+    for project in projects:
+        specs = project_spec_names(project)
+        if args.project and not specs:
+            print(f"[ERROR] No specs found in {os.path.join(PROJECTS_DIR, project)}")
+            sys.exit(1)
+        base_infra = load_infrastructure_config(project)
+        for spec in specs:
+            try:
+                context = load_config(project, spec)
+                infra = load_infrastructure_config(project, context, base=base_infra)
+                count = index_spec(project, spec, context, infra, index, issues, nc_cache)
+            except (yaml.YAMLError, AttributeError, TypeError, ValueError) as e:
+                reason = ' '.join(str(e).split())
+                issues.append(('ERROR', f"{project}/{spec}: spec could not be read: {reason}", {(project, spec)}))
+                continue
+            index['spec_sizes'][(project, spec)] = count
+            spec_count += 1
+            instance_count += count
+
+    find_conflicts(index, issues)
+    if args.spec:
+        # Whole project is indexed either way; report what involves this spec
+        issues = [i for i in issues if any(spec == args.spec for _, spec in i[2])]
+
+    scope = f"{args.project}/{args.spec}" if args.spec else (args.project or 'all projects')
+    print(f"[VALIDATE] {scope}: {spec_count} spec(s), {instance_count} instance(s) in {len(projects)} project(s), "
+          f"indexed in {(time.time() - started) * 1000:.0f} ms")
+    errors = [i for i in issues if i[0] == 'ERROR']
+    for level, message, _ in sorted(issues, key=lambda i: (i[0] != 'ERROR', i[1])):
+        print(f"  [{level}] {message}")
+    if errors:
+        print(f"\n[FAILED ] {len(errors)} error(s). Nothing was checked against the cluster; fix the specs above.")
+        sys.exit(1)
+    print("[OK] No conflicts found.")
+
 def inspect_action(args):
     """Prints the effective configuration for the project/spec in a detailed, aligned report."""
     project = args.project
@@ -983,7 +4536,7 @@ def inspect_action(args):
             ipam = net_conf.get('ipam', {})
             subnet = ipam.get('range', '-') if isinstance(ipam, dict) else '-'
             bridge = net_conf.get('bridge', '-')
-            print(f"       {net_name:<15} [{net_type:<6}] NAD: {nad:<15} Bridge: {bridge:<12} Subnet: {subnet}")
+            print(f"       {net_name:<15} [{net_type:<6}] NAD: {nad:<15} Bridge: {bridge:<12} Subnet: {subnet}{describe_network_options(net_conf)}")
     else:
         print("       (No networks defined)")
 
@@ -991,11 +4544,28 @@ def inspect_action(args):
     print(f" {'Images':<20} :")
     images = infra_config.get('images', {})
     if images:
+        cache = load_image_cache()
         for img_name, img_conf in images.items():
             url = img_conf.get('url', 'N/A')
             print(f"       {img_name:<15} -> {url}")
+            # Cache state: probed (one HEAD) for images that use a base image, cached metadata otherwise
+            if img_conf.get('base_image'):
+                probe = probe_image(url, img_conf)
+                print(f"       {'':<15}    Cache: {describe_image_probe(probe)} | base image: {probe['digest'] or 'not used (unknown content)'}")
+            elif url in cache:
+                print(f"       {'':<15}    Cache: {describe_image_probe(dict(cache[url], state='cached'))} | base image: off")
     else:
         print("       (No images defined)")
+
+    # Performance Profiles
+    print(f" {'Perf. Profiles':<20} :")
+    profiles = infra_config.get('performance_profiles', {})
+    if profiles:
+        for prof_name, prof_conf in profiles.items():
+            profile, _ = build_performance_profile(prof_name, prof_conf, context.get('cpu'), context.get('memory'))
+            print(f"       {prof_name:<15} -> {describe_performance_profile(profile)}")
+    else:
+        print("       (No performance profiles defined)")
     print(" " + "-"*68)
 
     # [3] Instance List & IP Plan
@@ -1011,6 +4581,9 @@ def inspect_action(args):
         if override_cpu or override_mem:
             specs = f"Override ({override_cpu or context.get('cpu')}vCPU / {override_mem or context.get('memory')})"
         print(f"       {'Specs':<15} : {specs}")
+        profile_name = inst.get('performance_profile', context.get('performance_profile'))
+        if profile_name:
+            print(f"       {'Perf. Profile':<15} : {profile_name}")
 
         # IP Resolution Logic (Check network_config)
         # 1. Check direct 'ip' field
@@ -1059,8 +4632,47 @@ def inspect_action(args):
 
     print(" " + "-"*68)
 
-    # [4] Cloud-Init Configuration (User-Data)
-    print(f"\n [4] CLOUD-INIT CONFIGURATION (User-Data Template)")
+    # [4] Performance Profiles vs. Node Capabilities
+    print(f"\n [4] PERFORMANCE PROFILE VALIDATION")
+    tuned = [i for i in context.get('instances', []) if i.get('performance_profile', context.get('performance_profile'))]
+    if not tuned:
+        print("      (No instance uses a performance profile)")
+    else:
+        try:
+            raw = run_command(['oc', 'get', 'nodes', '-o', 'json'])
+            cluster_nodes = {n['metadata']['name']: n for n in json.loads(raw).get('items', [])} if raw.strip() else {}
+        except Exception as e:
+            cluster_nodes = None
+            print(f"      [WARNING] Node capabilities unavailable, checking the spec only: {e}")
+        for inst in tuned:
+            profile_name = inst.get('performance_profile', context.get('performance_profile'))
+            cpu = inst.get('cpu', context.get('cpu'))
+            memory = inst.get('memory', context.get('memory'))
+            if profile_name not in profiles:
+                print(f"      [ERROR] {inst['name']:<15} : profile '{profile_name}' not found in catalog")
+                continue
+            profile, errors = build_performance_profile(profile_name, profiles[profile_name], cpu, memory)
+            if errors:
+                print(f"      [ERROR] {inst['name']:<15} : {profile_name}: {'; '.join(errors)}")
+                continue
+            if cluster_nodes is None:
+                print(f"      [OK]    {inst['name']:<15} : {profile_name} (spec only)")
+                continue
+            selector = inst.get('node_selector', context.get('node_selector'))
+            selector = selector if isinstance(selector, dict) else None
+            capable = check_profile_nodes(profile, memory, cluster_nodes, selector)
+            if capable:
+                print(f"      [OK]    {inst['name']:<15} : {profile_name} ({len(capable)} capable node(s): {', '.join(sorted(capable)[:3])}{' ...' if len(capable) > 3 else ''})")
+            else:
+                needs = []
+                if profile['dedicated_cpu']: needs.append("label cpumanager=true")
+                if profile['hugepages']: needs.append(f"allocatable hugepages-{profile['hugepages']} >= {memory}")
+                scope = "the pinned node" if selector else "any node"
+                print(f"      [WARNING] {inst['name']:<13} : {profile_name}: no capable node ({scope} lacks {' and '.join(needs)})")
+    print(" " + "-"*68)
+
+    # [5] Cloud-Init Configuration (User-Data)
+    print(f"\n [5] CLOUD-INIT CONFIGURATION (User-Data Template)")
     
     ci_raw = context.get('cloud_init', '')
     if ci_raw:
@@ -1107,6 +4719,24 @@ Examples:
   # Deploy/Recover a specific VM instance only
   ./vman opasnet web deploy --target web-02
 
+  # Review every rendered manifest in full, or export them for GitOps / kustomize
+  ./vman opasnet web deploy --dry-run --verbose
+  ./vman opasnet web deploy --dry-run --export-dir ./out/web
+  ./vman opasnet web deploy --yes --output ndjson > deploy.ndjson
+
+  # Continue an interrupted deploy where it stopped
+  ./vman opasnet web deploy --yes --resume
+
+  # Split a large spec across 4 bastion hosts / jobs (run one shard on each)
+  ./vman opasnet web deploy --yes --shard 1/4
+
+  # Roll out 5 at a time, each wave gated on VMI Ready; stop once more than 10% failed
+  ./vman opasnet web deploy --yes --wave-size 5 --max-unavailable 3 --max-failures 10%
+
+  # Check every spec of a project (or all projects) for duplicate names / IPs / MACs / NADs, offline
+  ./vman opasnet validate
+  ./vman validate
+
   # Delete all resources associated with a specific spec
   ./vman opasnet web delete
 
@@ -1118,6 +4748,26 @@ Examples:
 
   # Check status of a specific VM instance
   ./vman opasnet web status --target web-01
+
+  # Same spec on two clusters at once (or list them under 'clusters:' in the spec)
+  ./vman opasnet web deploy --yes --contexts dc1-admin,dc2-admin
+  ./vman opasnet web status --contexts dc1-admin,dc2-admin
+
+  # Keep 3 pre-imported, stopped VMs ready and start web-03 from one of them
+  ./vman opasnet web pool --pool-size 3
+  ./vman opasnet web claim --target web-03
+
+  # Live-migrate the spec's VMs off hot workers (within node_selector), then keep the layout as placement hints
+  ./vman opasnet web rebalance --dry-run
+  ./vman opasnet web rebalance --yes --max-migrations 2 --save-placement
+
+  # Apply changed cpu/memory to running VMs: live hotplug (spec 'hotplug: true' + LiveUpdate), else restarts 2 at a time
+  ./vman opasnet web scale --dry-run
+  ./vman opasnet web scale --yes --wave-size 2
+
+  # Provisioning latency per stage (import / schedule / boot), as table, JSON or Prometheus textfile
+  ./vman opasnet web report
+  ./vman opasnet web report --format prometheus --report-file /var/lib/node_exporter/vauto_web.prom
 """
     )
     
@@ -1132,8 +4782,8 @@ Examples:
     group.add_argument('--spec', dest='spec_flag', 
                         help="VM specification file name in 'projects/[project]/specs/' (without .yaml)")
     group.add_argument('--action', dest='action_flag', 
-                        choices=['deploy', 'delete', 'status', 'inspect'], 
-                        help="Lifecycle action: 'deploy', 'delete', 'status', 'inspect'")
+                        choices=['deploy', 'delete', 'status', 'inspect', 'pool', 'claim', 'report', 'validate', 'rebalance', 'scale'], 
+                        help="Lifecycle action: 'deploy', 'delete', 'status', 'inspect', 'pool', 'claim', 'report', 'validate', 'rebalance', 'scale'")
     
     group_opt = parser.add_argument_group('Optional Overrides')
     group_opt.add_argument('--replicas', type=int, 
@@ -1144,6 +4794,50 @@ Examples:
                            help="Skip interactive confirmations (Automated mode)")
     group_opt.add_argument('--dry-run', action='store_true',
                            help="Render manifests without applying them")
+    group_opt.add_argument('--shard', metavar='I/N',
+                           help="Deploy only the instances of shard I of N (stable hash of the name); one worker per shard")
+    group_opt.add_argument('--resume', action='store_true',
+                           help="Continue the latest unfinished deploy from its journal (.vman/journal), skipping applied instances/objects")
+    group_opt.add_argument('--wave-size', type=int, metavar='N',
+                           help="Unattended rollout: apply N instances per wave and wait until their VMIs are Ready before the next (scale: VMs restarted at a time, default 1)")
+    group_opt.add_argument('--max-unavailable', type=int, metavar='N',
+                           help="With --wave-size: at most N instances not Ready at any time (default: --wave-size)")
+    group_opt.add_argument('--max-failures', default='0', metavar='N|P%',
+                           help="With --wave-size: stop the rollout once more than N (or P%% of) instances failed (default: 0)")
+    group_opt.add_argument('--wait-agent', action='store_true',
+                           help="With --wave-size / scale: also wait for the guest agent to connect (AgentConnected)")
+    group_opt.add_argument('--wave-timeout', type=int, default=DEFAULT_WAVE_TIMEOUT, metavar='SEC',
+                           help=f"With --wave-size / scale: seconds an instance may take to become Ready or hot-plugged (default: {DEFAULT_WAVE_TIMEOUT})")
+    group_opt.add_argument('--output', '-o', choices=OUTPUT_MODES, default='summary',
+                           help="Deploy output: one line per object (summary) or JSON records (json, ndjson) on stdout, log on stderr")
+    group_opt.add_argument('--verbose', '-v', action='store_true',
+                           help="Show every rendered manifest as full YAML with decoded Secret content")
+    group_opt.add_argument('--export-dir', metavar='DIR',
+                           help="Also write the rendered manifests to DIR (one directory per instance + kustomization.yaml)")
+    group_opt.add_argument('--skip-preflight', action='store_true',
+                           help="Skip the quota/capacity preflight check before deploy")
+    group_opt.add_argument('--pool-size', type=int,
+                           help="Warm pool size for 'pool' (overrides spec 'pool.size')")
+    group_opt.add_argument('--placement', choices=['spread', 'binpack'],
+                           help="Assign node_selector to unpinned instances by node capacity (overrides spec 'placement.strategy')")
+    group_opt.add_argument('--threshold', type=float, default=10, metavar='PCT',
+                           help="'rebalance': stop once hottest and coolest node differ by at most PCT%% utilization (default: 10)")
+    group_opt.add_argument('--max-migrations', type=int, default=2, metavar='N',
+                           help="'rebalance': live migrations in flight at a time (default: 2)")
+    group_opt.add_argument('--steer', action='store_true',
+                           help="'rebalance': restrict each migration to its planned node (KubeVirt 1.6+ addedNodeSelector)")
+    group_opt.add_argument('--save-placement', action='store_true',
+                           help="'rebalance': save the resulting nodes to projects/<project>/placement/<spec>.yaml as deploy placement hints")
+    group_opt.add_argument('--contexts', metavar='CTX[,CTX...]',
+                           help="Run deploy/status/delete on these kubeconfig contexts in parallel (overrides spec 'clusters')")
+    group_opt.add_argument('--qps', type=float, default=DEFAULT_QPS,
+                           help=f"Client-side API rate limit in calls per second, 0 = unlimited (default: {DEFAULT_QPS:g})")
+    group_opt.add_argument('--burst', type=int, default=DEFAULT_BURST,
+                           help=f"API calls allowed in a burst above --qps (default: {DEFAULT_BURST})")
+    group_opt.add_argument('--format', choices=['table', 'json', 'prometheus'], default='table',
+                           help="Output format of 'report' (prometheus = node exporter textfile)")
+    group_opt.add_argument('--report-file',
+                           help="Write the 'report' output to this file instead of stdout")
     
     args = parser.parse_args()
     
@@ -1153,7 +4847,7 @@ Examples:
     action = args.action_flag
     
     # Pre-scan positional args for action keywords to avoid mis-mapping
-    action_keywords = ['deploy', 'delete', 'list', 'status', 'inspect']
+    action_keywords = ['deploy', 'delete', 'list', 'status', 'inspect', 'pool', 'claim', 'report', 'validate', 'rebalance', 'scale']
     for p in args.args_pos:
         if p in action_keywords and not action:
             action = p
@@ -1173,8 +4867,9 @@ Examples:
 
     # Validation & Enhanced Error Reporting
     missing = []
-    if not project: missing.append("project (e.g. opasnet)")
-    if not spec: missing.append("spec (e.g. web)")
+    # 'validate' checks a whole project (or every project) when project/spec are omitted
+    if not project and action != 'validate': missing.append("project (e.g. opasnet)")
+    if not spec and action != 'validate': missing.append("spec (e.g. web)")
     if not action: missing.append("action (deploy, delete, status, inspect)")
 
     if missing:
@@ -1196,6 +4891,17 @@ Examples:
     args.project = project
     args.spec = spec
     args.action = action
+    API_RATE_LIMITER.configure(args.qps, args.burst)
+
+    # status/list/delete fan out when the spec (or --contexts) names several clusters
+    if args.action in ('delete', 'list', 'status'):
+        clusters = resolve_clusters(args, load_config(project, spec))
+        if clusters:
+            if args.action == 'delete' and not args.yes:
+                print("[ERROR] Multi-cluster delete cannot prompt per cluster: review with 'status' and pass --yes.")
+                sys.exit(1)
+            fan_out_action(args, clusters, delete_action if args.action == 'delete' else status_action)
+            return
     
     if args.action == 'deploy':
         deploy_action(args)
@@ -1205,6 +4911,18 @@ Examples:
         list_action(args)
     elif args.action == 'inspect':
         inspect_action(args)
+    elif args.action == 'pool':
+        pool_action(args)
+    elif args.action == 'claim':
+        claim_action(args)
+    elif args.action == 'report':
+        report_action(args)
+    elif args.action == 'validate':
+        validate_action(args)
+    elif args.action == 'rebalance':
+        rebalance_action(args)
+    elif args.action == 'scale':
+        scale_action(args)
 
 if __name__ == '__main__':
     main()